@@ -0,0 +1 @@
+"""Performance benchmarks for Number Trainer."""
@@ -0,0 +1,69 @@
+"""
+In-process load driver.
+
+Replays concurrent training sessions against the ASGI app through httpx ASGITransport,
+without sockets or a server process. This measures the application alone:
+
+    python -m benchmarks.inprocess [--sessions 50] [--exercises 20] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .report import build_report, rss_bytes, write_report
+from .scenario import Recorder, run_session
+
+
+async def run(sessions: int, exercises: int) -> dict[str, Any]:
+    """
+    Run concurrent sessions against the app
+
+    Args:
+        sessions: Number of concurrent sessions
+        exercises: Exercises answered by every session
+
+    Returns:
+        Benchmark report
+    """
+    # Imported here, so the environment can configure the app before its module is loaded
+    from src.number_trainer.web.app import app, lifespan
+
+    recorder = Recorder()
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        # Warm up caches and lazy initialization, so they do not count as growth
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await run_session(client, Recorder(), 5)
+
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        clients = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(sessions)]
+        try:
+            await asyncio.gather(*(run_session(client, recorder, exercises) for client in clients))
+        finally:
+            await asyncio.gather(*(client.aclose() for client in clients))
+        elapsed = time.perf_counter() - start
+        rss_after = rss_bytes()
+
+    settings = {"sessions": sessions, "exercises": exercises}
+    return build_report("inprocess", settings, recorder, elapsed, rss_before, rss_after)
+
+
+def main() -> None:
+    """Run the driver with command line options."""
+    parser = argparse.ArgumentParser(description="Load the web app in process through ASGITransport")
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent sessions")
+    parser.add_argument("--exercises", type=int, default=20, help="exercises per session")
+    parser.add_argument("--output", type=Path, help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    write_report(asyncio.run(run(args.sessions, args.exercises)), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Comparison of the uvicorn and prefork launchers.
+
+Both launchers start a local server with the same number of workers, which is then loaded
+by benchmarks.loadgen. For each launcher the report has the startup time until the server
+answers, RSS and PSS of all server processes once the workers are up and after the load,
+and the load results. RSS counts pages shared copy-on-write in every process, PSS divides
+them between the processes that share them:
+
+    python -m benchmarks.launchers [--workers 4] [--processes 4] [--sessions 25] [--exercises 20]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from . import loadgen
+from .report import print_report
+
+LAUNCHERS = ("uvicorn", "prefork")
+
+# Seconds to wait after the first answer, so that every worker has started before memory is measured
+SETTLE_TIME = 2.0
+
+
+def measure(launcher: str, workers: int, processes: int, sessions: int, exercises: int) -> dict[str, Any]:
+    """
+    Start a server with one launcher, load it and stop it
+
+    Args:
+        launcher: LAUNCHER of the server
+        workers: Number of worker processes
+        processes: Load generating processes
+        sessions: Concurrent sessions per process
+        exercises: Exercises answered by every session
+
+    Returns:
+        Startup time, memory and load report of the launcher
+    """
+    start = time.perf_counter()
+    server, url = loadgen.start_server(workers, launcher)
+    startup = time.perf_counter() - start
+    try:
+        time.sleep(SETTLE_TIME)
+        idle_rss, idle_pss = loadgen.server_rss(server.pid), loadgen.server_pss(server.pid)
+        report = loadgen.run(url, processes, sessions, exercises, 0.0, server.pid)
+        loaded_rss, loaded_pss = loadgen.server_rss(server.pid), loadgen.server_pss(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=loadgen.STARTUP_TIMEOUT)
+
+    report["settings"].update(workers=workers, launcher=launcher)
+    return {
+        "startup_seconds": round(startup, 3),
+        "idle_rss_bytes": idle_rss,
+        "idle_pss_bytes": idle_pss,
+        "loaded_rss_bytes": loaded_rss,
+        "loaded_pss_bytes": loaded_pss,
+        "load": report,
+    }
+
+
+def print_comparison(results: dict[str, dict[str, Any]]) -> None:
+    """Print the launchers side by side."""
+    print(
+        f"{'launcher':<10}{'startup s':>11}{'idle PSS MiB':>14}"
+        f"{'loaded PSS MiB':>16}{'loaded RSS MiB':>16}{'req/s':>10}"
+    )
+    for launcher, result in results.items():
+        print(
+            f"{launcher:<10}{result['startup_seconds']:>11.2f}"
+            f"{result['idle_pss_bytes'] / 1024**2:>14.1f}{result['loaded_pss_bytes'] / 1024**2:>16.1f}"
+            f"{result['loaded_rss_bytes'] / 1024**2:>16.1f}{result['load']['requests_per_second']:>10.1f}"
+        )
+
+
+def main() -> None:
+    """Compare the launchers with command line options."""
+    parser = argparse.ArgumentParser(description="Compare the uvicorn and prefork launchers of the production server")
+    parser.add_argument("--workers", type=int, default=2, help="workers of each server")
+    parser.add_argument("--processes", type=int, default=4, help="load generating processes")
+    parser.add_argument("--sessions", type=int, default=25, help="concurrent sessions per process")
+    parser.add_argument("--exercises", type=int, default=20, help="exercises per session")
+    parser.add_argument("--output", type=Path, help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for launcher in LAUNCHERS:
+        results[launcher] = measure(launcher, args.workers, args.processes, args.sessions, args.exercises)
+        print_report(results[launcher]["load"])
+        print()
+    print_comparison(results)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
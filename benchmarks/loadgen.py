@@ -0,0 +1,197 @@
+"""
+Multi-process load generator for a running server.
+
+Every process runs concurrent training sessions over real HTTP connections, so the
+numbers include uvicorn, the network stack and all workers. Without --url a local
+server is started with the given number of workers and stopped afterwards:
+
+    python -m benchmarks.loadgen [--workers 2] [--launcher prefork] [--processes 4] [--sessions 25] [--exercises 20]
+    python -m benchmarks.loadgen --url http://127.0.0.1:8000 [--server-pid PID]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .report import build_report, pss_bytes, rss_bytes, write_report
+from .scenario import Recorder, run_session
+
+# Seconds to wait for a started server to answer health checks
+STARTUP_TIMEOUT = 30.0
+
+
+def process_tree(pid: int) -> list[int]:
+    """Process and all its descendants, read from /proc; only the process itself elsewhere."""
+    pids = [pid]
+    for parent in pids:
+        for children in Path(f"/proc/{parent}/task").glob("*/children"):
+            try:
+                pids.extend(int(child) for child in children.read_text().split())
+            except OSError:
+                continue
+    return pids
+
+
+def server_rss(pid: int | None) -> int:
+    """Total RSS of the server and its workers in bytes, 0 when unknown."""
+    if pid is None:
+        return 0
+    return sum(rss_bytes(member) for member in process_tree(pid))
+
+
+def server_pss(pid: int) -> int:
+    """Total PSS of the server and its workers in bytes, pages shared between them are counted once."""
+    return sum(pss_bytes(member) for member in process_tree(pid))
+
+
+def free_port() -> int:
+    """Port that is free on the loopback interface."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port: int = probe.getsockname()[1]
+        return port
+
+
+def start_server(workers: int, launcher: str = "uvicorn") -> tuple[subprocess.Popen[bytes], str]:
+    """
+    Start the production server on a free local port
+
+    Args:
+        workers: Number of worker processes
+        launcher: LAUNCHER of the server, "uvicorn" or "prefork"
+
+    Returns:
+        Server process and its base URL
+    """
+    port = free_port()
+    env = {**os.environ, "HOST": "127.0.0.1", "PORT": str(port), "WORKERS": str(workers), "LAUNCHER": launcher}
+    env.setdefault("LOG_LEVEL", "warning")
+    # Exercises may be checked by another worker than the one that created them
+    if workers > 1:
+        env.setdefault("EXERCISE_STORE", "signed")
+    server = subprocess.Popen([sys.executable, "-m", "src.number_trainer.web.production"], env=env)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{url}/api/health").status_code == 200:
+                return server, url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError("Server did not start in time")
+
+
+def run_worker(url: str, sessions: int, exercises: int, think_time: float) -> tuple[Recorder, float, float]:
+    """
+    Run concurrent sessions in one process
+
+    Args:
+        url: Base URL of the server
+        sessions: Number of concurrent sessions
+        exercises: Exercises answered by every session
+        think_time: Seconds between answers
+
+    Returns:
+        Recorded latencies, wall clock start and end of the load
+    """
+
+    async def run() -> Recorder:
+        recorder = Recorder()
+        # One connection per session, like separate browsers
+        limits = httpx.Limits(max_connections=1)
+        clients = [httpx.AsyncClient(base_url=url, limits=limits) for _ in range(sessions)]
+        try:
+            await asyncio.gather(*(run_session(client, recorder, exercises, think_time) for client in clients))
+        finally:
+            await asyncio.gather(*(client.aclose() for client in clients))
+        return recorder
+
+    start = time.time()
+    recorder = asyncio.run(run())
+    return recorder, start, time.time()
+
+
+def run(
+    url: str, processes: int, sessions: int, exercises: int, think_time: float, server_pid: int | None
+) -> dict[str, Any]:
+    """
+    Load the server from several processes
+
+    Args:
+        url: Base URL of the server
+        processes: Number of load generating processes
+        sessions: Concurrent sessions per process
+        exercises: Exercises answered by every session
+        think_time: Seconds between answers
+        server_pid: Server process for RSS measurement, None when unknown
+
+    Returns:
+        Benchmark report
+    """
+    rss_before = server_rss(server_pid)
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes) as pool:
+        results = pool.starmap(run_worker, [(url, sessions, exercises, think_time)] * processes)
+    rss_after = server_rss(server_pid)
+
+    recorder = Recorder()
+    for worker_recorder, _, _ in results:
+        recorder.merge(worker_recorder)
+    # Process startup is not part of the load
+    elapsed = max(end for _, _, end in results) - min(start for _, start, _ in results)
+
+    settings = {"processes": processes, "sessions": sessions, "exercises": exercises, "think_time": think_time}
+    return build_report("loadgen", settings, recorder, elapsed, rss_before, rss_after)
+
+
+def main() -> None:
+    """Run the load generator with command line options."""
+    parser = argparse.ArgumentParser(description="Load a running Number Trainer server from several processes")
+    parser.add_argument("--url", help="base URL of a running server, a local one is started when omitted")
+    parser.add_argument("--server-pid", type=int, help="pid of the server given by --url, for RSS growth")
+    parser.add_argument("--workers", type=int, default=1, help="workers of the started server")
+    parser.add_argument(
+        "--launcher", choices=("uvicorn", "prefork"), default="uvicorn", help="launcher of the started server"
+    )
+    parser.add_argument("--processes", type=int, default=4, help="load generating processes")
+    parser.add_argument("--sessions", type=int, default=25, help="concurrent sessions per process")
+    parser.add_argument("--exercises", type=int, default=20, help="exercises per session")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between answers")
+    parser.add_argument("--output", type=Path, help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    server = None
+    url, server_pid = args.url, args.server_pid
+    if url is None:
+        server, url = start_server(args.workers, args.launcher)
+        server_pid = server.pid
+    try:
+        report = run(url, args.processes, args.sessions, args.exercises, args.think_time, server_pid)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=STARTUP_TIMEOUT)
+
+    if server is not None:
+        report["settings"]["workers"] = args.workers
+        report["settings"]["launcher"] = args.launcher
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark reports: throughput, latency percentiles and memory growth."""
+
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from .scenario import Recorder
+
+
+def rss_bytes(pid: int | None = None) -> int:
+    """
+    Resident memory of a process
+
+    Args:
+        pid: Process id, None for the current process
+
+    Returns:
+        Current RSS from /proc; without /proc the peak RSS of the current process
+    """
+    status = Path(f"/proc/{pid or 'self'}/status")
+    try:
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid is not None and pid != os.getpid():
+        return 0
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def pss_bytes(pid: int) -> int:
+    """
+    Proportional set size of a process: pages shared with other processes count in part
+
+    Args:
+        pid: Process id
+
+    Returns:
+        PSS from /proc, 0 where it is not available
+    """
+    try:
+        for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Percentile q (0-100) of values, 0.0 for no values."""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[max(0, min(98, round(q) - 1))]
+
+
+def build_report(
+    driver: str, settings: dict[str, Any], recorder: Recorder, elapsed: float, rss_before: int, rss_after: int
+) -> dict[str, Any]:
+    """
+    Summarize one benchmark run
+
+    Args:
+        driver: Name of the driver, "inprocess" or "loadgen"
+        settings: Options of the run, stored in the report for comparison
+        recorder: Recorded latencies
+        elapsed: Wall time of the run in seconds
+        rss_before: Server RSS in bytes before the load
+        rss_after: Server RSS in bytes after the load
+
+    Returns:
+        JSON-serializable report
+    """
+    requests = sum(map(len, recorder.latencies.values()))
+    return {
+        "driver": driver,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "settings": settings,
+        "elapsed_seconds": round(elapsed, 3),
+        "exercises": recorder.exercises,
+        "exercises_per_second": round(recorder.exercises / elapsed, 1) if elapsed else 0.0,
+        "requests_per_second": round(requests / elapsed, 1) if elapsed else 0.0,
+        "rss_before_bytes": rss_before,
+        "rss_after_bytes": rss_after,
+        "rss_growth_bytes": rss_after - rss_before,
+        "endpoints": {
+            endpoint: {
+                "requests": len(latencies),
+                "errors": recorder.errors.get(endpoint, 0),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            }
+            for endpoint, latencies in sorted(recorder.latencies.items())
+        },
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    """Print report as a table."""
+    print(
+        f"{report['driver']}: {report['exercises']} exercises in {report['elapsed_seconds']} s, "
+        f"{report['exercises_per_second']} exercises/s, {report['requests_per_second']} requests/s"
+    )
+    print(f"RSS growth: {report['rss_growth_bytes'] / 1024**2:.1f} MiB")
+    print(f"{'endpoint':<18}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for endpoint, summary in report["endpoints"].items():
+        print(
+            f"{endpoint:<18}{summary['requests']:>10}{summary['errors']:>8}"
+            f"{summary['p50_ms']:>10.3f}{summary['p99_ms']:>10.3f}"
+        )
+
+
+def write_report(report: dict[str, Any], path: Path | None) -> None:
+    """Print report and write it as JSON when a path is given."""
+    print_report(report)
+    if path is not None:
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Wrote {path}")
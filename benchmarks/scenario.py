@@ -0,0 +1,91 @@
+"""Realistic training sessions replayed by the load drivers."""
+
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+# Share of answers that are wrong on purpose, so both branches of checking are exercised
+MISTAKE_RATE = 0.2
+
+
+class Recorder:
+    """Latencies and failures of requests by endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.exercises = 0
+
+    def merge(self, other: "Recorder") -> None:
+        """Add results of another recorder, e.g. from another process."""
+        for endpoint, latencies in other.latencies.items():
+            self.latencies[endpoint].extend(latencies)
+        for endpoint, errors in other.errors.items():
+            self.errors[endpoint] += errors
+        self.exercises += other.exercises
+
+
+def solve(question: str) -> int:
+    """Calculate answer for question like '12 + 5'."""
+    first, operation, second = question.split()
+    return int(first) + int(second) if operation == "+" else int(first) - int(second)
+
+
+async def timed_request(
+    client: httpx.AsyncClient, recorder: Recorder, endpoint: str, method: str, json: object = None
+) -> httpx.Response | None:
+    """
+    Send one request and record its latency
+
+    Args:
+        client: Client of one session, keeps its cookie
+        recorder: Where latency or failure is recorded
+        endpoint: Path after /api/
+        method: HTTP method
+        json: Request body
+
+    Returns:
+        Response, None when the request failed
+    """
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, f"/api/{endpoint}", json=json)
+    except httpx.HTTPError:
+        recorder.errors[endpoint] += 1
+        return None
+    recorder.latencies[endpoint].append(time.perf_counter() - start)
+    if response.status_code != 200:
+        recorder.errors[endpoint] += 1
+        return None
+    return response
+
+
+async def run_session(client: httpx.AsyncClient, recorder: Recorder, exercises: int, think_time: float = 0.0) -> None:
+    """
+    Replay one user: create an exercise, answer it, look at the statistics, repeat
+
+    Args:
+        client: Client of this session only, so the session cookie is its own
+        recorder: Where latencies are recorded
+        exercises: Number of exercises to answer
+        think_time: Seconds between answers, 0 for a closed loop at full speed
+    """
+    difficulty = random.choice((1, 2, 3))
+    for _ in range(exercises):
+        response = await timed_request(client, recorder, "exercise/new", "POST", {"difficulty": difficulty})
+        if response is None:
+            continue
+        exercise = response.json()
+        answer = solve(exercise["question"])
+        if random.random() < MISTAKE_RATE:
+            answer += 1
+
+        if think_time:
+            await asyncio.sleep(think_time)
+        body = {"exercise_id": exercise["exercise_id"], "answer": answer, "time_taken": think_time or None}
+        if await timed_request(client, recorder, "exercise/check", "POST", body) is not None:
+            recorder.exercises += 1
+        await timed_request(client, recorder, "stats", "GET")
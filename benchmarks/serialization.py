@@ -0,0 +1,168 @@
+"""
+Requests per second of hot endpoints with standard and fast JSON responses.
+
+The same responses are served twice through the full ASGI stack, called directly
+without a network client: once returned as a
+model, which FastAPI validates and encodes, and once as ModelResponse, built the way
+the routes build it. Run from the
+repository root:
+
+    python -m benchmarks.serialization [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, MutableMapping
+from typing import Any
+
+from fastapi import FastAPI, Response
+from pydantic import BaseModel
+
+from src.number_trainer.core.trainer import MathTrainer
+from src.number_trainer.web.models import (
+    AnswerResponse,
+    AnswerStepResponse,
+    BatchResponse,
+    ExerciseResponse,
+    PrefetchResponse,
+    StatsResponse,
+)
+from src.number_trainer.web.responses import ModelResponse
+
+# Size of the batch payload, large batches gain the most
+BATCH_SIZE = 10_000
+
+# Measurements per endpoint and path
+ROUNDS = 3
+
+
+def build_payloads() -> dict[str, tuple[type[BaseModel], dict[str, Any], bool]]:
+    """
+    Fields of a typical response of every hot endpoint
+
+    Returns:
+        Response model, its fields, and whether the fast path skips validating the fields
+        as the batch endpoint does
+    """
+    exercise = ExerciseResponse(exercise_id="AAECAwQFBgcICQoLDA0ODw", question="42 + 17", operation="+")
+    result = AnswerResponse(correct=True, correct_answer=59, message="Correct!", time_taken=2.345)
+    stats = StatsResponse(
+        total_exercises=120, correct_answers=97, incorrect_answers=23, accuracy=80.8, average_time=3.1
+    )
+    batch = MathTrainer(2, 2).generate_batch(BATCH_SIZE)
+    return {
+        "exercise/new": (ExerciseResponse, exercise.model_dump(), False),
+        "exercise/prefetch": (PrefetchResponse, {"exercises": [exercise] * 5}, False),
+        "exercise/check": (AnswerResponse, result.model_dump(), False),
+        "exercise/answer": (AnswerStepResponse, {"result": result, "exercises": [exercise], "stats": stats}, False),
+        "stats": (StatsResponse, stats.model_dump(), False),
+        f"exercise/batch ({BATCH_SIZE})": (
+            BatchResponse,
+            {
+                "first_numbers": batch.first_numbers.tolist(),
+                "second_numbers": batch.second_numbers.tolist(),
+                "operations": ["+" if operation == 0 else "-" for operation in batch.operations],
+                "correct_answers": batch.correct_answers.tolist(),
+            },
+            True,
+        ),
+    }
+
+
+def build_app(payloads: dict[str, tuple[type[BaseModel], dict[str, Any], bool]]) -> FastAPI:
+    """App with a standard and a fast route for every payload, both build the model per request like the routes."""
+    app = FastAPI()
+    for index, (response_model, fields, trusted) in enumerate(payloads.values()):
+        standard, fast = make_endpoints(response_model, fields, trusted)
+        app.add_api_route(f"/standard/{index}", standard, methods=["GET"], response_model=response_model)
+        app.add_api_route(f"/fast/{index}", fast, methods=["GET"], response_model=response_model)
+    return app
+
+
+def make_endpoints(
+    model: type[BaseModel], fields: dict[str, Any], trusted: bool
+) -> tuple[Callable[[], Awaitable[Any]], Callable[[], Awaitable[Response]]]:
+    """Endpoints returning the model for FastAPI to serialize, and returning ModelResponse."""
+
+    async def standard() -> Any:
+        return model(**fields)
+
+    async def fast() -> Response:
+        return ModelResponse(model.model_construct(**fields) if trusted else model(**fields))
+
+    return standard, fast
+
+
+async def call(app: FastAPI, path: str) -> int:
+    """Send one GET request straight to the ASGI app and return the status code."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: MutableMapping[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def requests_per_second(app: FastAPI, path: str, requests: int) -> float:
+    """Handle requests one after another and return their rate."""
+    # Warm up routing and serializer caches
+    for _ in range(min(requests // 10, 100)):
+        assert await call(app, path) == 200
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path)
+    return requests / (time.perf_counter() - start)
+
+
+async def run(requests: int) -> list[tuple[str, float, float]]:
+    """Measure both paths of every endpoint."""
+    payloads = build_payloads()
+    app = build_app(payloads)
+    results = []
+    for index, name in enumerate(payloads):
+        # Large payloads are slow on both paths, fewer requests give the same picture
+        count = requests // 20 if name.startswith("exercise/batch") else requests
+        # Paths take turns and the best round counts, which evens out noise of the machine
+        standard = fast = 0.0
+        for _ in range(ROUNDS):
+            standard = max(standard, await requests_per_second(app, f"/standard/{index}", count))
+            fast = max(fast, await requests_per_second(app, f"/fast/{index}", count))
+        results.append((name, standard, fast))
+    return results
+
+
+def main() -> None:
+    """Print requests per second of both paths."""
+    parser = argparse.ArgumentParser(description="Compare standard and fast JSON responses")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint and path")
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<26}{'standard req/s':>16}{'fast req/s':>12}{'gain':>8}")
+    for name, standard, fast in asyncio.run(run(args.requests)):
+        print(f"{name:<26}{standard:>16.0f}{fast:>12.0f}{fast / standard:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
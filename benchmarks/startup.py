@@ -0,0 +1,138 @@
+"""
+Import time budget of the entry points.
+
+Every entry point module is imported in a fresh interpreter with python -X importtime.
+The median cumulative import time over several runs is compared with the budget of the
+entry point, and the imported modules are checked against modules the entry point must
+not load, e.g. tkinter for the console trainer. Exits with code 1 when a check fails:
+
+    python -m benchmarks.startup [--repeats 5] [--output startup.json]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+# Repository root, the entry points import the package as src.number_trainer from there
+ROOT = Path(__file__).resolve().parent.parent
+
+_IMPORT_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$")
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    """Module imported by an entry point and its limits."""
+
+    module: str
+    budget_ms: float
+    forbidden: tuple[str, ...]
+
+
+# Budgets leave room for slower machines; the forbidden modules are the real regression check
+ENTRY_POINTS = {
+    "main": EntryPoint("main", 30.0, ("tkinter", "fastapi", "uvicorn", "sqlite3")),
+    "web_main": EntryPoint("web_main", 300.0, ("tkinter", "src.number_trainer.gui.app")),
+    "cli.console": EntryPoint(
+        "src.number_trainer.cli.console",
+        50.0,
+        ("tkinter", "fastapi", "pydantic", "uvicorn", "sqlite3", "src.number_trainer.core.answer_log"),
+    ),
+    "web worker": EntryPoint("src.number_trainer.web.app", 1500.0, ("tkinter", "src.number_trainer.gui.app")),
+}
+
+
+def parse_importtime(output: str, module: str) -> tuple[float, list[str]]:
+    """
+    Read the output of python -X importtime
+
+    Args:
+        output: Standard error of the interpreter
+        module: Module whose cumulative time is wanted
+
+    Returns:
+        Cumulative import time of the module in milliseconds, and all imported modules in import order
+    """
+    cumulative = 0.0
+    modules = []
+    for line in output.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        modules.append(match[3])
+        if match[3] == module and not match[2]:
+            cumulative = int(match[1]) / 1000
+    return cumulative, modules
+
+
+def import_once(module: str) -> tuple[float, list[str]]:
+    """Import a module in a fresh interpreter, return its import time in ms and the imported modules."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr, module)
+
+
+def measure(entry: EntryPoint, repeats: int) -> dict[str, Any]:
+    """
+    Check one entry point
+
+    Args:
+        entry: Entry point with its limits
+        repeats: Number of fresh interpreters; the first run also writes bytecode caches and is not counted
+
+    Returns:
+        Median import time, budget, forbidden modules that were imported and whether the checks passed
+    """
+    import_once(entry.module)
+    times = []
+    modules: list[str] = []
+    for _ in range(repeats):
+        elapsed, modules = import_once(entry.module)
+        times.append(elapsed)
+    median = statistics.median(times)
+    imported_forbidden = [name for name in entry.forbidden if name in modules]
+    return {
+        "module": entry.module,
+        "median_ms": round(median, 2),
+        "budget_ms": entry.budget_ms,
+        "modules": len(modules),
+        "forbidden_imported": imported_forbidden,
+        "passed": median <= entry.budget_ms and not imported_forbidden,
+    }
+
+
+def main() -> None:
+    """Check all entry points with command line options."""
+    parser = argparse.ArgumentParser(description="Check import time of the entry points against their budgets")
+    parser.add_argument("--repeats", type=int, default=5, help="measured imports per entry point")
+    parser.add_argument("--output", type=Path, help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {name: measure(entry, args.repeats) for name, entry in ENTRY_POINTS.items()}
+
+    print(f"{'entry point':<14}{'median ms':>11}{'budget ms':>11}{'modules':>9}  result")
+    for name, result in results.items():
+        status = "ok" if result["passed"] else "FAIL"
+        if result["forbidden_imported"]:
+            status += " imports " + ", ".join(result["forbidden_imported"])
+        print(f"{name:<14}{result['median_ms']:>11.1f}{result['budget_ms']:>11.0f}{result['modules']:>9}  {status}")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Wrote {args.output}")
+    if not all(result["passed"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
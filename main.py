@@ -1,12 +1,13 @@
 # Entry point for Number Trainer application.
-
-import tkinter as tk
-
-from src.number_trainer.gui.app import NumberTrainerApp
+# tkinter and the GUI are imported in main(), so importing this module stays cheap.
 
 
 def main() -> None:
     """Main application entry point"""
+    import tkinter as tk
+
+    from src.number_trainer.gui.app import NumberTrainerApp
+
     root = tk.Tk()
     NumberTrainerApp(root)
     root.mainloop()
@@ -6,12 +6,31 @@ Main components:
 - gui: graphical interface on tkinter
 - cli: console interface
 - web: web interface with FastAPI
+- storage: persistent answer history
+
+Public classes are imported on first access, so importing the package is cheap.
 """
 
+from typing import TYPE_CHECKING
+
+from .lazy import lazy_exports
+
 __version__ = "0.1.0"
 __author__ = "Number Trainer Team"
 
-from .core.models import Exercise, Operation, Result
-from .core.trainer import MathTrainer
+if TYPE_CHECKING:
+    from .core.models import Exercise, ExerciseBatch, Operation, Result
+    from .core.trainer import MathTrainer
+
+__all__ = ["Exercise", "ExerciseBatch", "Result", "Operation", "MathTrainer"]
 
-__all__ = ["Exercise", "Result", "Operation", "MathTrainer"]
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "Exercise": ".core.models",
+        "ExerciseBatch": ".core.models",
+        "Result": ".core.models",
+        "Operation": ".core.models",
+        "MathTrainer": ".core.trainer",
+    },
+)
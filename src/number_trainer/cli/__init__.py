@@ -5,6 +5,13 @@ Components:
 - console: console version of the application
 """
 
-from .console import run_console_trainer
+from typing import TYPE_CHECKING
+
+from ..lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .console import run_console_trainer
 
 __all__ = ["run_console_trainer"]
+
+__getattr__, __dir__ = lazy_exports(__name__, {"run_console_trainer": ".console"})
@@ -1,8 +1,26 @@
 """
 Core module - contains the main business logic of the mathematical trainer.
+
+Public classes are imported on first access.
 """
 
-from .models import Exercise, Operation, Result
-from .trainer import MathTrainer
+from typing import TYPE_CHECKING
+
+from ..lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .models import Exercise, ExerciseBatch, Operation, Result
+    from .trainer import MathTrainer
+
+__all__ = ["Exercise", "ExerciseBatch", "Result", "Operation", "MathTrainer"]
 
-__all__ = ["Exercise", "Result", "Operation", "MathTrainer"]
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "Exercise": ".models",
+        "ExerciseBatch": ".models",
+        "Result": ".models",
+        "Operation": ".models",
+        "MathTrainer": ".trainer",
+    },
+)
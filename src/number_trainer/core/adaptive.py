@@ -0,0 +1,182 @@
+"""
+Adaptive choice of exercises.
+
+Every operand pair has a weight that grows after mistakes and slow answers
+and shrinks after quick correct answers, so difficult exercises come back more often.
+Weights are kept in a Fenwick tree, which makes both updating a weight and drawing
+a weighted random exercise O(log n) over the whole operand space.
+"""
+
+import random
+from array import array
+
+from .aggregates import TimeAggregate
+from .models import BATCH_OPERATIONS, Exercise, Operation
+from .operand_index import operand_index
+
+# Weight multipliers applied after each answer
+MISTAKE_FACTOR = 4.0
+SLOW_FACTOR = 1.5
+CORRECT_FACTOR = 0.5
+
+# Limits of the multiplier relative to the initial weight of a pair
+MIN_BOOST = 0.25
+MAX_BOOST = 64.0
+
+# Answers slower than this share of earlier answers count as slow
+SLOW_QUANTILE = 0.9
+# Number of timed answers needed before any answer counts as slow
+MIN_TIMED_ANSWERS = 20
+
+
+class FenwickTree:
+    """Prefix sums of non-negative weights with O(log n) update and search."""
+
+    __slots__ = ("_tree", "_size", "_top_bit")
+
+    def __init__(self, weights: array) -> None:
+        """
+        Builds the tree in O(n)
+
+        Args:
+            weights: Initial weights, array of doubles
+        """
+        self._size = len(weights)
+        self._tree = array("d", [0.0])
+        self._tree.extend(weights)
+        for node in range(1, self._size + 1):
+            parent = node + (node & -node)
+            if parent <= self._size:
+                self._tree[parent] += self._tree[node]
+        self._top_bit = 1 << (self._size.bit_length() - 1) if self._size else 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, position: int, delta: float) -> None:
+        """
+        Adds delta to the weight at position
+
+        Args:
+            position: Zero-based position
+            delta: Change of the weight
+        """
+        node = position + 1
+        while node <= self._size:
+            self._tree[node] += delta
+            node += node & -node
+
+    def total(self) -> float:
+        """Sum of all weights"""
+        node = self._size
+        total = 0.0
+        while node:
+            total += self._tree[node]
+            node -= node & -node
+        return total
+
+    def find(self, value: float) -> int:
+        """
+        Finds position whose weight covers value
+
+        Args:
+            value: Number from 0 to total()
+
+        Returns:
+            Smallest zero-based position where the running sum of weights exceeds value
+        """
+        position = 0
+        step = self._top_bit
+        while step:
+            node = position + step
+            if node <= self._size and self._tree[node] <= value:
+                position = node
+                value -= self._tree[node]
+            step >>= 1
+        # Rounding errors may point past the end
+        return min(position, self._size - 1)
+
+
+class AdaptiveSampler:
+    """
+    Weighted choice of exercises from the operand index of both operations.
+
+    At the start each operation is picked half of the time and all its pairs are equally likely.
+    """
+
+    def __init__(self, min_digits: int, max_digits: int) -> None:
+        """
+        Creates sampler with equal weights
+
+        Args:
+            min_digits: Minimum number of digits (1-3)
+            max_digits: Maximum number of digits (1-3)
+        """
+        self.indexes = tuple(operand_index(min_digits, max_digits, operation) for operation in BATCH_OPERATIONS)
+        # Pairs of the second operation follow the pairs of the first one
+        self._offsets = (0, len(self.indexes[0]))
+        # Initial weights: 1/n for every pair of an operation with n pairs
+        self._base = tuple(1.0 / len(index) for index in self.indexes)
+        self._boosts = array("f", [1.0]) * sum(map(len, self.indexes))
+        weights = array("d")
+        for base, index in zip(self._base, self.indexes, strict=True):
+            weights.extend(array("d", [base]) * len(index))
+        self._weights = FenwickTree(weights)
+        self.times = TimeAggregate()
+
+    def sample(self) -> tuple[Operation, int, int]:
+        """
+        Draws an exercise in O(log n)
+
+        Returns:
+            Operation, first and second operand
+        """
+        position = self._weights.find(random.random() * self._weights.total())
+        operation_index = 0 if position < self._offsets[1] else 1
+        index = self.indexes[operation_index]
+        position -= self._offsets[operation_index]
+        return index.operation, index.firsts[position], index.seconds[position]
+
+    def update(self, exercise: Exercise, is_correct: bool, time_taken: float = 0.0) -> None:
+        """
+        Changes weight of the answered pair in O(log n)
+
+        Args:
+            exercise: Answered exercise
+            is_correct: Whether the answer was correct
+            time_taken: Execution time in seconds, 0.0 if unknown
+        """
+        operation_index = BATCH_OPERATIONS.index(exercise.operation)
+        position = self.indexes[operation_index].position(exercise.first_number, exercise.second_number)
+        if position is None:
+            # Exercise from another difficulty
+            return
+
+        factor = CORRECT_FACTOR if is_correct else MISTAKE_FACTOR
+        if time_taken > 0:
+            if self.times.count >= MIN_TIMED_ANSWERS and time_taken > self.times.quantile(SLOW_QUANTILE):
+                factor *= SLOW_FACTOR
+            self.times.add(time_taken)
+
+        position += self._offsets[operation_index]
+        boost = self._boosts[position]
+        new_boost = max(MIN_BOOST, min(boost * factor, MAX_BOOST))
+        if new_boost != boost:
+            self._boosts[position] = new_boost
+            self._weights.add(position, (new_boost - boost) * self._base[operation_index])
+
+    def boost(self, exercise: Exercise) -> float:
+        """
+        Returns how many times more likely the exercise is than at the start
+
+        Args:
+            exercise: Exercise to look up
+
+        Returns:
+            Weight multiplier, 1.0 for exercises from another difficulty
+        """
+        operation_index = BATCH_OPERATIONS.index(exercise.operation)
+        position = self.indexes[operation_index].position(exercise.first_number, exercise.second_number)
+        if position is None:
+            return 1.0
+        return float(self._boosts[position + self._offsets[operation_index]])
@@ -0,0 +1,94 @@
+"""
+Streaming aggregates for answer times.
+
+Every aggregate uses a fixed amount of memory no matter how many values are added.
+"""
+
+import math
+from bisect import bisect_left
+
+# Upper bounds of histogram buckets in seconds: 0.1s to about 10 minutes, each 10% larger than the previous one
+_BUCKET_GROWTH = 1.1
+_BUCKET_BOUNDS: tuple[float, ...] = tuple(
+    0.1 * _BUCKET_GROWTH**i for i in range(math.ceil(math.log(6000) / math.log(_BUCKET_GROWTH)) + 1)
+)
+
+
+class TimeAggregate:
+    """
+    Count, sum, mean, variance and quantiles of a stream of times.
+
+    Mean and variance use Welford's algorithm. Quantiles come from a histogram
+    with logarithmic buckets, so they are accurate to about 10%.
+    """
+
+    __slots__ = ("count", "total", "mean", "_m2", "_buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._buckets = [0] * (len(_BUCKET_BOUNDS) + 1)
+
+    def add(self, value: float) -> None:
+        """
+        Adds one value in O(1)
+
+        Args:
+            value: Time in seconds
+        """
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self._buckets[bisect_left(_BUCKET_BOUNDS, value)] += 1
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, 0.0 for less than two values"""
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns estimated quantile
+
+        Args:
+            q: Quantile from 0 to 1
+
+        Returns:
+            Upper bound of the bucket holding the quantile, 0.0 when empty
+        """
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("Quantile must be from 0 to 1")
+        if self.count == 0:
+            return 0.0
+
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for bound, bucket_count in zip(_BUCKET_BOUNDS, self._buckets, strict=False):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+
+        # Values above the last bound are reported as the largest bound
+        return _BUCKET_BOUNDS[-1]
+
+    def summary(self) -> dict[str, int | float]:
+        """
+        Returns aggregate values
+
+        Returns:
+            Dictionary with count, mean, variance and p50/p90/p99
+        """
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3),
+            "variance": round(self.variance, 3),
+            "p50": round(self.quantile(0.5), 3),
+            "p90": round(self.quantile(0.9), 3),
+            "p99": round(self.quantile(0.99), 3),
+        }
@@ -0,0 +1,154 @@
+"""
+Append-only binary log of checked answers.
+
+Every answer is stored as a fixed-width record, so the log can be read back
+without parsing and survives restarts of the application.
+"""
+
+import io
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from .models import BATCH_OPERATIONS, Exercise, Operation, Result
+
+# timestamp, time taken, user answer, first number, second number, operation index, is correct
+RECORD = struct.Struct("<ddiHHBB")
+
+_FILE_PATTERN = "answers-*.log"
+
+# User answers outside of the record field range are clamped
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1
+
+
+class AnswerLog:
+    """
+    Writer of the answer log.
+
+    append() only packs the record and puts it in a queue. A background thread
+    writes everything queued so far with one write and one fsync (group commit).
+    Each process writes its own files, which are rotated when they reach max_file_size.
+    """
+
+    def __init__(self, directory: str | Path, max_file_size: int = 64 * 1024 * 1024, fsync: bool = True) -> None:
+        """
+        Opens the log and starts the writer thread
+
+        Args:
+            directory: Directory for log files, created if missing
+            max_file_size: Size in bytes after which a new file is started
+            fsync: Whether to fsync after every group of records
+        """
+        if max_file_size < RECORD.size:
+            raise ValueError(f"max_file_size must be at least {RECORD.size} bytes")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_file_size = max_file_size
+        self.fsync = fsync
+
+        self._queue: queue.SimpleQueue[bytes | None] = queue.SimpleQueue()
+        self._sequence = 0
+        self._file = self._open_next_file()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run_writer, name="answer-log-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, exercise: Exercise, result: Result) -> None:
+        """
+        Queues one answer for writing
+
+        Args:
+            exercise: Answered exercise
+            result: Check result
+        """
+        self._queue.put(
+            RECORD.pack(
+                time.time(),
+                result.time_taken,
+                max(_INT32_MIN, min(result.user_answer, _INT32_MAX)),
+                exercise.first_number,
+                exercise.second_number,
+                BATCH_OPERATIONS.index(exercise.operation),
+                result.is_correct,
+            )
+        )
+
+    def close(self) -> None:
+        """Writes all queued answers and stops the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _open_next_file(self) -> io.FileIO:
+        """Opens a new log file of this process"""
+        self._sequence += 1
+        path = self.directory / f"answers-{os.getpid()}-{time.time_ns()}-{self._sequence:06d}.log"
+        return io.FileIO(path, "ab")
+
+    def _run_writer(self) -> None:
+        """Writes queued records in groups until close() is called"""
+        running = True
+        while running:
+            records = [self._queue.get()]
+            # Take everything that arrived while the previous group was written
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            data = [record for record in records if record is not None]
+            running = len(data) == len(records)
+            if data:
+                self._write(b"".join(data))
+
+    def _write(self, data: bytes) -> None:
+        """Writes whole records, rotating the file when it is full"""
+        while data:
+            room = self.max_file_size - self._file.tell()
+            room -= room % RECORD.size
+            if room <= 0:
+                self._file.close()
+                self._file = self._open_next_file()
+                continue
+
+            written = self._file.write(data[:room]) or 0
+            data = data[written:]
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+
+def read_answer_log(directory: str | Path) -> Iterator[tuple[Exercise, bool, float]]:
+    """
+    Reads all answers from log files
+
+    Files are memory-mapped and unpacked with struct.iter_unpack.
+    An incomplete record at the end of a file (for example after a crash) is skipped.
+
+    Args:
+        directory: Directory with log files
+
+    Yields:
+        Exercise, whether the answer was correct, and time taken
+    """
+    for path in sorted(Path(directory).glob(_FILE_PATTERN)):
+        size = path.stat().st_size
+        usable = size - size % RECORD.size
+        if usable == 0:
+            continue
+
+        with open(path, "rb") as log_file, mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            with memoryview(data)[:usable] as records:
+                for _, time_taken, _, first, second, operation_index, is_correct in RECORD.iter_unpack(records):
+                    operation = BATCH_OPERATIONS[operation_index]
+                    correct_answer = first + second if operation == Operation.ADDITION else first - second
+                    yield Exercise(first, second, operation, correct_answer), bool(is_correct), time_taken
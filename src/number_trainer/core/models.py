@@ -5,10 +5,14 @@ Contains main data structures:
 - Operation: enumeration of mathematical operations
 - Exercise: exercise data structure
 - Result: result data structure
+- ExerciseBatch: columnar batch of exercises
 """
 
+from array import array
+from collections.abc import Iterator
 from dataclasses import dataclass
 from enum import Enum
+from typing import overload
 
 
 class Operation(Enum):
@@ -40,3 +44,54 @@ class Result:
     correct_answer: int
     message: str
     time_taken: float = 0.0
+
+
+# Order of operations used by ExerciseBatch.operations
+BATCH_OPERATIONS: tuple[Operation, ...] = tuple(Operation)
+
+
+@dataclass
+class ExerciseBatch:
+    """
+    Columnar batch of exercises.
+
+    Rows are stored in compact arrays and turned into Exercise objects only on access.
+    Slicing returns a smaller ExerciseBatch.
+    Operations are stored as indexes into BATCH_OPERATIONS.
+    """
+
+    first_numbers: array
+    second_numbers: array
+    operations: bytes
+    correct_answers: array
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    @overload
+    def __getitem__(self, index: int) -> Exercise: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ExerciseBatch": ...
+
+    def __getitem__(self, index: int | slice) -> "Exercise | ExerciseBatch":
+        if isinstance(index, slice):
+            return ExerciseBatch(
+                first_numbers=self.first_numbers[index],
+                second_numbers=self.second_numbers[index],
+                operations=self.operations[index],
+                correct_answers=self.correct_answers[index],
+            )
+        if not isinstance(index, int):
+            raise TypeError(f"ExerciseBatch indices must be integers or slices, not {type(index).__name__}")
+
+        return Exercise(
+            first_number=self.first_numbers[index],
+            second_number=self.second_numbers[index],
+            operation=BATCH_OPERATIONS[self.operations[index]],
+            correct_answer=self.correct_answers[index],
+        )
+
+    def __iter__(self) -> Iterator[Exercise]:
+        for index in range(len(self)):
+            yield self[index]
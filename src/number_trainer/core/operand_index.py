@@ -0,0 +1,331 @@
+"""
+Precomputed index of all operand pairs.
+
+For every operation and range of digits the index keeps all valid pairs in arrays
+ordered by result, so "result below N" selects a prefix. Other constraints are bitsets
+over pair positions. Sampling picks a random position in the array of matching pairs,
+which gives every matching exercise the same probability.
+"""
+
+import os
+import random
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Collection
+from functools import cache
+from itertools import compress
+from operator import add, eq, sub
+from pathlib import Path
+
+from .models import BATCH_OPERATIONS, Operation
+
+# Bump when the layout of the index changes, old cache files are then rebuilt
+INDEX_VERSION = 1
+
+# magic, version, min digits, max digits, operation index, number of pairs
+_HEADER = struct.Struct("<4sHBBBI")
+_MAGIC = b"NTOI"
+
+# Exclusion is checked by redrawing, after this many misses the matching pairs are listed
+_MAX_REDRAWS = 32
+
+_BIT_CHARS = bytes.maketrans(b"\x00\x01", b"01")
+_BIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def operand_range(min_digits: int, max_digits: int) -> range:
+    """
+    Returns all numbers with given number of digits
+
+    Args:
+        min_digits: Minimum number of digits (1-3)
+        max_digits: Maximum number of digits (1-3)
+
+    Returns:
+        Range of numbers, 1-digit numbers start at 1
+    """
+    return range(10 ** (min_digits - 1), 10**max_digits)
+
+
+class OperandIndex:
+    """
+    All operand pairs of one operation, ordered by result.
+
+    Pairs are stored in three parallel arrays. The no-carry constraint (no carrying for
+    addition, no borrowing for subtraction) is a bitset where bit i describes pair i.
+    """
+
+    def __init__(self, operation: Operation, firsts: array, seconds: array, results: array, no_carry: int) -> None:
+        """
+        Creates index from prepared arrays, use build() or load() instead
+
+        Args:
+            operation: Operation of all pairs
+            firsts: First operands
+            seconds: Second operands
+            results: Results, in ascending order
+            no_carry: Bitset of pairs without carrying or borrowing
+        """
+        self.operation = operation
+        self.firsts = firsts
+        self.seconds = seconds
+        self.results = results
+        self.no_carry = no_carry
+        self._members: dict[bool, range | array] = {False: range(len(firsts))}
+
+    @classmethod
+    def build(cls, min_digits: int, max_digits: int, operation: Operation) -> "OperandIndex":
+        """
+        Enumerates all pairs
+
+        Args:
+            min_digits: Minimum number of digits (1-3)
+            max_digits: Maximum number of digits (1-3)
+            operation: Operation of the exercises
+
+        Returns:
+            New index
+        """
+        numbers = operand_range(min_digits, max_digits)
+        low, high = numbers[0], numbers[-1]
+        firsts, seconds, results = array("H"), array("H"), array("H")
+
+        # Walking results in order produces the pairs already sorted
+        if operation == Operation.ADDITION:
+            for result in range(2 * low, 2 * high + 1):
+                first_low, first_high = max(low, result - high), min(high, result - low)
+                firsts.extend(range(first_low, first_high + 1))
+                seconds.extend(range(result - first_low, result - first_high - 1, -1))
+                results.extend([result] * (first_high - first_low + 1))
+        else:
+            # The first operand is never smaller, so the result is not negative
+            for result in range(high - low + 1):
+                seconds.extend(range(low, high - result + 1))
+                firsts.extend(range(low + result, high + 1))
+                results.extend([result] * (high - result - low + 1))
+
+        # Every carry lowers the digit sum of the result by 9, every borrow raises it by 9,
+        # so a pair has none exactly when the digit sums add up
+        digit_sums = [sum(map(int, str(number))) for number in range(2 * high + 1)]
+        combine = add if operation == Operation.ADDITION else sub
+        flags = bytes(
+            map(
+                eq,
+                map(combine, map(digit_sums.__getitem__, firsts), map(digit_sums.__getitem__, seconds)),
+                map(digit_sums.__getitem__, results),
+            )
+        )
+        no_carry = int(flags.translate(_BIT_CHARS)[::-1] or b"0", 2)
+
+        return cls(operation, firsts, seconds, results, no_carry)
+
+    def __len__(self) -> int:
+        return len(self.firsts)
+
+    def members(self, no_carry: bool = False) -> range | array:
+        """
+        Returns positions of pairs matching the bitset constraints, in ascending order
+
+        Args:
+            no_carry: Only pairs without carrying or borrowing
+
+        Returns:
+            Positions of matching pairs
+        """
+        positions = self._members.get(no_carry)
+        if positions is None:
+            flags = format(self.no_carry, f"0{len(self)}b")[::-1].encode().translate(_BIT_FLAGS)
+            positions = self._members[no_carry] = array("I", compress(range(len(self)), flags))
+        return positions
+
+    def count(self, no_carry: bool = False, result_below: int | None = None) -> int:
+        """
+        Counts pairs matching the constraints in O(log n)
+
+        Args:
+            no_carry: Only pairs without carrying or borrowing
+            result_below: Only pairs with smaller result
+
+        Returns:
+            Number of matching pairs
+        """
+        positions = self.members(no_carry)
+        if result_below is None:
+            return len(positions)
+        return bisect_left(positions, result_below, key=self.results.__getitem__)
+
+    def position(self, first: int, second: int) -> int | None:
+        """
+        Finds position of a pair in O(log n)
+
+        Args:
+            first: First operand
+            second: Second operand
+
+        Returns:
+            Position of the pair, None when it is not in the index
+        """
+        result = first + second if self.operation == Operation.ADDITION else first - second
+        start = bisect_left(self.results, result)
+        if start == len(self) or self.results[start] != result:
+            return None
+
+        # Within one result, addition pairs go up by the first operand and subtraction pairs by the second
+        position: int
+        if self.operation == Operation.ADDITION:
+            position = start + first - self.firsts[start]
+        else:
+            position = start + second - self.seconds[start]
+        if position < start or position >= len(self) or self.firsts[position] != first:
+            return None
+        return position
+
+    def sample(
+        self,
+        no_carry: bool = False,
+        result_below: int | None = None,
+        exclude: Collection[tuple[int, int]] | None = None,
+    ) -> tuple[int, int]:
+        """
+        Picks a uniformly random pair matching the constraints
+
+        Args:
+            no_carry: Only pairs without carrying or borrowing
+            result_below: Only pairs with smaller result
+            exclude: Pairs that must not be picked, e.g. recently answered ones
+
+        Returns:
+            First and second operand
+        """
+        positions = self.members(no_carry)
+        size = self.count(no_carry, result_below)
+        if size == 0:
+            raise ValueError("No exercises match the constraints")
+
+        position = positions[random.randrange(size)]
+        pair = (self.firsts[position], self.seconds[position])
+        if not exclude:
+            return pair
+
+        # Excluded pairs are few compared to the matching ones, so a redraw almost always succeeds
+        for _ in range(_MAX_REDRAWS):
+            if pair not in exclude:
+                return pair
+            position = positions[random.randrange(size)]
+            pair = (self.firsts[position], self.seconds[position])
+
+        candidates = [
+            pair
+            for pair in zip(
+                map(self.firsts.__getitem__, positions[:size]),
+                map(self.seconds.__getitem__, positions[:size]),
+                strict=True,
+            )
+            if pair not in exclude
+        ]
+        if not candidates:
+            raise ValueError("No exercises match the constraints")
+        return random.choice(candidates)
+
+    def save(self, path: Path, min_digits: int, max_digits: int) -> None:
+        """
+        Writes index to a file
+
+        Args:
+            path: Target file, replaced atomically
+            min_digits: Minimum number of digits the index was built for
+            max_digits: Maximum number of digits the index was built for
+        """
+        header = _HEADER.pack(
+            _MAGIC, INDEX_VERSION, min_digits, max_digits, BATCH_OPERATIONS.index(self.operation), len(self)
+        )
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary, "wb") as index_file:
+            index_file.write(header)
+            self.firsts.tofile(index_file)
+            self.seconds.tofile(index_file)
+            self.results.tofile(index_file)
+            index_file.write(self.no_carry.to_bytes((len(self) + 7) // 8, "little"))
+        temporary.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, min_digits: int, max_digits: int, operation: Operation) -> "OperandIndex | None":
+        """
+        Reads index written by save()
+
+        Args:
+            path: Index file
+            min_digits: Expected minimum number of digits
+            max_digits: Expected maximum number of digits
+            operation: Expected operation
+
+        Returns:
+            Index, or None when the file is missing, outdated or damaged
+        """
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+
+        magic, version, file_min, file_max, operation_index, size = _HEADER.unpack_from(data)
+        expected = (_MAGIC, INDEX_VERSION, min_digits, max_digits, BATCH_OPERATIONS.index(operation))
+        column_size = size * array("H").itemsize
+        if (magic, version, file_min, file_max, operation_index) != expected:
+            return None
+        if len(data) != _HEADER.size + 3 * column_size + (size + 7) // 8:
+            return None
+
+        firsts, seconds, results = array("H"), array("H"), array("H")
+        offset = _HEADER.size
+        for column in (firsts, seconds, results):
+            column.frombytes(data[offset : offset + column_size])
+            offset += column_size
+        no_carry = int.from_bytes(data[offset:], "little")
+
+        return cls(operation, firsts, seconds, results, no_carry)
+
+
+def _cache_directory() -> Path | None:
+    """Directory for index files, None when caching is disabled"""
+    directory = os.getenv("OPERAND_INDEX_CACHE")
+    if directory is None:
+        return Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "number_trainer"
+    return Path(directory) if directory else None
+
+
+@cache
+def operand_index(min_digits: int, max_digits: int, operation: Operation) -> OperandIndex:
+    """
+    Returns index for given digits and operation
+
+    The index is built on first use and kept for the lifetime of the process.
+    It is also stored in the cache directory, so later processes only read it.
+
+    Args:
+        min_digits: Minimum number of digits (1-3)
+        max_digits: Maximum number of digits (1-3)
+        operation: Operation of the exercises
+
+    Returns:
+        Shared index, must not be modified
+    """
+    directory = _cache_directory()
+    path = None
+    if directory is not None:
+        path = directory / f"operands-v{INDEX_VERSION}-{min_digits}-{max_digits}-{operation.name.lower()}.idx"
+        index = OperandIndex.load(path, min_digits, max_digits, operation)
+        if index is not None:
+            return index
+
+    index = OperandIndex.build(min_digits, max_digits, operation)
+    if path is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            index.save(path, min_digits, max_digits)
+        except OSError:
+            # A read-only cache only costs startup time
+            pass
+    return index
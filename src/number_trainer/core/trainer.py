@@ -5,9 +5,21 @@ Contains logic for generating exercises, checking answers, and maintaining stati
 """
 
 import random
-from typing import cast
+from array import array
+from collections.abc import Collection
+from typing import TYPE_CHECKING, cast
 
-from .models import Exercise, Operation, Result
+from .adaptive import AdaptiveSampler
+from .aggregates import TimeAggregate
+from .models import BATCH_OPERATIONS, Exercise, ExerciseBatch, Operation, Result
+from .operand_index import operand_index
+
+if TYPE_CHECKING:
+    # Only the web app writes an answer log, the console and GUI trainers do not load it
+    from .answer_log import AnswerLog
+
+# Maps a random byte to its lowest bit, i.e. to an index into BATCH_OPERATIONS
+_LOW_BIT = bytes(value & 1 for value in range(256))
 
 
 class MathTrainer:
@@ -16,14 +28,19 @@ class MathTrainer:
     Completely independent of GUI - works only with data.
     """
 
-    def __init__(self, min_digits: int = 1, max_digits: int = 3):
+    def __init__(
+        self, min_digits: int = 1, max_digits: int = 3, answer_log: "AnswerLog | None" = None, adaptive: bool = False
+    ):
         """
         Trainer initialization
 
         Args:
             min_digits: Minimum number of digits in numbers (1-3)
             max_digits: Maximum number of digits in numbers (1-3)
+            answer_log: Optional log where every checked answer is appended
+            adaptive: Whether exercises answered wrong or slowly should come back more often
         """
+        self.answer_log = answer_log
         self.min_digits = max(1, min(min_digits, 3))
         self.max_digits = max(1, min(max_digits, 3))
 
@@ -36,6 +53,13 @@ class MathTrainer:
             "correct_answers": 0,
             "incorrect_answers": 0,
         }
+        # Answer times: overall and per (number of digits, operation)
+        self.times = TimeAggregate()
+        self.times_by_kind: dict[tuple[int, Operation], TimeAggregate] = {}
+        # Strategy for choosing exercises: None for uniform choice, or adaptive weights
+        self.sampler: AdaptiveSampler | None = None
+        if adaptive:
+            self.sampler = AdaptiveSampler(self.min_digits, self.max_digits)
 
     def _generate_number(self, digits: int) -> int:
         """
@@ -56,28 +80,58 @@ class MathTrainer:
         else:
             raise ValueError("Number of digits must be from 1 to 3")
 
-    def generate_exercise(self) -> Exercise:
+    def generate_exercise(
+        self,
+        no_carry: bool = False,
+        result_below: int | None = None,
+        exclude: Collection[tuple[int, int]] | None = None,
+    ) -> Exercise:
         """
         Generates a new mathematical exercise
 
+        The operation is random, the operands are a uniformly random pair
+        from the precomputed operand index that matches the constraints.
+        In adaptive mode exercises without constraints are drawn by the adaptive sampler.
+
+        Args:
+            no_carry: Only exercises without carrying (addition) or borrowing (subtraction)
+            result_below: Only exercises with a smaller result
+            exclude: Operand pairs that must not be used, e.g. recently answered ones
+
         Returns:
             Exercise object with new exercise
         """
-        # Random number of digits for numbers
-        digits1 = random.randint(self.min_digits, self.max_digits)
-        digits2 = random.randint(self.min_digits, self.max_digits)
-
-        # Generate numbers
-        first_number = self._generate_number(digits1)
-        second_number = self._generate_number(digits2)
-
-        # Random operation
-        operation = random.choice(list(Operation))
+        if self.sampler is not None and not no_carry and result_below is None and not exclude:
+            operation, first_number, second_number = self.sampler.sample()
+            return self._set_current_exercise(first_number, second_number, operation)
+
+        # Random operation among those that have matching exercises
+        operations = [
+            operation
+            for operation in BATCH_OPERATIONS
+            if operand_index(self.min_digits, self.max_digits, operation).count(no_carry, result_below)
+        ]
+        if not operations:
+            raise ValueError("No exercises match the constraints")
+        operation = random.choice(operations)
+
+        # Subtraction pairs never have the first number smaller, so the result is not negative
+        index = operand_index(self.min_digits, self.max_digits, operation)
+        first_number, second_number = index.sample(no_carry, result_below, exclude)
+        return self._set_current_exercise(first_number, second_number, operation)
+
+    def _set_current_exercise(self, first_number: int, second_number: int, operation: Operation) -> Exercise:
+        """
+        Makes an exercise from drawn operands the current one
 
-        # For subtraction, ensure result is positive
-        if operation == Operation.SUBTRACTION and first_number < second_number:
-            first_number, second_number = second_number, first_number
+        Args:
+            first_number: First operand
+            second_number: Second operand
+            operation: Operation
 
+        Returns:
+            New current exercise
+        """
         # Calculate correct answer
         if operation == Operation.ADDITION:
             correct_answer = first_number + second_number
@@ -93,6 +147,46 @@ class MathTrainer:
 
         return self.current_exercise
 
+    def generate_batch(self, count: int) -> ExerciseBatch:
+        """
+        Generates many exercises at once
+
+        All operands and operations are drawn in bulk and stored in arrays,
+        which is much faster than calling generate_exercise in a loop.
+        Exercises have the same distribution as generate_exercise without constraints.
+        Does not change current_exercise.
+
+        Args:
+            count: Number of exercises to generate
+
+        Returns:
+            ExerciseBatch with generated exercises
+        """
+        if count < 0:
+            raise ValueError("Number of exercises must not be negative")
+
+        operations = random.randbytes(count).translate(_LOW_BIT)
+
+        # Draw positions in the operand index of each operation, then merge in the order of operations
+        firsts, seconds, results = [], [], []
+        for operation_index, operation in enumerate(BATCH_OPERATIONS):
+            index = operand_index(self.min_digits, self.max_digits, operation)
+            positions = random.choices(range(len(index)), k=operations.count(operation_index))
+            firsts.append(iter(array("H", map(index.firsts.__getitem__, positions))))
+            seconds.append(iter(array("H", map(index.seconds.__getitem__, positions))))
+            results.append(iter(array("H", map(index.results.__getitem__, positions))))
+
+        first_numbers = array("H", [next(firsts[op]) for op in operations])
+        second_numbers = array("H", [next(seconds[op]) for op in operations])
+        correct_answers = array("H", [next(results[op]) for op in operations])
+
+        return ExerciseBatch(
+            first_numbers=first_numbers,
+            second_numbers=second_numbers,
+            operations=operations,
+            correct_answers=correct_answers,
+        )
+
     def check_answer(self, exercise: Exercise, user_answer: int, time_taken: float = 0.0) -> Result:
         """
         Checks user answer
@@ -108,21 +202,52 @@ class MathTrainer:
         is_correct = user_answer == exercise.correct_answer
 
         # Update statistics
-        self.stats["total_exercises"] += 1
+        self.record_answer(exercise, is_correct, time_taken)
         if is_correct:
-            self.stats["correct_answers"] += 1
             message = "Correct! Great job!"
         else:
-            self.stats["incorrect_answers"] += 1
             message = f"Incorrect. Correct answer: {exercise.correct_answer}"
 
-        return Result(
+        result = Result(
             is_correct=is_correct,
             user_answer=user_answer,
             correct_answer=exercise.correct_answer,
             message=message,
             time_taken=time_taken,
         )
+        if self.answer_log is not None:
+            self.answer_log.append(exercise, result)
+
+        return result
+
+    def record_answer(self, exercise: Exercise, is_correct: bool, time_taken: float = 0.0) -> None:
+        """
+        Updates statistics with one answer
+
+        Used by check_answer and for restoring statistics from history.
+
+        Args:
+            exercise: Answered exercise
+            is_correct: Whether the answer was correct
+            time_taken: Execution time in seconds, 0.0 if unknown
+        """
+        self.stats["total_exercises"] += 1
+        if is_correct:
+            self.stats["correct_answers"] += 1
+        else:
+            self.stats["incorrect_answers"] += 1
+
+        # Unknown time is passed as 0.0 and is not counted
+        if time_taken > 0:
+            self.times.add(time_taken)
+            kind = (len(str(max(exercise.first_number, exercise.second_number))), exercise.operation)
+            kind_times = self.times_by_kind.get(kind)
+            if kind_times is None:
+                kind_times = self.times_by_kind[kind] = TimeAggregate()
+            kind_times.add(time_taken)
+
+        if self.sampler is not None:
+            self.sampler.update(exercise, is_correct, time_taken)
 
     def get_current_exercise_text(self) -> str:
         """
@@ -147,8 +272,21 @@ class MathTrainer:
             stats["accuracy"] = round((stats["correct_answers"] / stats["total_exercises"]) * 100, 1)
         else:
             stats["accuracy"] = 0.0
+        stats["average_time"] = round(self.times.mean, 3)
+        stats["p50_time"] = round(self.times.quantile(0.5), 3)
+        stats["p90_time"] = round(self.times.quantile(0.9), 3)
+        stats["p99_time"] = round(self.times.quantile(0.99), 3)
         return stats
 
+    def get_time_stats(self) -> dict[tuple[int, Operation], dict[str, int | float]]:
+        """
+        Returns answer time statistics per number of digits and operation
+
+        Returns:
+            Dictionary with count, mean, variance and p50/p90/p99 for each kind of exercise
+        """
+        return {kind: times.summary() for kind, times in self.times_by_kind.items()}
+
     def reset_stats(self) -> None:
         """Resets training statistics"""
         self.stats = {
@@ -156,6 +294,8 @@ class MathTrainer:
             "correct_answers": 0,
             "incorrect_answers": 0,
         }
+        self.times = TimeAggregate()
+        self.times_by_kind = {}
 
     def set_difficulty(self, min_digits: int, max_digits: int) -> None:
         """
@@ -170,3 +310,19 @@ class MathTrainer:
 
         if self.min_digits > self.max_digits:
             self.min_digits = self.max_digits
+
+        # Weights belong to the operand space of the old difficulty
+        if self.sampler is not None:
+            self.sampler = AdaptiveSampler(self.min_digits, self.max_digits)
+
+    def set_adaptive(self, enabled: bool) -> None:
+        """
+        Turns adaptive choice of exercises on or off
+
+        Args:
+            enabled: Whether exercises answered wrong or slowly should come back more often
+        """
+        if not enabled:
+            self.sampler = None
+        elif self.sampler is None:
+            self.sampler = AdaptiveSampler(self.min_digits, self.max_digits)
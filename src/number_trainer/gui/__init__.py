@@ -5,8 +5,17 @@ Components:
 - app: main application class NumberTrainerApp
 - styles: styling and themes
 - widgets: custom widgets
+
+NumberTrainerApp is imported on first access, so tkinter is only loaded when the GUI is used.
 """
 
-from .app import NumberTrainerApp
+from typing import TYPE_CHECKING
+
+from ..lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .app import NumberTrainerApp
 
 __all__ = ["NumberTrainerApp"]
+
+__getattr__, __dir__ = lazy_exports(__name__, {"NumberTrainerApp": ".app"})
@@ -33,6 +33,7 @@ class NumberTrainerApp:
         self.correct_answers_label: ttk.Label
         self.incorrect_answers_label: ttk.Label
         self.trainer = MathTrainer()
+        self.adaptive_var = tk.BooleanVar(master=root, value=False)
         self.current_exercise: Exercise | None = None
         self.current_state = AppState.WELCOME
         self.colors = get_colors()
@@ -201,9 +202,18 @@ class NumberTrainerApp:
             )
             btn.pack(side=tk.LEFT, padx=10)
 
+        # Adaptive mode repeats difficult exercises
+        adaptive_check = ttk.Checkbutton(
+            difficulty_frame,
+            text="Repeat exercises I find difficult",
+            variable=self.adaptive_var,
+            style="Option.TCheckbutton",
+        )
+        adaptive_check.pack(pady=(15, 0))
+
     def start_training(self, min_digits: int = 1, max_digits: int = 2) -> None:
         """Starts training with specified difficulty"""
-        self.trainer = MathTrainer(min_digits, max_digits)
+        self.trainer = MathTrainer(min_digits, max_digits, adaptive=self.adaptive_var.get())
         self.show_exercise()
 
     def show_exercise(self) -> None:
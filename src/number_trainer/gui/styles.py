@@ -152,6 +152,14 @@ def setup_styles() -> None:
         bordercolor=[("focus", COLORS["error"]), ("!focus", COLORS["error"])],
     )
 
+    # Styles for options
+    style.configure(
+        "Option.TCheckbutton",
+        font=("SF Pro Display", 14),
+        foreground=COLORS["text_secondary"],
+        background=COLORS["surface"],
+    )
+
     # Styles for statistics
     style.configure(
         "Stats.TLabel",
@@ -0,0 +1,39 @@
+"""
+Lazy exports of packages (PEP 562).
+
+Package __init__ modules re-export their public classes without importing the submodules
+that define them. A submodule is imported on the first access to one of its names, so
+e.g. the console trainer does not load tkinter and a web worker does not load the GUI.
+"""
+
+import importlib
+from collections.abc import Callable
+from typing import Any
+
+
+def lazy_exports(package: str, exports: dict[str, str]) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    Build module __getattr__ and __dir__ functions for a package
+
+    Args:
+        package: __name__ of the package
+        exports: Public name -> relative name of the submodule that defines it
+
+    Returns:
+        __getattr__ and __dir__ of the package
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        # Later lookups find the name directly and do not call __getattr__
+        namespace[name] = value
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*namespace, *exports})
+
+    return __getattr__, __dir__
@@ -0,0 +1,17 @@
+"""
+Storage module - persistent history of answers.
+
+Components:
+- sqlite: answer history in SQLite
+"""
+
+from typing import TYPE_CHECKING
+
+from ..lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .sqlite import HistoryStore
+
+__all__ = ["HistoryStore"]
+
+__getattr__, __dir__ = lazy_exports(__name__, {"HistoryStore": ".sqlite"})
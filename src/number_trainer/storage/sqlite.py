@@ -0,0 +1,201 @@
+"""
+Answer history in SQLite.
+
+Answers are buffered in memory and inserted in batches. The database runs in WAL mode,
+so queries do not block writes.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from ..core.models import Exercise, Result
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    difficulty INTEGER NOT NULL,
+    operation TEXT NOT NULL,
+    first_number INTEGER NOT NULL,
+    second_number INTEGER NOT NULL,
+    user_answer INTEGER NOT NULL,
+    is_correct INTEGER NOT NULL,
+    time_taken REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_by_session
+    ON answers (session, timestamp, is_correct, time_taken);
+CREATE INDEX IF NOT EXISTS answers_by_kind
+    ON answers (difficulty, operation, is_correct, time_taken);
+"""
+
+_INSERT = """
+INSERT INTO answers (
+    session, timestamp, difficulty, operation, first_number, second_number, user_answer, is_correct, time_taken
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class HistoryStore:
+    """
+    History of checked answers.
+
+    record() is cheap and only adds a row to the buffer. flush() writes the buffer with
+    executemany in one transaction and may block, so callers in an event loop should run it
+    and the queries in a thread. One connection is shared and guarded by a lock.
+    """
+
+    def __init__(self, path: str | Path, batch_size: int = 500, flush_interval: float = 5.0) -> None:
+        """
+        Opens or creates the database
+
+        Args:
+            path: Database file, ":memory:" for a temporary database
+            batch_size: Number of buffered answers after which record() asks for a flush
+            flush_interval: Seconds between flushes done by run_flusher()
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        # deque, because record() appends from the event loop while flush() takes rows in a worker thread
+        self._buffer: deque[tuple[str, float, int, str, int, int, int, bool, float]] = deque()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def record(self, session: str, difficulty: int, exercise: Exercise, result: Result) -> bool:
+        """
+        Buffers one answer
+
+        Args:
+            session: Session id
+            difficulty: Difficulty the exercise was created with
+            exercise: Answered exercise
+            result: Check result
+
+        Returns:
+            True when the buffer is full and flush() should be called
+        """
+        self._buffer.append(
+            (
+                session,
+                time.time(),
+                difficulty,
+                exercise.operation.value,
+                exercise.first_number,
+                exercise.second_number,
+                result.user_answer,
+                result.is_correct,
+                result.time_taken,
+            )
+        )
+        return len(self._buffer) >= self.batch_size
+
+    def flush(self) -> int:
+        """
+        Writes buffered answers
+
+        Returns:
+            Number of written answers
+        """
+        with self._lock:
+            rows = [self._buffer.popleft() for _ in range(len(self._buffer))]
+            if rows:
+                with self._connection:
+                    self._connection.executemany(_INSERT, rows)
+            return len(rows)
+
+    async def run_flusher(self) -> None:
+        """Periodically writes buffered answers in a thread. Runs until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.to_thread(self.flush)
+
+    def worst_pairs(self, session: str, limit: int = 10) -> list[dict[str, str | int | float]]:
+        """
+        Returns exercises the session answers worst
+
+        Args:
+            session: Session id
+            limit: Maximum number of pairs
+
+        Returns:
+            Operand pairs ordered by error rate, then by mean time
+        """
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT first_number, operation, second_number,
+                       COUNT(*) AS attempts,
+                       SUM(1 - is_correct) AS errors,
+                       AVG(time_taken) AS mean_time
+                FROM answers
+                WHERE session = ?
+                GROUP BY first_number, operation, second_number
+                ORDER BY CAST(errors AS REAL) / attempts DESC, mean_time DESC
+                LIMIT ?
+                """,
+                (session, limit),
+            ).fetchall()
+
+        return [
+            {
+                "question": f"{first} {operation} {second}",
+                "attempts": attempts,
+                "errors": errors,
+                "mean_time": round(mean_time, 3),
+            }
+            for first, operation, second, attempts, errors, mean_time in rows
+        ]
+
+    def progress(self, session: str, bucket_seconds: int = 86400) -> list[dict[str, int | float]]:
+        """
+        Returns accuracy and mean time of the session over time
+
+        Args:
+            session: Session id
+            bucket_seconds: Length of one time bucket, one day by default
+
+        Returns:
+            One entry per bucket with answers, ordered by time
+        """
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT CAST(timestamp / ? AS INTEGER) * ? AS bucket,
+                       COUNT(*), SUM(is_correct), AVG(time_taken)
+                FROM answers
+                WHERE session = ?
+                GROUP BY bucket
+                ORDER BY bucket
+                """,
+                (bucket_seconds, bucket_seconds, session),
+            ).fetchall()
+
+        return [
+            {
+                "start": bucket,
+                "total_exercises": total,
+                "accuracy": round(correct / total * 100, 1),
+                "mean_time": round(mean_time, 3),
+            }
+            for bucket, total, correct, mean_time in rows
+        ]
+
+    def close(self) -> None:
+        """Writes buffered answers and closes the database"""
+        self.flush()
+        with self._lock:
+            self._connection.close()
@@ -1,23 +1,72 @@
 """FastAPI application for Number Trainer web interface."""
 
-from pathlib import Path
+import asyncio
+import contextlib
+import os
+from collections.abc import AsyncIterator
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
-from .routes import router
+from . import routes
+from .metrics import MetricsMiddleware, access_log_interval
+from .profiling import ProfilingMiddleware
+from .routes import (
+    exercise_store,
+    global_stats_payload,
+    loop_monitor,
+    profiler,
+    request_metrics,
+    router,
+    session_registry,
+    stats_broadcaster,
+)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Run background tasks for the lifetime of the application."""
+    # Storage is looked up here, a worker forked by the prefork launcher opens its own after import
+    history, answer_log = routes.history, routes.answer_log
+    sweepers = [
+        asyncio.create_task(exercise_store.run_sweeper()),
+        asyncio.create_task(session_registry.run_sweeper()),
+        asyncio.create_task(stats_broadcaster.run(global_stats_payload)),
+        asyncio.create_task(loop_monitor.run()),
+    ]
+    if history is not None:
+        sweepers.append(asyncio.create_task(history.run_flusher()))
+    try:
+        yield
+    finally:
+        for sweeper in sweepers:
+            sweeper.cancel()
+        for sweeper in sweepers:
+            with contextlib.suppress(asyncio.CancelledError):
+                await sweeper
+        if answer_log is not None:
+            answer_log.close()
+        if history is not None:
+            history.close()
 
-# Get the path to static files
-static_path = Path(__file__).parent / "static"
 
 app = FastAPI(
     title="Number Trainer Web",
     description="Web interface for Number Trainer application",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
-
 # Include API routes
 app.include_router(router)
+
+# Requests are counted for /metrics; with ACCESS_LOG_SAMPLE_RATE set, production.py turns off
+# the uvicorn access log and the middleware logs only a sample of the requests
+app.add_middleware(
+    MetricsMiddleware,
+    metrics=request_metrics,
+    access_log_every=access_log_interval(os.getenv("ACCESS_LOG_SAMPLE_RATE")) or 0,
+)
+
+# Whole requests are timed as profiling stages only when PROFILING is enabled
+if profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
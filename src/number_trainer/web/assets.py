@@ -0,0 +1,201 @@
+"""Responses prepared once and served from memory in every supported encoding."""
+
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+
+from fastapi import Request, Response
+
+from .fingerprint import fingerprint, read_static_files, rewrite_urls
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Encodings in order of preference, the smallest output first
+ENCODINGS = ("br", "gzip", "identity")
+
+# Cache header for URLs that change whenever the content changes
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Text types get an explicit charset and are compressed, other files (images) are sent as they are
+_TEXT_TYPES = {"application/javascript", "application/json", "application/manifest+json", "image/svg+xml"}
+
+
+def choose_encoding(accept_encoding: str, available: tuple[str, ...]) -> str:
+    """
+    Pick the best content encoding accepted by the client
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding header
+        available: Encodings that can be served, in order of preference
+
+    Returns:
+        Encoding to use, "identity" when nothing else is accepted
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        weight = 1.0
+        parameter = parameters.strip()
+        if parameter.startswith("q="):
+            try:
+                weight = float(parameter[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            weights[name.strip().lower()] = weight
+
+    best = "identity"
+    best_weight = 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class EncodedAsset:
+    """
+    Response body compressed ahead of time.
+
+    Every encoding has its own strong ETag, so caches never mix up compressed and plain bodies.
+    Variants that do not get smaller than the original are not kept.
+    """
+
+    def __init__(self, content: bytes, media_type: str, cache_control: str = "no-cache", compress: bool = True) -> None:
+        """
+        Compress content with every available encoder
+
+        Args:
+            content: Body of the response
+            media_type: Content type of the response
+            cache_control: Value of the Cache-Control header
+            compress: False for content that is compressed already, such as images
+        """
+        self.media_type = media_type
+        self.cache_control = cache_control
+
+        bodies = {"identity": content}
+        if compress:
+            bodies["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+            if brotli is not None:
+                bodies["br"] = brotli.compress(content, quality=11)
+
+        self.digest = digest = hashlib.sha256(content).hexdigest()[:32]
+        self.variants: dict[str, tuple[bytes, str]] = {
+            encoding: (body, f'"{digest}-{encoding}"')
+            for encoding, body in bodies.items()
+            if encoding == "identity" or len(body) < len(content)
+        }
+        self.encodings = tuple(encoding for encoding in ENCODINGS if encoding in self.variants)
+        self._etags = {etag for _, etag in self.variants.values()}
+
+    def response(self, request: Request, immutable: bool = False) -> Response:
+        """
+        Build response for the request
+
+        Args:
+            request: Incoming request with Accept-Encoding and If-None-Match headers
+            immutable: Whether the URL of the request changes with the content, so it can be cached forever
+
+        Returns:
+            304 Not Modified when the client has a current copy, otherwise the best pre-encoded body
+        """
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), self.encodings)
+        body, etag = self.variants[encoding]
+        cache_control = IMMUTABLE if immutable else self.cache_control
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or not tags.isdisjoint(self._etags):
+                return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class StaticAssets:
+    """
+    All files of a directory, fingerprinted, read and compressed once at startup.
+
+    Files are served under their original path and under their content-hashed name,
+    so serving them needs no access to the file system.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """
+        Load every file of the directory
+
+        Args:
+            directory: Directory with static files
+        """
+        contents, self.manifest = fingerprint(read_static_files(directory))
+        self.assets: dict[str, EncodedAsset] = {}
+        for name, content in contents.items():
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            is_text = media_type.startswith("text/") or media_type in _TEXT_TYPES
+            if is_text:
+                media_type += "; charset=utf-8"
+            self.assets[name] = EncodedAsset(content, media_type, compress=is_text)
+        self._hashed = {hashed: self.assets[name] for name, hashed in self.manifest.items()}
+
+    def get(self, name: str) -> EncodedAsset | None:
+        """
+        Find file by original relative path
+
+        Args:
+            name: Path relative to the directory, with forward slashes
+
+        Returns:
+            Loaded file or None
+        """
+        return self.assets.get(name)
+
+    def lookup(self, name: str) -> tuple[EncodedAsset | None, bool]:
+        """
+        Find file by hashed or original name
+
+        Args:
+            name: Path relative to the directory, with forward slashes
+
+        Returns:
+            Loaded file or None, and whether the name is hashed so the response never changes
+        """
+        asset = self._hashed.get(name)
+        if asset is not None:
+            return asset, True
+        return self.assets.get(name), False
+
+    def first(self, *names: str) -> EncodedAsset | None:
+        """
+        Find the first existing file of a fallback chain
+
+        Args:
+            names: Relative paths in order of preference
+
+        Returns:
+            First loaded file or None when none of them exists
+        """
+        for name in names:
+            asset = self.assets.get(name)
+            if asset is not None:
+                return asset
+        return None
+
+    def rewrite(self, content: bytes) -> bytes:
+        """
+        Point /static/... links of a page at hashed names
+
+        Args:
+            content: Page content
+
+        Returns:
+            Content with rewritten links
+        """
+        return rewrite_urls(content, self.manifest)
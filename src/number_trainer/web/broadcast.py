@@ -0,0 +1,57 @@
+"""Fan-out of periodic statistics updates to streaming clients."""
+
+import asyncio
+from collections.abc import Callable
+
+
+class StatsBroadcaster:
+    """
+    One producer task for all stats streams.
+
+    run() computes the payload once per tick and hands it to every subscriber, so N open
+    streams cost one aggregation per tick instead of N. Each subscriber has a queue that
+    holds only the newest payload; a slow client skips intermediate updates instead of
+    buffering them.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.latest: str | None = None
+        self._subscribers: set[asyncio.Queue[str]] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue[str]:
+        """
+        Start receiving updates
+
+        Returns:
+            Queue with the newest payload, pass it to unsubscribe() when done
+        """
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=1)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[str]) -> None:
+        """Stop sending updates to the queue."""
+        self._subscribers.discard(queue)
+
+    def publish(self, payload: str) -> None:
+        """Replace the pending payload of every subscriber."""
+        self.latest = payload
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def run(self, compute: Callable[[], str]) -> None:
+        """Publish compute() every interval while anyone listens. Runs until cancelled."""
+        while True:
+            if self._subscribers:
+                self.publish(compute())
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,159 @@
+"""
+Content-hashed names for static files.
+
+Every file in web/static gets a name with a hash of its content, e.g.
+css/style.css becomes css/style.0123456789ab.css. A hashed URL changes whenever
+the file changes, so it can be cached forever. Links to /static/... in text files
+(manifest.json, sw.js) and in the HTML page are rewritten to the hashed names.
+
+The server fingerprints the files at startup. Running this module writes the
+same mapping to asset-manifest.json for deployment tools:
+
+    python -m src.number_trainer.web.fingerprint [--check]
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).parent / "static"
+MANIFEST_PATH = Path(__file__).parent / "asset-manifest.json"
+
+# Number of hex digits of the content hash in file names
+HASH_LENGTH = 12
+
+# Files whose links to other files are rewritten
+TEXT_SUFFIXES = {".css", ".html", ".js", ".json", ".svg", ".webmanifest"}
+
+# Files that must keep their URL, the service worker is looked up by a fixed path
+UNHASHED = {"sw.js"}
+
+_STATIC_URL = re.compile(rb"/static/([A-Za-z0-9_./-]+)")
+_ASSET_VERSION = re.compile(rb"const ASSET_VERSION = '[^']*';")
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    """
+    Add content hash to a file name
+
+    Args:
+        name: Path relative to the static directory
+        content: Content of the file
+
+    Returns:
+        Name with the hash before the suffix
+    """
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    path = Path(name)
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def rewrite_urls(content: bytes, manifest: dict[str, str]) -> bytes:
+    """
+    Replace links to static files with their hashed names
+
+    Args:
+        content: Text with /static/... links
+        manifest: Hashed name for every original name
+
+    Returns:
+        Text with rewritten links, unknown files are left as they are
+    """
+
+    def replace(match: re.Match[bytes]) -> bytes:
+        name = match.group(1).decode()
+        return f"/static/{manifest.get(name, name)}".encode()
+
+    return _STATIC_URL.sub(replace, content)
+
+
+def read_static_files(directory: Path) -> dict[str, bytes]:
+    """
+    Read all files of the static directory
+
+    Args:
+        directory: Static directory
+
+    Returns:
+        Content of every file by its path relative to the directory
+    """
+    return {
+        path.relative_to(directory).as_posix(): path.read_bytes()
+        for path in sorted(directory.rglob("*"))
+        if path.is_file()
+    }
+
+
+def fingerprint(files: dict[str, bytes]) -> tuple[dict[str, bytes], dict[str, str]]:
+    """
+    Compute hashed names and rewrite links between files
+
+    Binary files are hashed first, then text files are rewritten to point at the hashed
+    binary files and hashed with the new content. Links from one text file to another
+    hashed text file are not supported; the unhashed files (sw.js) may link to anything.
+
+    Args:
+        files: Content of every file by its relative path
+
+    Returns:
+        Final content of every file and the manifest with hashed names
+    """
+    contents = dict(files)
+    manifest: dict[str, str] = {}
+
+    for name, content in files.items():
+        if Path(name).suffix not in TEXT_SUFFIXES and name not in UNHASHED:
+            manifest[name] = hashed_name(name, content)
+
+    for name, content in files.items():
+        if Path(name).suffix in TEXT_SUFFIXES and name not in UNHASHED:
+            contents[name] = rewrite_urls(content, manifest)
+            manifest[name] = hashed_name(name, contents[name])
+
+    # The version lets the service worker drop caches of older releases
+    version = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:HASH_LENGTH]
+    for name in UNHASHED & files.keys():
+        content = rewrite_urls(files[name], manifest)
+        contents[name] = _ASSET_VERSION.sub(f"const ASSET_VERSION = '{version}';".encode(), content)
+
+    return contents, dict(sorted(manifest.items()))
+
+
+def build_manifest(directory: Path = STATIC_DIR) -> dict[str, str]:
+    """
+    Fingerprint the static directory
+
+    Args:
+        directory: Static directory
+
+    Returns:
+        Hashed name for every original name
+    """
+    _, manifest = fingerprint(read_static_files(directory))
+    return manifest
+
+
+def main() -> int:
+    """Write asset-manifest.json, or check that it is up to date."""
+    parser = argparse.ArgumentParser(description="Fingerprint static files of the web interface")
+    parser.add_argument("--check", action="store_true", help="fail if the manifest is missing or outdated")
+    args = parser.parse_args()
+
+    manifest = build_manifest()
+    text = json.dumps(manifest, indent=2) + "\n"
+    if args.check:
+        if not MANIFEST_PATH.exists() or MANIFEST_PATH.read_text() != text:
+            print(f"{MANIFEST_PATH} is outdated, run the fingerprint step", file=sys.stderr)
+            return 1
+        return 0
+
+    MANIFEST_PATH.write_text(text)
+    print(f"Wrote {MANIFEST_PATH} with {len(manifest)} files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
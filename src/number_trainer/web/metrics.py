@@ -0,0 +1,245 @@
+"""
+Prometheus metrics of the web application.
+
+Requests are counted by a plain ASGI middleware into preallocated histograms. Everything
+runs on the event loop thread, so no locks are needed. The text exposition format is
+rendered only when /metrics is scraped.
+"""
+
+import asyncio
+import logging
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bounds of request latency buckets in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Upper bounds of event loop lag buckets in seconds
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Route label of requests that did not match any route, so unknown paths do not add label values
+UNMATCHED_ROUTE = "unmatched"
+
+access_logger = logging.getLogger("number_trainer.access")
+
+_LABEL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    """Format labels as {name="value",...}, empty string for no labels."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value.translate(_LABEL_ESCAPES)}"' for name, value in labels.items()) + "}"
+
+
+def render_metric(name: str, kind: str, description: str, samples: Iterable[tuple[dict[str, str], float]]) -> str:
+    """
+    Render one metric family in the text exposition format
+
+    Args:
+        name: Metric name
+        kind: counter or gauge
+        description: HELP text
+        samples: Labels and value of every sample
+
+    Returns:
+        Lines of the family ending with a newline
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+class Histogram:
+    """Fixed buckets counted in a preallocated array, observing is one bisect and two additions."""
+
+    __slots__ = ("bounds", "counts", "total")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        # One more bucket for values above the last bound
+        self.counts = array("q", [0]) * (len(bounds) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """Count one value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    @property
+    def count(self) -> int:
+        """Number of observed values."""
+        return sum(self.counts)
+
+    def samples(self, name: str, labels: dict[str, str]) -> list[str]:
+        """Lines of the cumulative buckets, sum and count."""
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, self.counts, strict=False):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': repr(bound)})} {cumulative}")
+        cumulative += self.counts[-1]
+        lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {self.total}")
+        lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+def render_histograms(name: str, description: str, histograms: Iterable[tuple[dict[str, str], Histogram]]) -> str:
+    """Render a histogram family in the text exposition format."""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms:
+        lines.extend(histogram.samples(name, labels))
+    return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """Request counts by status and latency histograms by route."""
+
+    def __init__(self) -> None:
+        # (method, route) -> latency histogram and response counts by status code
+        self.routes: dict[tuple[str, str], tuple[Histogram, dict[int, int]]] = {}
+
+    def observe(self, method: str, route: str, status: int, duration: float) -> None:
+        """
+        Count one finished request
+
+        Args:
+            method: HTTP method
+            route: Path template of the matched route
+            status: Response status code
+            duration: Seconds from receiving the request to sending the response
+        """
+        entry = self.routes.get((method, route))
+        if entry is None:
+            entry = self.routes[method, route] = (Histogram(LATENCY_BUCKETS), {})
+        histogram, statuses = entry
+        histogram.observe(duration)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def render(self) -> str:
+        """Render request counters and latency histograms."""
+        counts = render_metric(
+            "number_trainer_http_requests_total",
+            "counter",
+            "HTTP requests by method, route and status code.",
+            (
+                ({"method": method, "route": route, "status": str(status)}, count)
+                for (method, route), (_, statuses) in sorted(self.routes.items())
+                for status, count in sorted(statuses.items())
+            ),
+        )
+        latencies = render_histograms(
+            "number_trainer_http_request_duration_seconds",
+            "HTTP request latency by method and route.",
+            (
+                ({"method": method, "route": route}, histogram)
+                for (method, route), (histogram, _) in sorted(self.routes.items())
+            ),
+        )
+        return counts + latencies
+
+
+class EventLoopMonitor:
+    """
+    Lag of the event loop.
+
+    A task sleeps for a fixed interval and measures how much later than planned it wakes up.
+    Lag grows when handlers block the loop or when the worker has more work than it can do.
+    """
+
+    def __init__(self, interval: float = 0.5) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.lag = 0.0
+        self.histogram = Histogram(LAG_BUCKETS)
+
+    async def run(self) -> None:
+        """Measure lag every interval. Runs until cancelled."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.histogram.observe(self.lag)
+
+    def render(self) -> str:
+        """Render lag histogram and the last measured lag."""
+        return render_histograms(
+            "number_trainer_event_loop_lag_seconds", "Delay of event loop wake-ups.", [({}, self.histogram)]
+        ) + render_metric(
+            "number_trainer_event_loop_last_lag_seconds", "gauge", "Last measured event loop delay.", [({}, self.lag)]
+        )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that counts HTTP requests and writes a sampled access log.
+
+    With access_log_every = N, every Nth request is logged; 0 disables the log.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics, access_log_every: int = 0) -> None:
+        self.app = app
+        self.metrics = metrics
+        self.access_log_every = access_log_every
+        self._requests = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            self.metrics.observe(scope["method"], route, status, duration)
+
+            if self.access_log_every:
+                self._requests += 1
+                if self._requests >= self.access_log_every:
+                    self._requests = 0
+                    client = scope.get("client")
+                    access_logger.info(
+                        '%s - "%s %s" %d %.1fms (1 of %d requests logged)',
+                        f"{client[0]}:{client[1]}" if client else "-",
+                        scope["method"],
+                        scope["path"],
+                        status,
+                        duration * 1000,
+                        self.access_log_every,
+                    )
+
+
+def access_log_interval(sample_rate: str | None) -> int | None:
+    """
+    Convert the ACCESS_LOG_SAMPLE_RATE setting to a logging interval
+
+    Args:
+        sample_rate: Share of requests to log, from 0 to 1, None when not set
+
+    Returns:
+        None to keep the uvicorn access log of every request, 0 to log nothing,
+        otherwise log every Nth request
+    """
+    if sample_rate is None or sample_rate == "":
+        return None
+    rate = float(sample_rate)
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError("ACCESS_LOG_SAMPLE_RATE must be from 0 to 1")
+    return 0 if rate == 0 else round(1 / rate)
@@ -7,6 +7,8 @@ class ExerciseRequest(BaseModel):
     """Request to create a new exercise."""
 
     difficulty: int  # 1, 2, or 3 (number of digits)
+    no_carry: bool = False  # no carrying or borrowing
+    result_below: int | None = None
 
 
 class ExerciseResponse(BaseModel):
@@ -17,6 +19,38 @@ class ExerciseResponse(BaseModel):
     operation: str
 
 
+class PrefetchRequest(BaseModel):
+    """Request for a window of upcoming exercises."""
+
+    difficulty: int  # 1, 2, or 3 (number of digits)
+    count: int = 5
+    no_carry: bool = False
+    result_below: int | None = None
+    discard: list[str] = []  # ids of prefetched exercises the client dropped
+
+
+class PrefetchResponse(BaseModel):
+    """Window of upcoming exercises."""
+
+    exercises: list[ExerciseResponse]
+
+
+class BatchRequest(BaseModel):
+    """Request to generate a batch of exercises."""
+
+    difficulty: int  # 1, 2, or 3 (number of digits)
+    count: int
+
+
+class BatchResponse(BaseModel):
+    """Response with a batch of exercises in columnar form."""
+
+    first_numbers: list[int]
+    second_numbers: list[int]
+    operations: list[str]
+    correct_answers: list[int]
+
+
 class AnswerRequest(BaseModel):
     """Request to check an answer."""
 
@@ -42,3 +76,79 @@ class StatsResponse(BaseModel):
     incorrect_answers: int
     accuracy: float
     average_time: float | None = None
+
+
+class TimingStats(BaseModel):
+    """Answer time distribution for one difficulty and operation."""
+
+    difficulty: int
+    operation: str
+    count: int
+    mean: float
+    variance: float
+    p50: float
+    p90: float
+    p99: float
+
+
+class HistoryPair(BaseModel):
+    """Model for an exercise from the answer history."""
+
+    question: str
+    attempts: int
+    errors: int
+    mean_time: float
+
+
+class ProgressBucket(BaseModel):
+    """Model for session progress in one time bucket."""
+
+    start: int
+    total_exercises: int
+    accuracy: float
+    mean_time: float
+
+
+class AnswerStepRequest(AnswerRequest):
+    """Answer to check together with a request for the next exercises."""
+
+    difficulty: int  # 1, 2, or 3 (number of digits)
+    next_count: int = 1
+    no_carry: bool = False
+    result_below: int | None = None
+
+
+class AnswerStepResponse(BaseModel):
+    """Check result, next exercises and updated statistics in one response."""
+
+    result: AnswerResponse
+    exercises: list[ExerciseResponse]
+    stats: StatsResponse
+
+
+class ClassJoinRequest(BaseModel):
+    """Request to join a class."""
+
+    name: str  # shown on the class leaderboard
+
+
+class ClassMemberStats(StatsResponse):
+    """Statistics of one class member."""
+
+    name: str
+
+
+class OperationStats(StatsResponse):
+    """Statistics of one difficulty and operation."""
+
+    difficulty: int
+    operation: str
+
+
+class ClassSummary(BaseModel):
+    """Statistics of a whole class, overall and in recent windows."""
+
+    members: int
+    total: StatsResponse
+    last_5_minutes: StatsResponse
+    last_hour: StatsResponse
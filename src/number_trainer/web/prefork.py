@@ -0,0 +1,266 @@
+"""
+Preforking launcher for production.
+
+The master process imports the application once, builds the operand indexes and static
+file cache, freezes the garbage collector and forks the workers. Workers share these pages
+copy-on-write instead of importing FastAPI, pydantic and the routes on their own. Every
+worker binds its own SO_REUSEPORT socket, so the kernel spreads new connections over them
+and a worker can be replaced without closing the port.
+
+Signals to the master:
+- SIGTERM, SIGINT: stop workers gracefully and exit
+- SIGHUP: start a new set of workers, then stop the old ones gracefully
+"""
+
+import gc
+import logging
+import logging.config
+import os
+import signal
+import socket
+import time
+import traceback
+from typing import Any
+
+import uvicorn
+from starlette.types import ASGIApp
+
+logger = logging.getLogger("uvicorn.error")
+
+# Seconds a worker gets to finish open requests after SIGTERM before it is killed
+GRACEFUL_TIMEOUT = 30.0
+
+# A worker that fails sooner than this after its start is treated as a startup failure,
+# e.g. a port used by another program, and the master stops instead of restarting it in a loop
+MIN_WORKER_LIFETIME = 1.0
+
+# Signals handled by the master; they are blocked and read with sigtimedwait
+MASTER_SIGNALS = {signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD}
+
+
+def reuseport_socket(host: str, port: int) -> socket.socket:
+    """
+    Create a socket for a worker, other workers can bind to the same address
+
+    Args:
+        host: Bind address, IPv4 or IPv6
+        port: Port
+
+    Returns:
+        Socket bound with SO_REUSEPORT
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def preload() -> ASGIApp:
+    """
+    Import and warm up the application in the master
+
+    Returns:
+        Application shared by all forked workers
+    """
+    from ..core.models import BATCH_OPERATIONS
+    from ..core.operand_index import operand_index
+    from . import routes
+    from .app import app
+
+    for trainer in routes.trainers.values():
+        for operation in BATCH_OPERATIONS:
+            operand_index(trainer.min_digits, trainer.max_digits, operation)
+    # Objects that exist now are never collected; without this, collections in the workers
+    # write to the headers of shared objects and copy their pages
+    gc.freeze()
+    return app
+
+
+def run_worker(app: ASGIApp, host: str, port: int, options: dict[str, Any]) -> None:
+    """
+    Serve requests in a forked worker until it receives SIGTERM or SIGINT
+
+    Args:
+        app: Preloaded application
+        host: Bind address
+        port: Port
+        options: Uvicorn settings
+    """
+    from . import routes
+
+    # The signal mask of the master is inherited, uvicorn handles SIGTERM and SIGINT itself
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+    routes.open_worker_storage()
+
+    sock = reuseport_socket(host, port)
+    config = uvicorn.Config(app, timeout_graceful_shutdown=int(GRACEFUL_TIMEOUT), **options)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class PreforkServer:
+    """Master process that keeps a fixed number of forked workers running."""
+
+    def __init__(self, app: ASGIApp, host: str, port: int, workers: int, options: dict[str, Any]) -> None:
+        if workers < 1:
+            raise ValueError("workers must be positive")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.options = options
+        # Pid -> monotonic start time of running workers
+        self.running: dict[int, float] = {}
+        # Workers asked to stop; they are not replaced when they exit
+        self.retiring: set[int] = set()
+
+    def spawn(self) -> int:
+        """Fork one worker and return its pid."""
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.app, self.host, self.port, self.options)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                # Never return into the master loop in the worker
+                os._exit(code)
+        self.running[pid] = time.monotonic()
+        logger.info("Started worker process [%d]", pid)
+        return pid
+
+    def retire(self, pids: list[int]) -> None:
+        """Ask workers to finish open requests and exit."""
+        for pid in pids:
+            self.retiring.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reap(self) -> list[tuple[int, int, float, bool]]:
+        """
+        Collect exited workers
+
+        Returns:
+            Pid, exit code, lifetime in seconds and whether it was asked to stop, for every exited worker
+        """
+        exited = []
+        while self.running:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self.running.pop(pid, None)
+            if started is None:
+                continue
+            retired = pid in self.retiring
+            self.retiring.discard(pid)
+            exited.append((pid, os.waitstatus_to_exitcode(status), time.monotonic() - started, retired))
+        return exited
+
+    def restart(self) -> None:
+        """Replace all workers; new ones listen before the old ones stop, so no connection is refused."""
+        old = [pid for pid in self.running if pid not in self.retiring]
+        logger.info("Restarting %d workers", len(old))
+        for _ in old:
+            self.spawn()
+        self.retire(old)
+
+    def stop(self) -> None:
+        """Stop all workers, killing those that do not finish within the graceful timeout."""
+        self.retire(list(self.running))
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        while self.running and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.running):
+            logger.warning("Killing worker process [%d]", pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            del self.running[pid]
+
+    def run(self) -> int:
+        """
+        Start the workers and supervise them until SIGTERM or SIGINT
+
+        Returns:
+            Exit code of the master
+        """
+        signal.pthread_sigmask(signal.SIG_BLOCK, MASTER_SIGNALS)
+        logger.info(
+            "Master process [%d] serving on %s:%d with %d workers", os.getpid(), self.host, self.port, self.workers
+        )
+        code = 0
+        try:
+            for _ in range(self.workers):
+                self.spawn()
+            while True:
+                info = signal.sigtimedwait(MASTER_SIGNALS, 1.0)
+                signum = info.si_signo if info is not None else None
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    logger.info("Stopping workers")
+                    break
+                if signum == signal.SIGHUP:
+                    self.restart()
+
+                failed = False
+                for pid, exit_code, lifetime, retired in self.reap():
+                    if retired:
+                        continue
+                    logger.error("Worker process [%d] exited with code %d", pid, exit_code)
+                    if exit_code > 0 and lifetime < MIN_WORKER_LIFETIME:
+                        failed = True
+                if failed:
+                    logger.error("Workers fail on startup, stopping")
+                    code = 1
+                    break
+                # Replace workers that exited on their own
+                for _ in range(self.workers - (len(self.running) - len(self.retiring))):
+                    self.spawn()
+        finally:
+            self.stop()
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+        return code
+
+
+def run_prefork(host: str, port: int, workers: int, options: dict[str, Any]) -> None:
+    """
+    Preload the application and serve it with forked workers
+
+    Args:
+        host: Bind address
+        port: Port
+        workers: Number of worker processes
+        options: Uvicorn settings, see production.server_options
+
+    Raises:
+        SystemExit: With code 1 when workers fail to start
+    """
+    logging.config.dictConfig(options["log_config"])
+    logger.setLevel(options["log_level"].upper())
+    # Fail in the master when the port is taken, before any worker is forked
+    reuseport_socket(host, port).close()
+
+    app = preload()
+    code = PreforkServer(app, host, port, workers, options).run()
+
+    # The master opened storage when it imported the routes, workers opened their own
+    from . import routes
+
+    if routes.answer_log is not None:
+        routes.answer_log.close()
+    if routes.history is not None:
+        routes.history.close()
+    routes.stats_backend.close()
+    if code:
+        raise SystemExit(code)
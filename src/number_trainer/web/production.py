@@ -1,8 +1,16 @@
 """Production entry point for Number Trainer web application."""
 
+import copy
 import os
+import secrets
+from typing import Any
 
 import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+from ..core.answer_log import read_answer_log
+from .metrics import access_log_interval
+from .stats import SharedMemoryStatsBackend, create_shared_stats_block
 
 
 def main() -> None:
@@ -10,21 +18,96 @@ def main() -> None:
     # Get configuration from environment variables
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
-    workers = int(os.getenv("WORKERS", "1"))
+    workers = worker_count(os.getenv("WORKERS"))
+
+    # Signed exercise tokens must be verifiable by every worker, so all of them need the same secret.
+    # Workers inherit the environment, so a secret generated here is shared by this server only;
+    # set EXERCISE_SECRET explicitly when running several nodes.
+    if os.getenv("EXERCISE_STORE") == "signed" and not os.getenv("EXERCISE_SECRET"):
+        os.environ["EXERCISE_SECRET"] = secrets.token_hex(32)
+
+    # Workers attach to one shared counter block, so /api/stats reports totals of all of them
+    shared_stats = None
+    history = None
+    if os.getenv("STATS_BACKEND") == "shared":
+        shared_stats = create_shared_stats_block()
+        os.environ["STATS_SHM_NAME"] = shared_stats.name
+
+        # History is counted once here, in a slot held by this process
+        answer_log_dir = os.getenv("ANSWER_LOG_DIR")
+        if answer_log_dir:
+            history = SharedMemoryStatsBackend(shared_stats.name)
+            for _, is_correct, time_taken in read_answer_log(answer_log_dir):
+                history.record(is_correct, time_taken)
+
+    try:
+        if os.getenv("LAUNCHER", "uvicorn") == "prefork":
+            # Imported here, so the application is not loaded before the environment above is set
+            from .prefork import run_prefork
+
+            run_prefork(host, port, workers, server_options())
+        else:
+            run_server(host, port, workers)
+    finally:
+        if history is not None:
+            history.close()
+        if shared_stats is not None:
+            shared_stats.close()
+            shared_stats.unlink()
+
+
+def build_log_config(sampled_access_log: bool) -> dict[str, Any]:
+    """Uvicorn logging configuration, with a handler for the sampled access log when it is used."""
+    log_config = copy.deepcopy(LOGGING_CONFIG)
+    if sampled_access_log:
+        log_config["loggers"]["number_trainer.access"] = {"handlers": ["default"], "level": "INFO", "propagate": False}
+    return log_config
+
+
+def worker_count(setting: str | None) -> int:
+    """
+    Number of worker processes from the WORKERS setting
+
+    Args:
+        setting: Positive number, or "auto" for one worker per available CPU core; None means 1
+
+    Returns:
+        Number of workers
+    """
+    if setting is None or setting == "":
+        return 1
+    if setting == "auto":
+        return os.process_cpu_count() or 1
+    workers = int(setting)
+    if workers < 1:
+        raise ValueError("WORKERS must be positive or auto")
+    return workers
+
+
+def server_options() -> dict[str, Any]:
+    """Uvicorn settings shared by both launchers."""
+    # Logging every request costs throughput, a sample is logged by the metrics middleware instead
+    sampled_access_log = access_log_interval(os.getenv("ACCESS_LOG_SAMPLE_RATE")) is not None
+    return {
+        "log_level": os.getenv("LOG_LEVEL", "info"),
+        "access_log": not sampled_access_log,
+        "log_config": build_log_config(sampled_access_log),
+        "server_header": False,  # Security: don't expose server info
+        "date_header": False,  # Security: don't expose date info
+        "forwarded_allow_ips": "*",  # Allow forwarded headers
+        "proxy_headers": True,  # Trust proxy headers
+    }
+
 
-    # Production settings
+def run_server(host: str, port: int, workers: int) -> None:
+    """Run uvicorn with production settings, every worker imports the application itself."""
     uvicorn.run(
         "src.number_trainer.web.app:app",
         host=host,
         port=port,
         workers=workers,
         reload=False,  # Disable reload in production
-        log_level=os.getenv("LOG_LEVEL", "info"),
-        access_log=True,
-        server_header=False,  # Security: don't expose server info
-        date_header=False,  # Security: don't expose date info
-        forwarded_allow_ips="*",  # Allow forwarded headers
-        proxy_headers=True,  # Trust proxy headers
+        **server_options(),
     )
 
 
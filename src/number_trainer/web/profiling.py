@@ -0,0 +1,245 @@
+"""
+Opt-in profiling of the web application.
+
+With PROFILING enabled, trainer methods, model rendering and whole requests are timed into
+a ring buffer of stage timings, and the admin endpoints can record a cProfile or a sampled
+collapsed-stack profile of the running worker. Nothing is wrapped or added when profiling
+is disabled, so it costs nothing then.
+"""
+
+import asyncio
+import cProfile
+import functools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from types import CodeType
+from typing import Any
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .metrics import UNMATCHED_ROUTE
+
+# Trainer methods timed as stages of their own
+TRAINER_STAGES = ("generate_exercise", "generate_batch", "check_answer")
+
+# Deepest stack kept by the sampler, deeper frames are cut at the root side
+MAX_STACK_DEPTH = 128
+
+
+class StageTimings:
+    """
+    Durations of the last timed stages in a ring buffer.
+
+    Stage names are stored once, the ring holds a stage number and a duration per entry,
+    so recording is two array writes and the buffer never grows.
+    """
+
+    def __init__(self, size: int = 10_000) -> None:
+        if size < 1:
+            raise ValueError("size must be positive")
+        self.stages: list[str] = []
+        self._stage_ids: dict[str, int] = {}
+        self._stage = array("I", [0]) * size
+        self._durations = array("d", [0.0]) * size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, stage: str, duration: float) -> None:
+        """Store one duration in seconds, overwriting the oldest one when the buffer is full."""
+        stage_id = self._stage_ids.get(stage)
+        if stage_id is None:
+            stage_id = self._stage_ids[stage] = len(self.stages)
+            self.stages.append(stage)
+        slot = self._next
+        self._stage[slot] = stage_id
+        self._durations[slot] = duration
+        self._next = (slot + 1) % len(self._durations)
+        self._count = min(self._count + 1, len(self._durations))
+
+    def summary(self) -> dict[str, dict[str, int | float]]:
+        """
+        Summarize the buffered durations
+
+        Returns:
+            Count, total, mean, p50, p99 and max in seconds per stage, for stages in the buffer
+        """
+        by_stage: dict[int, list[float]] = {}
+        for slot in range(self._count):
+            by_stage.setdefault(self._stage[slot], []).append(self._durations[slot])
+
+        summary: dict[str, dict[str, int | float]] = {}
+        for stage_id, durations in sorted(by_stage.items(), key=lambda item: self.stages[item[0]]):
+            durations.sort()
+            total = sum(durations)
+            summary[self.stages[stage_id]] = {
+                "count": len(durations),
+                "total": total,
+                "mean": total / len(durations),
+                "p50": durations[(len(durations) - 1) // 2],
+                "p99": durations[min(len(durations) - 1, int(len(durations) * 0.99))],
+                "max": durations[-1],
+            }
+        return summary
+
+
+class Profiler:
+    """Stage timings and on-demand profiles of one worker."""
+
+    def __init__(self, buffer_size: int = 10_000) -> None:
+        self.timings = StageTimings(buffer_size)
+        # Only one cProfile or stack sampler may run at a time
+        self.busy = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body of the with statement as a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.record(name, time.perf_counter() - start)
+
+    def timed(self, function: Callable[..., Any], stage: str) -> Callable[..., Any]:
+        """Wrap a function so that every call is recorded as a stage."""
+        timings = self.timings
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings.record(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    def instrument(self, target: object, methods: Iterable[str], prefix: str) -> None:
+        """
+        Replace methods of an object or a class with timed ones
+
+        Args:
+            target: Instance whose bound methods are wrapped, or class whose functions are wrapped
+            methods: Names of the methods
+            prefix: Stage names are prefix.method
+        """
+        for name in methods:
+            setattr(target, name, self.timed(getattr(target, name), f"{prefix}.{name}"))
+
+    def start(self) -> None:
+        """Mark the profiler as running an on-demand profile."""
+        if self.busy:
+            raise RuntimeError("Profiling is already running")
+        self.busy = True
+
+    async def profile(self, seconds: float) -> bytes:
+        """
+        Run cProfile on the event loop thread
+
+        Everything the worker does on the loop meanwhile is profiled, including other requests.
+
+        Args:
+            seconds: Duration of the profile
+
+        Returns:
+            Marshalled pstats data, the format written by pstats.Stats.dump_stats
+        """
+        self.start()
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+        finally:
+            self.busy = False
+        return marshal.dumps(pstats.Stats(profile).stats)  # type: ignore[attr-defined]
+
+    async def sample_stacks(self, seconds: float, interval: float = 0.001) -> str:
+        """
+        Sample stacks of the event loop thread from another thread
+
+        Args:
+            seconds: Duration of sampling
+            interval: Seconds between samples
+
+        Returns:
+            Collapsed stacks, one "root;...;leaf count" line per distinct stack,
+            the input format of flamegraph.pl and speedscope
+        """
+        self.start()
+        try:
+            stacks = await asyncio.to_thread(sample_thread, threading.get_ident(), seconds, interval)
+        finally:
+            self.busy = False
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def frame_label(code: CodeType) -> str:
+    """Name of a frame in collapsed stacks, like 'check_answer (trainer.py:185)'."""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_thread(thread_id: int, seconds: float, interval: float) -> Counter[str]:
+    """
+    Count the stacks of a thread sampled at a fixed interval
+
+    Args:
+        thread_id: Identifier of the sampled thread
+        seconds: Duration of sampling
+        interval: Seconds between samples
+
+    Returns:
+        Number of samples per collapsed stack, root first
+    """
+    stacks: Counter[str] = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        labels: list[str] = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(frame_label(frame.f_code))
+            frame = frame.f_back
+        stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that records every HTTP request as a stage named by method and route."""
+
+    def __init__(self, app: ASGIApp, profiler: Profiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            self.profiler.timings.record(f"request {scope['method']} {route}", time.perf_counter() - start)
+
+
+def create_profiler() -> Profiler | None:
+    """Create the profiler when PROFILING is enabled, None otherwise."""
+    if os.getenv("PROFILING", "false").lower() not in {"1", "true", "yes"}:
+        return None
+    return Profiler(buffer_size=int(os.getenv("PROFILING_BUFFER_SIZE", "10000")))
@@ -0,0 +1,43 @@
+"""Fast JSON responses for the hottest endpoints."""
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+class ModelResponse(Response):
+    """
+    JSON response rendered by the compiled serializer of a pydantic model.
+
+    When an endpoint returns a model, FastAPI validates it against the response model
+    and converts it with jsonable_encoder before encoding. Models built by the routes
+    are valid already, so returning this response writes the JSON bytes directly.
+    The endpoint keeps response_model for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, model: BaseModel, status_code: int = 200, parent: Response | None = None) -> None:
+        """
+        Serialize model
+
+        Args:
+            model: Response body
+            status_code: HTTP status code
+            parent: Response injected into the endpoint, its headers and cookies set by dependencies are kept
+        """
+        super().__init__(model.__pydantic_serializer__.to_json(model), status_code=status_code)
+        if parent is not None:
+            inherit_headers(self, parent)
+
+
+def inherit_headers(response: Response, parent: Response) -> None:
+    """
+    Copy headers set by dependencies on the injected response
+
+    FastAPI drops them when an endpoint returns its own response object.
+
+    Args:
+        response: Response returned by the endpoint
+        parent: Response injected into the endpoint
+    """
+    response.raw_headers.extend(header for header in parent.raw_headers if header[0] != b"content-length")
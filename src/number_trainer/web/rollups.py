@@ -0,0 +1,249 @@
+"""Incremental per-class statistics for teacher dashboards."""
+
+import os
+import re
+import time
+from array import array
+
+from ..core.models import Operation
+
+# Accepted format of class ids in URLs
+CLASS_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# Recent windows: name -> (bucket width in seconds, number of buckets)
+WINDOWS = {
+    "last_5_minutes": (10, 30),
+    "last_hour": (60, 60),
+}
+
+
+class Tally:
+    """Answer counters of one group of answers."""
+
+    __slots__ = ("total_exercises", "correct_answers", "timed_answers", "total_time")
+
+    def __init__(self) -> None:
+        self.total_exercises = 0
+        self.correct_answers = 0
+        self.timed_answers = 0
+        self.total_time = 0.0
+
+    def record(self, is_correct: bool, time_taken: float = 0.0) -> None:
+        """Count one checked answer, unknown time is passed as 0.0."""
+        self.total_exercises += 1
+        if is_correct:
+            self.correct_answers += 1
+        if time_taken > 0:
+            self.timed_answers += 1
+            self.total_time += time_taken
+
+    @property
+    def average_time(self) -> float | None:
+        """Mean answer time, None when no time was reported."""
+        if self.timed_answers == 0:
+            return None
+        return self.total_time / self.timed_answers
+
+
+class WindowTally:
+    """
+    Answer counters of a sliding time window.
+
+    The window is a ring of fixed-width buckets. A bucket is reset when the ring comes
+    around to it again, so recording is O(1) and reading sums the buckets that are
+    still inside the window.
+    """
+
+    __slots__ = ("width", "_buckets", "_totals", "_correct", "_timed", "_time")
+
+    def __init__(self, width: int, size: int) -> None:
+        """
+        Create empty window
+
+        Args:
+            width: Seconds covered by one bucket
+            size: Number of buckets, the window covers width * size seconds
+        """
+        self.width = width
+        # Number of the time bucket every slot currently holds, -1 for never used slots
+        self._buckets = array("q", [-1]) * size
+        self._totals = array("q", [0]) * size
+        self._correct = array("q", [0]) * size
+        self._timed = array("q", [0]) * size
+        self._time = array("d", [0.0]) * size
+
+    def record(self, now: float, is_correct: bool, time_taken: float = 0.0) -> None:
+        """Count one checked answer at monotonic time now."""
+        bucket = int(now // self.width)
+        slot = bucket % len(self._buckets)
+        if self._buckets[slot] != bucket:
+            self._buckets[slot] = bucket
+            self._totals[slot] = self._correct[slot] = self._timed[slot] = 0
+            self._time[slot] = 0.0
+
+        self._totals[slot] += 1
+        if is_correct:
+            self._correct[slot] += 1
+        if time_taken > 0:
+            self._timed[slot] += 1
+            self._time[slot] += time_taken
+
+    def totals(self, now: float) -> Tally:
+        """Sum of the buckets inside the window ending at now."""
+        oldest = int(now // self.width) - len(self._buckets)
+        tally = Tally()
+        for slot, bucket in enumerate(self._buckets):
+            if bucket > oldest:
+                tally.total_exercises += self._totals[slot]
+                tally.correct_answers += self._correct[slot]
+                tally.timed_answers += self._timed[slot]
+                tally.total_time += self._time[slot]
+        return tally
+
+
+class ClassRollup:
+    """Aggregates of one class, updated on every answer of its members."""
+
+    __slots__ = ("total", "by_kind", "windows", "members")
+
+    def __init__(self) -> None:
+        self.total = Tally()
+        self.by_kind: dict[tuple[int, Operation], Tally] = {}
+        self.windows = {name: WindowTally(width, size) for name, (width, size) in WINDOWS.items()}
+        # Session id -> display name and counters of the member
+        self.members: dict[str, tuple[str, Tally]] = {}
+
+    def record(
+        self, session_id: str, difficulty: int, operation: Operation, is_correct: bool, time_taken: float
+    ) -> None:
+        """Count one answer of a member in O(1)."""
+        now = time.monotonic()
+        self.total.record(is_correct, time_taken)
+        kind = self.by_kind.get((difficulty, operation))
+        if kind is None:
+            kind = self.by_kind[difficulty, operation] = Tally()
+        kind.record(is_correct, time_taken)
+        for window in self.windows.values():
+            window.record(now, is_correct, time_taken)
+        self.members[session_id][1].record(is_correct, time_taken)
+
+    def leaderboard(self, limit: int) -> list[tuple[str, Tally]]:
+        """
+        Return the best members
+
+        Args:
+            limit: Maximum number of members
+
+        Returns:
+            Name and counters, ordered by correct answers, then by accuracy
+        """
+        ranked = sorted(
+            self.members.values(),
+            key=lambda member: (
+                member[1].correct_answers,
+                member[1].correct_answers / (member[1].total_exercises or 1),
+            ),
+            reverse=True,
+        )
+        return ranked[:limit]
+
+    def recent(self) -> dict[str, Tally]:
+        """Counters of the recent windows by window name."""
+        now = time.monotonic()
+        return {name: window.totals(now) for name, window in self.windows.items()}
+
+
+class ClassRollups:
+    """
+    Rollups of all classes.
+
+    A session belongs to at most one class. Answers of sessions outside any class
+    cost one dict lookup.
+    """
+
+    def __init__(self, max_classes: int = 10_000, max_members: int = 200) -> None:
+        if max_classes < 1:
+            raise ValueError("max_classes must be positive")
+        if max_members < 1:
+            raise ValueError("max_members must be positive")
+        self.max_classes = max_classes
+        self.max_members = max_members
+        self._classes: dict[str, ClassRollup] = {}
+        self._membership: dict[str, ClassRollup] = {}
+
+    def __len__(self) -> int:
+        return len(self._classes)
+
+    def get(self, class_id: str) -> ClassRollup | None:
+        """Return rollup of the class, None for unknown classes."""
+        return self._classes.get(class_id)
+
+    def join(self, class_id: str, session_id: str, name: str) -> ClassRollup:
+        """
+        Add a session to a class, creating the class if needed
+
+        A session that joins another class leaves the leaderboard of its previous one,
+        its answers stay in the totals there.
+
+        Args:
+            class_id: Id of the class
+            session_id: Id of the session
+            name: Name shown on the leaderboard
+
+        Returns:
+            Rollup of the class
+
+        Raises:
+            ValueError: If the class id is malformed or the class or the number of classes is full
+        """
+        if not CLASS_ID_PATTERN.fullmatch(class_id):
+            raise ValueError("Malformed class id")
+
+        rollup = self._classes.get(class_id)
+        if rollup is None:
+            if len(self._classes) >= self.max_classes:
+                raise ValueError("Too many classes")
+            rollup = self._classes[class_id] = ClassRollup()
+
+        member = rollup.members.get(session_id)
+        if member is not None:
+            rollup.members[session_id] = (name, member[1])
+        elif len(rollup.members) >= self.max_members:
+            raise ValueError("Class is full")
+        else:
+            rollup.members[session_id] = (name, Tally())
+
+        previous = self._membership.get(session_id)
+        if previous is not None and previous is not rollup:
+            del previous.members[session_id]
+        self._membership[session_id] = rollup
+        return rollup
+
+    def record(
+        self, session_id: str, difficulty: int, operation: Operation, is_correct: bool, time_taken: float
+    ) -> None:
+        """
+        Count an answer in the class of the session
+
+        Args:
+            session_id: Id of the answering session
+            difficulty: Difficulty the exercise was created with
+            operation: Operation of the exercise
+            is_correct: Whether the answer was correct
+            time_taken: Execution time in seconds, 0.0 if unknown
+        """
+        rollup = self._membership.get(session_id)
+        if rollup is not None:
+            rollup.record(session_id, difficulty, operation, is_correct, time_taken)
+
+    def stats(self) -> dict[str, int]:
+        """Rollup counters."""
+        return {"classes": len(self), "members": len(self._membership)}
+
+
+def create_class_rollups() -> ClassRollups:
+    """Create class rollups configured from environment variables."""
+    return ClassRollups(
+        max_classes=int(os.getenv("CLASS_MAX_COUNT", "10000")),
+        max_members=int(os.getenv("CLASS_MAX_MEMBERS", "200")),
+    )
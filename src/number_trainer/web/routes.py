@@ -1,67 +1,318 @@
 """API routes for Number Trainer web interface."""
 
-import uuid
-
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse
-
-from ..core.models import Operation
+import asyncio
+import json
+import os
+import secrets
+import time
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..core.answer_log import AnswerLog, read_answer_log
+from ..core.models import BATCH_OPERATIONS, Exercise, Result
 from ..core.trainer import MathTrainer
+from ..storage import HistoryStore
+from .assets import EncodedAsset, StaticAssets
+from .broadcast import StatsBroadcaster
+from .fingerprint import STATIC_DIR
+from .metrics import EventLoopMonitor, RequestMetrics, render_metric
 from .models import (
     AnswerRequest,
     AnswerResponse,
+    AnswerStepRequest,
+    AnswerStepResponse,
+    BatchRequest,
+    BatchResponse,
+    ClassJoinRequest,
+    ClassMemberStats,
+    ClassSummary,
     ExerciseRequest,
     ExerciseResponse,
+    HistoryPair,
+    OperationStats,
+    PrefetchRequest,
+    PrefetchResponse,
+    ProgressBucket,
     StatsResponse,
+    TimingStats,
 )
+from .profiling import TRAINER_STAGES, Profiler, create_profiler
+from .responses import ModelResponse, inherit_headers
+from .rollups import ClassRollup, ClassRollups, Tally, create_class_rollups
+from .sessions import SessionRegistry, SessionStats, create_session_registry
+from .stats import LocalStatsBackend, StatsBackend, create_stats_backend
+from .store import ExerciseStore, create_exercise_store
+
+# Optional persistent log of all checked answers
+ANSWER_LOG_DIR = os.getenv("ANSWER_LOG_DIR")
+# Optional queryable history of answers per session
+HISTORY_DB = os.getenv("HISTORY_DB")
+
+
+def open_answer_log() -> AnswerLog | None:
+    """Open the answer log of this process when ANSWER_LOG_DIR is set."""
+    if not ANSWER_LOG_DIR:
+        return None
+    return AnswerLog(ANSWER_LOG_DIR, max_file_size=int(os.getenv("ANSWER_LOG_MAX_FILE_SIZE", str(64 * 1024**2))))
+
+
+def open_history() -> HistoryStore | None:
+    """Open the history database when HISTORY_DB is set."""
+    if not HISTORY_DB:
+        return None
+    return HistoryStore(
+        HISTORY_DB,
+        batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("HISTORY_FLUSH_INTERVAL", "5")),
+    )
+
 
-# Global trainers for different difficulties and active exercises storage
+answer_log: AnswerLog | None = open_answer_log()
+history: HistoryStore | None = open_history()
+
+# With adaptive difficulty, exercises that users answer wrong or slowly come back more often
+ADAPTIVE_DIFFICULTY = os.getenv("ADAPTIVE_DIFFICULTY", "false").lower() in {"1", "true", "yes"}
+
+# Trainers for different difficulties only generate and check exercises,
+# statistics are kept per session and globally in the stats backend
 trainers: dict[int, MathTrainer] = {
-    1: MathTrainer(min_digits=1, max_digits=1),
-    2: MathTrainer(min_digits=2, max_digits=2),
-    3: MathTrainer(min_digits=3, max_digits=3),
+    digits: MathTrainer(min_digits=digits, max_digits=digits, answer_log=answer_log, adaptive=ADAPTIVE_DIFFICULTY)
+    for digits in (1, 2, 3)
 }
-active_exercises: dict[str, tuple] = {}  # exercise_id -> (exercise, trainer)
+exercise_store: ExerciseStore = create_exercise_store()
+stats_backend: StatsBackend = create_stats_backend()
+session_registry: SessionRegistry = create_session_registry()
+class_rollups: ClassRollups = create_class_rollups()
+# Global statistics are aggregated once per tick for all open stats streams
+stats_broadcaster = StatsBroadcaster(interval=float(os.getenv("STATS_STREAM_INTERVAL", "1")))
+# Filled by the metrics middleware and the lag monitor task, read by /metrics
+request_metrics = RequestMetrics()
+loop_monitor = EventLoopMonitor(interval=float(os.getenv("EVENT_LOOP_MONITOR_INTERVAL", "0.5")))
+
+# Opt-in stage timings and on-demand profiles; with PROFILING disabled nothing below is wrapped
+profiler: Profiler | None = create_profiler()
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+if profiler is not None:
+    for trainer in trainers.values():
+        profiler.instrument(trainer, TRAINER_STAGES, "trainer")
+    profiler.instrument(ModelResponse, ["__init__"], "ModelResponse")
+
+
+def restore_history(directory: str) -> None:
+    """Rebuild trainer and global statistics from the answer log."""
+    # The shared backend is filled once by production.py, workers must not count the history again
+    restore_global = isinstance(stats_backend, LocalStatsBackend)
+    for exercise, is_correct, time_taken in read_answer_log(directory):
+        difficulty = len(str(max(exercise.first_number, exercise.second_number)))
+        trainers[difficulty].record_answer(exercise, is_correct, time_taken)
+        if restore_global:
+            stats_backend.record(is_correct, time_taken)
+
+
+if ANSWER_LOG_DIR:
+    restore_history(ANSWER_LOG_DIR)
+
+
+def open_worker_storage() -> None:
+    """
+    Open storage of a worker forked from a process that imported this module
+
+    The writer thread of the answer log does not exist after fork, an SQLite connection
+    must not be used across fork, and a shared statistics slot belongs to one process,
+    so the worker opens its own. Statistics restored from the answer log are kept.
+    The answer log and history of the parent are left alone, closing them would write its
+    buffers twice; the shared memory mapping is only unmapped in this process.
+    """
+    global answer_log, history, stats_backend
+    answer_log = open_answer_log()
+    for trainer in trainers.values():
+        trainer.answer_log = answer_log
+    history = open_history()
+    if not isinstance(stats_backend, LocalStatsBackend):
+        stats_backend.close()
+        stats_backend = create_stats_backend()
+
+
+# Session id is taken from the header first, then from the cookie
+SESSION_HEADER = "X-Session-ID"
+SESSION_COOKIE = "nt_session"
+
+# Header with PROFILING_TOKEN, required by the profiling endpoints when the token is set
+PROFILING_TOKEN_HEADER = "X-Profiling-Token"
+
+# Upper limit for the number of exercises in one batch request
+MAX_BATCH_SIZE = 100_000
+
+# Upper limit for one prefetch window, and for ids discarded with one prefetch request
+MAX_PREFETCH = 10
+MAX_PREFETCH_DISCARD = 2 * MAX_PREFETCH
+
+# Longest message accepted on the training WebSocket
+MAX_TRAIN_MESSAGE = 32
+
+# Longest name shown on class leaderboards
+MAX_MEMBER_NAME = 40
+
+# A worker stops being ready when the event loop wakes up later than this many seconds,
+# or when the exercise store is filled beyond this share of its cap
+READY_MAX_LOOP_LAG = float(os.getenv("READY_MAX_LOOP_LAG", "0.25"))
+READY_MAX_STORE_FILL = float(os.getenv("READY_MAX_STORE_FILL", "0.9"))
+
+# Seconds without updates after which a stats stream sends a comment, so proxies keep it open
+STATS_STREAM_KEEPALIVE = 15.0
+
+# Static files are fingerprinted, read and compressed once,
+# icon fallbacks are resolved here instead of per request
+static_assets = StaticAssets(STATIC_DIR)
+service_worker_asset = static_assets.get("sw.js")
+favicon_asset = static_assets.get("icons/math_training_icon.svg")
+# Best matching icon sizes for Apple devices
+apple_touch_icon_asset = static_assets.first(
+    "icons/icon-152.png", "icons/icon-144.png", "icons/icon-192.png", "icons/math_training_icon.svg"
+)
 
 router = APIRouter()
 
 
-@router.post("/api/exercise/new", response_model=ExerciseResponse)
-async def create_exercise(request: ExerciseRequest) -> ExerciseResponse:
-    """Create a new exercise based on difficulty."""
-    if request.difficulty not in [1, 2, 3]:
+async def get_session(request: Request, response: Response) -> SessionStats:
+    """Find or start the session of the current user."""
+    requested_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    session_id, session = session_registry.get(requested_id)
+
+    if session_id != requested_id:
+        response.headers[SESSION_HEADER] = session_id
+    if session_id != request.cookies.get(SESSION_COOKIE):
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+
+    return session
+
+
+def build_stats_response(total_exercises: int, correct_answers: int, average_time: float | None) -> StatsResponse:
+    """Build statistics response from counters."""
+    accuracy = 0.0
+    if total_exercises > 0:
+        accuracy = round((correct_answers / total_exercises) * 100, 1)
+
+    return StatsResponse(
+        total_exercises=total_exercises,
+        correct_answers=correct_answers,
+        incorrect_answers=total_exercises - correct_answers,
+        accuracy=accuracy,
+        average_time=None if average_time is None else round(average_time, 3),
+    )
+
+
+def issue_exercise(difficulty: int, no_carry: bool = False, result_below: int | None = None) -> ExerciseResponse:
+    """Generate an exercise, put it into the store and format it for the client."""
+    if difficulty not in [1, 2, 3]:
         raise HTTPException(status_code=400, detail="Difficulty must be 1, 2, or 3")
 
     # Get trainer for the requested difficulty
-    trainer = trainers[request.difficulty]
-    exercise = trainer.generate_exercise()
+    trainer = trainers[difficulty]
+    try:
+        exercise = trainer.generate_exercise(no_carry=no_carry, result_below=result_below)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
 
-    exercise_id = str(uuid.uuid4())
-    active_exercises[exercise_id] = (exercise, trainer)
-
-    # Format operation symbol for display
-    op_symbols = {Operation.ADDITION: "+", Operation.SUBTRACTION: "-"}
+    exercise_id = exercise_store.add(exercise, difficulty)
 
     return ExerciseResponse(
         exercise_id=exercise_id,
-        question=f"{exercise.first_number} {op_symbols[exercise.operation]} {exercise.second_number}",
+        question=format_question(exercise),
         operation=exercise.operation.value,
     )
 
 
-@router.post("/api/exercise/check", response_model=AnswerResponse)
-async def check_answer(request: AnswerRequest) -> AnswerResponse:
-    """Check the answer for an exercise."""
-    if request.exercise_id not in active_exercises:
-        raise HTTPException(status_code=404, detail="Exercise not found")
+def format_question(exercise: Exercise) -> str:
+    """Format exercise for display."""
+    return f"{exercise.first_number} {exercise.operation.value} {exercise.second_number}"
+
 
-    exercise, trainer = active_exercises[request.exercise_id]
+def hand_out_exercises(
+    session: SessionStats, difficulty: int, count: int, no_carry: bool = False, result_below: int | None = None
+) -> list[ExerciseResponse]:
+    """Issue exercises that the session keeps in its prefetch buffer."""
+    exercises = [issue_exercise(difficulty, no_carry, result_below) for _ in range(count)]
+    session_registry.add_outstanding(session.session_id, [exercise.exercise_id for exercise in exercises])
+    return exercises
 
-    # Check answer using trainer
-    result = trainer.check_answer(exercise, request.answer, request.time_taken or 0.0)
 
-    # Clean up the exercise
-    del active_exercises[request.exercise_id]
+@router.post("/api/exercise/new", response_model=ExerciseResponse)
+async def create_exercise(request: ExerciseRequest) -> Response:
+    """Create a new exercise based on difficulty."""
+    return ModelResponse(issue_exercise(request.difficulty, request.no_carry, request.result_below))
+
+
+@router.post("/api/exercise/prefetch", response_model=PrefetchResponse)
+async def prefetch_exercises(
+    request: PrefetchRequest, response: Response, session: Annotated[SessionStats, Depends(get_session)]
+) -> Response:
+    """Hand out a window of upcoming exercises, so the client can show the next one without waiting."""
+    if not 1 <= request.count <= MAX_PREFETCH:
+        raise HTTPException(status_code=400, detail=f"Count must be from 1 to {MAX_PREFETCH}")
+
+    # Exercises the client threw away (e.g. after changing difficulty) free their place
+    for exercise_id in request.discard[:MAX_PREFETCH_DISCARD]:
+        if session_registry.settle(session.session_id, exercise_id):
+            exercise_store.pop(exercise_id)
+
+    count = min(request.count, session_registry.prefetch_room(session.session_id))
+    if count == 0:
+        raise HTTPException(status_code=429, detail="Too many unanswered exercises")
+
+    exercises = hand_out_exercises(session, request.difficulty, count, request.no_carry, request.result_below)
+    return ModelResponse(PrefetchResponse(exercises=exercises), parent=response)
+
+
+@router.post("/api/exercise/batch", response_model=BatchResponse)
+async def create_batch(request: BatchRequest) -> Response:
+    """Create a batch of exercises for worksheets and load tests."""
+    if request.difficulty not in [1, 2, 3]:
+        raise HTTPException(status_code=400, detail="Difficulty must be 1, 2, or 3")
+    if not 1 <= request.count <= MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Count must be from 1 to {MAX_BATCH_SIZE}")
+
+    batch = trainers[request.difficulty].generate_batch(request.count)
+    op_symbols = [operation.value for operation in BATCH_OPERATIONS]
+
+    # Columns come straight from typed arrays, so validating every item again is skipped
+    return ModelResponse(
+        BatchResponse.model_construct(
+            first_numbers=batch.first_numbers.tolist(),
+            second_numbers=batch.second_numbers.tolist(),
+            operations=[op_symbols[op] for op in batch.operations],
+            correct_answers=batch.correct_answers.tolist(),
+        )
+    )
+
+
+async def record_result(
+    session: SessionStats, exercise: Exercise, difficulty: int, answer: int, time_taken: float
+) -> Result:
+    """Check an answer with the trainer and count it in session, global and history statistics."""
+    result = trainers[difficulty].check_answer(exercise, answer, time_taken)
+    session.record(result.is_correct, result.time_taken)
+    stats_backend.record(result.is_correct, result.time_taken)
+    class_rollups.record(session.session_id, difficulty, exercise.operation, result.is_correct, result.time_taken)
+    if history is not None and history.record(session.session_id, difficulty, exercise, result):
+        await run_in_threadpool(history.flush)
+    return result
+
+
+async def score_answer(request: AnswerRequest, session: SessionStats) -> AnswerResponse:
+    """Check an answer and count it in all statistics."""
+    # Taking the exercise out of the store also cleans it up
+    entry = exercise_store.pop(request.exercise_id)
+    session_registry.settle(session.session_id, request.exercise_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Exercise not found")
+
+    exercise, difficulty = entry
+    result = await record_result(session, exercise, difficulty, request.answer, request.time_taken or 0.0)
 
     return AnswerResponse(
         correct=result.is_correct,
@@ -71,67 +322,443 @@ async def check_answer(request: AnswerRequest) -> AnswerResponse:
     )
 
 
+@router.post("/api/exercise/check", response_model=AnswerResponse)
+async def check_answer(
+    request: AnswerRequest, response: Response, session: Annotated[SessionStats, Depends(get_session)]
+) -> Response:
+    """Check the answer for an exercise."""
+    return ModelResponse(await score_answer(request, session), parent=response)
+
+
+@router.post("/api/exercise/answer", response_model=AnswerStepResponse)
+async def answer_exercise(
+    request: AnswerStepRequest, response: Response, session: Annotated[SessionStats, Depends(get_session)]
+) -> Response:
+    """Check the answer, hand out the next exercises and return updated statistics in one round trip."""
+    if not 0 <= request.next_count <= MAX_PREFETCH:
+        raise HTTPException(status_code=400, detail=f"Next count must be from 0 to {MAX_PREFETCH}")
+    if request.difficulty not in [1, 2, 3]:
+        raise HTTPException(status_code=400, detail="Difficulty must be 1, 2, or 3")
+
+    result = await score_answer(request, session)
+    # Next exercises count against the prefetch cap; when it is reached, fewer are returned
+    count = min(request.next_count, session_registry.prefetch_room(session.session_id))
+    exercises = hand_out_exercises(session, request.difficulty, count, request.no_carry, request.result_below)
+
+    step = AnswerStepResponse(
+        result=result,
+        exercises=exercises,
+        stats=build_stats_response(session.total_exercises, session.correct_answers, session.average_time),
+    )
+    return ModelResponse(step, parent=response)
+
+
+@router.websocket("/ws/train")
+async def train_socket(websocket: WebSocket) -> None:
+    """
+    Training over one WebSocket with a compact text protocol.
+
+    Client messages and server replies are space separated fields:
+
+    - ``n <difficulty>`` - new exercise, replied with ``e <question>``
+    - ``a <answer>`` - answer the current exercise, replied with ``r <1|0> <correct answer> <seconds>``
+    - ``s`` - session statistics, replied with ``s <total> <correct> <accuracy> <average seconds or ->``
+
+    Answer time is measured on the server from sending the exercise to receiving the answer.
+    Invalid messages are replied with ``x <reason>``. A new session id is sent as ``i <session id>``
+    after connecting and also set as cookie.
+    """
+    requested_id = websocket.headers.get(SESSION_HEADER) or websocket.cookies.get(SESSION_COOKIE)
+    session_id, session = session_registry.get(requested_id)
+    headers = []
+    if session_id != websocket.cookies.get(SESSION_COOKIE):
+        cookie = f"{SESSION_COOKIE}={session_id}; HttpOnly; Path=/; SameSite=lax"
+        headers.append((b"set-cookie", cookie.encode()))
+    await websocket.accept(headers=headers)
+    if session_id != requested_id:
+        await websocket.send_text(f"i {session_id}")
+
+    # Exercise waiting for an answer, its difficulty and the time it was sent
+    current: tuple[Exercise, int, float] | None = None
+    try:
+        while True:
+            message = await websocket.receive_text()
+            command, _, argument = message[:MAX_TRAIN_MESSAGE].partition(" ")
+            # Keep the session alive, it may also have expired while the socket was idle
+            session_id, session = session_registry.get(session_id)
+
+            if command == "n":
+                if argument not in {"1", "2", "3"}:
+                    await websocket.send_text("x difficulty must be 1, 2 or 3")
+                    continue
+                difficulty = int(argument)
+                exercise = trainers[difficulty].generate_exercise()
+                await websocket.send_text(f"e {format_question(exercise)}")
+                current = (exercise, difficulty, time.monotonic())
+            elif command == "a":
+                if current is None:
+                    await websocket.send_text("x no exercise")
+                    continue
+                try:
+                    answer = int(argument)
+                except ValueError:
+                    await websocket.send_text("x answer must be a number")
+                    continue
+                exercise, difficulty, sent = current
+                current = None
+                result = await record_result(session, exercise, difficulty, answer, time.monotonic() - sent)
+                await websocket.send_text(f"r {int(result.is_correct)} {result.correct_answer} {result.time_taken:.3f}")
+            elif command == "s":
+                stats = build_stats_response(session.total_exercises, session.correct_answers, session.average_time)
+                average_time = "-" if stats.average_time is None else f"{stats.average_time:.3f}"
+                await websocket.send_text(
+                    f"s {stats.total_exercises} {stats.correct_answers} {stats.accuracy} {average_time}"
+                )
+            else:
+                await websocket.send_text("x unknown command")
+    except WebSocketDisconnect:
+        pass
+
+
 @router.get("/api/stats", response_model=StatsResponse)
-async def get_stats() -> StatsResponse:
-    """Get current statistics."""
-    # Aggregate stats from all trainers
-    total_stats = {
-        "total_exercises": 0,
-        "correct_answers": 0,
-        "incorrect_answers": 0,
-        "accuracy": 0.0,
-    }
+async def get_stats(response: Response, session: Annotated[SessionStats, Depends(get_session)]) -> Response:
+    """Get statistics of the current session."""
+    stats = build_stats_response(session.total_exercises, session.correct_answers, session.average_time)
+    return ModelResponse(stats, parent=response)
 
-    for trainer in trainers.values():
-        trainer_stats = trainer.get_stats()
-        total_stats["total_exercises"] += trainer_stats["total_exercises"]
-        total_stats["correct_answers"] += trainer_stats["correct_answers"]
-        total_stats["incorrect_answers"] += trainer_stats["incorrect_answers"]
 
-    # Calculate overall accuracy
-    if total_stats["total_exercises"] > 0:
-        total_stats["accuracy"] = round((total_stats["correct_answers"] / total_stats["total_exercises"]) * 100, 1)
+@router.get("/api/stats/global", response_model=StatsResponse)
+async def get_global_stats() -> StatsResponse:
+    """Get statistics of all users."""
+    # Totals across all workers when the shared backend is used
+    totals = stats_backend.totals()
+    return build_stats_response(totals.total_exercises, totals.correct_answers, totals.average_time)
 
-    return StatsResponse(
-        total_exercises=int(total_stats["total_exercises"]),
-        correct_answers=int(total_stats["correct_answers"]),
-        incorrect_answers=int(total_stats["incorrect_answers"]),
-        accuracy=total_stats["accuracy"],
-        average_time=None,  # Not tracking average time across trainers for now
+
+def global_stats_payload() -> str:
+    """Aggregate global statistics as JSON, called once per broadcast tick."""
+    totals = stats_backend.totals()
+    return build_stats_response(totals.total_exercises, totals.correct_answers, totals.average_time).model_dump_json()
+
+
+async def stats_events(request: Request, session: SessionStats, interval: float) -> AsyncIterator[str]:
+    """
+    Yield server-sent events with session and global statistics until the client disconnects
+
+    Args:
+        request: Streaming request, checked for disconnects
+        session: Session whose statistics are sent
+        interval: Minimum seconds between two sends to this client
+
+    Returns:
+        ``session`` and ``global`` events, each only when its statistics changed
+    """
+    queue = stats_broadcaster.subscribe()
+    sent_session = sent_global = None
+    try:
+        while not await request.is_disconnected():
+            try:
+                global_stats = await asyncio.wait_for(queue.get(), STATS_STREAM_KEEPALIVE)
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            # Session statistics are O(1) counters, only global ones come from the broadcast
+            session_stats = build_stats_response(
+                session.total_exercises, session.correct_answers, session.average_time
+            ).model_dump_json()
+            events = []
+            if session_stats != sent_session:
+                events.append(f"event: session\ndata: {session_stats}\n\n")
+                sent_session = session_stats
+            if global_stats != sent_global:
+                events.append(f"event: global\ndata: {global_stats}\n\n")
+                sent_global = global_stats
+            if events:
+                yield "".join(events)
+                # Updates arriving meanwhile are coalesced in the queue
+                await asyncio.sleep(interval)
+    finally:
+        stats_broadcaster.unsubscribe(queue)
+
+
+@router.get("/api/stats/stream", response_model=None)
+async def stream_stats(
+    request: Request,
+    response: Response,
+    session: Annotated[SessionStats, Depends(get_session)],
+    interval: Annotated[float, Query(ge=1, le=60)] = 1.0,
+) -> StreamingResponse:
+    """Stream statistics of the current session and of all users as server-sent events."""
+    stream = StreamingResponse(
+        stats_events(request, session, max(interval, stats_broadcaster.interval)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    inherit_headers(stream, response)
+    return stream
+
+
+@router.get("/api/stats/timing", response_model=list[TimingStats])
+async def get_timing_stats() -> list[TimingStats]:
+    """Get answer time distribution per difficulty and operation."""
+    return [
+        TimingStats.model_validate({"difficulty": difficulty, "operation": operation.value, **summary})
+        for difficulty, trainer in trainers.items()
+        for (_, operation), summary in trainer.get_time_stats().items()
+    ]
+
+
+def tally_stats(tally: Tally) -> StatsResponse:
+    """Build statistics response from rollup counters."""
+    return build_stats_response(tally.total_exercises, tally.correct_answers, tally.average_time)
+
+
+async def get_class(class_id: str) -> ClassRollup:
+    """Return the rollup of the class in the URL or fail when nobody joined it."""
+    rollup = class_rollups.get(class_id)
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="Class not found")
+    return rollup
+
+
+@router.post("/api/class/{class_id}/join", response_model=ClassMemberStats)
+async def join_class(
+    class_id: str, request: ClassJoinRequest, session: Annotated[SessionStats, Depends(get_session)]
+) -> ClassMemberStats:
+    """Add the current session to a class, later answers count in its rollups."""
+    name = request.name.strip()
+    if not 1 <= len(name) <= MAX_MEMBER_NAME:
+        raise HTTPException(status_code=400, detail=f"Name must have from 1 to {MAX_MEMBER_NAME} characters")
+    try:
+        rollup = class_rollups.join(class_id, session.session_id, name)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+
+    _, tally = rollup.members[session.session_id]
+    return ClassMemberStats(name=name, **tally_stats(tally).model_dump())
+
+
+@router.get("/api/class/{class_id}/summary", response_model=ClassSummary)
+async def get_class_summary(rollup: Annotated[ClassRollup, Depends(get_class)]) -> ClassSummary:
+    """Get statistics of the class, overall and for the last 5 minutes and hour."""
+    recent = rollup.recent()
+    return ClassSummary(
+        members=len(rollup.members),
+        total=tally_stats(rollup.total),
+        last_5_minutes=tally_stats(recent["last_5_minutes"]),
+        last_hour=tally_stats(recent["last_hour"]),
     )
 
 
+@router.get("/api/class/{class_id}/leaderboard", response_model=list[ClassMemberStats])
+async def get_class_leaderboard(
+    rollup: Annotated[ClassRollup, Depends(get_class)], limit: Annotated[int, Query(ge=1, le=100)] = 10
+) -> list[ClassMemberStats]:
+    """Get class members with the most correct answers."""
+    return [ClassMemberStats(name=name, **tally_stats(tally).model_dump()) for name, tally in rollup.leaderboard(limit)]
+
+
+@router.get("/api/class/{class_id}/operations", response_model=list[OperationStats])
+async def get_class_operations(rollup: Annotated[ClassRollup, Depends(get_class)]) -> list[OperationStats]:
+    """Get accuracy and mean time of the class per difficulty and operation."""
+    return [
+        OperationStats(difficulty=difficulty, operation=operation.value, **tally_stats(tally).model_dump())
+        for (difficulty, operation), tally in sorted(
+            rollup.by_kind.items(), key=lambda item: (item[0][0], item[0][1].value)
+        )
+    ]
+
+
+async def get_history() -> HistoryStore:
+    """Return the history store or fail when it is not configured."""
+    if history is None:
+        raise HTTPException(status_code=404, detail="History is not enabled")
+    return history
+
+
+@router.get("/api/history/worst-pairs", response_model=list[HistoryPair])
+async def get_worst_pairs(
+    session: Annotated[SessionStats, Depends(get_session)],
+    store: Annotated[HistoryStore, Depends(get_history)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> list[HistoryPair]:
+    """Get exercises the current session answers worst."""
+    pairs = await run_in_threadpool(store.worst_pairs, session.session_id, limit)
+    return [HistoryPair.model_validate(pair) for pair in pairs]
+
+
+@router.get("/api/history/progress", response_model=list[ProgressBucket])
+async def get_progress(
+    session: Annotated[SessionStats, Depends(get_session)],
+    store: Annotated[HistoryStore, Depends(get_history)],
+    bucket_seconds: Annotated[int, Query(ge=60)] = 86400,
+) -> list[ProgressBucket]:
+    """Get accuracy and mean time of the current session over time."""
+    buckets = await run_in_threadpool(store.progress, session.session_id, bucket_seconds)
+    return [ProgressBucket.model_validate(bucket) for bucket in buckets]
+
+
 @router.get("/api/health")
-async def health_check() -> dict[str, str]:
+async def health_check() -> dict[str, str | dict[str, int]]:
     """Health check endpoint."""
-    return {"status": "healthy", "service": "number-trainer-web"}
+    return {
+        "status": "healthy",
+        "service": "number-trainer-web",
+        "exercise_store": exercise_store.stats(),
+        "sessions": session_registry.stats(),
+        "classes": class_rollups.stats(),
+    }
 
 
-@router.get("/sw.js", response_class=HTMLResponse)
-async def service_worker() -> HTMLResponse:
-    """Serve service worker from root for PWA requirements."""
-    from pathlib import Path
+# Storage is attached at startup and does not change, so the ready response is built once
+storage_status = {
+    "history": history is not None,
+    "answer_log": answer_log is not None,
+    "stats_backend": type(stats_backend).__name__,
+}
+READY_BODY = json.dumps({"status": "ready", "storage": storage_status}).encode()
+LIVE_BODY = b'{"status":"alive"}'
+
+
+@router.get("/api/live", response_model=None)
+async def liveness() -> Response:
+    """Liveness probe: the process serves requests."""
+    return Response(LIVE_BODY, media_type="application/json")
+
+
+@router.get("/api/ready", response_model=None)
+async def readiness() -> Response:
+    """Readiness probe: 503 when the worker is saturated and should get no new traffic."""
+    lag = loop_monitor.lag
+    fill = exercise_store.fill_ratio()
+    if lag <= READY_MAX_LOOP_LAG and fill <= READY_MAX_STORE_FILL:
+        return Response(READY_BODY, media_type="application/json")
+
+    reasons = []
+    if lag > READY_MAX_LOOP_LAG:
+        reasons.append("event loop lag")
+    if fill > READY_MAX_STORE_FILL:
+        reasons.append("exercise store full")
+    return JSONResponse(
+        {
+            "status": "unavailable",
+            "reasons": reasons,
+            "event_loop_lag": round(lag, 4),
+            "exercise_store_fill": round(fill, 3),
+            "storage": storage_status,
+        },
+        status_code=503,
+    )
 
-    sw_path = Path(__file__).parent / "static" / "sw.js"
 
-    if sw_path.exists():
-        with open(sw_path) as f:
-            return HTMLResponse(content=f.read(), media_type="application/javascript")
-    else:
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Expose metrics in the Prometheus text format."""
+    store_stats = exercise_store.stats()
+    session_stats = session_registry.stats()
+    body = "".join(
+        [
+            request_metrics.render(),
+            loop_monitor.render(),
+            render_metric(
+                "number_trainer_exercise_store_size", "gauge", "Unanswered exercises.", [({}, store_stats["size"])]
+            ),
+            render_metric(
+                "number_trainer_exercise_store_removed_total",
+                "counter",
+                "Unanswered exercises removed from the store by reason.",
+                [
+                    ({"reason": "evicted"}, store_stats["evictions"]),
+                    ({"reason": "expired"}, store_stats["expirations"]),
+                ],
+            ),
+            render_metric("number_trainer_sessions", "gauge", "Active sessions.", [({}, session_stats["size"])]),
+            render_metric(
+                "number_trainer_prefetched_exercises",
+                "gauge",
+                "Prefetched exercises not answered yet.",
+                [({}, session_stats["outstanding"])],
+            ),
+            render_metric(
+                "number_trainer_answers_total",
+                "counter",
+                "Checked answers of this worker by difficulty and result.",
+                (
+                    ({"difficulty": str(difficulty), "result": result}, trainer.stats[f"{result}_answers"])
+                    for difficulty, trainer in trainers.items()
+                    for result in ("correct", "incorrect")
+                ),
+            ),
+        ]
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def get_profiler(request: Request) -> Profiler:
+    """Return the profiler or fail when profiling is disabled or the token does not match."""
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled")
+    if PROFILING_TOKEN and not secrets.compare_digest(
+        request.headers.get(PROFILING_TOKEN_HEADER, "").encode(), PROFILING_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+    return profiler
+
+
+@router.get("/api/admin/profile/stages")
+async def get_profile_stages(
+    current_profiler: Annotated[Profiler, Depends(get_profiler)],
+) -> dict[str, dict[str, int | float]]:
+    """Get count, mean, p50, p99 and max seconds of the recently timed stages."""
+    return current_profiler.timings.summary()
+
+
+@router.get("/api/admin/profile", response_model=None)
+async def dump_profile(
+    current_profiler: Annotated[Profiler, Depends(get_profiler)],
+    seconds: Annotated[float, Query(gt=0, le=60)] = 5.0,
+    format: Annotated[str, Query(pattern="^(pstats|collapsed)$")] = "collapsed",
+) -> Response:
+    """Profile the worker for some seconds, as collapsed stacks or as a cProfile dump."""
+    try:
+        if format == "pstats":
+            data = await current_profiler.profile(seconds)
+            return Response(
+                data,
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": 'attachment; filename="profile.pstats"'},
+            )
+        stacks = await current_profiler.sample_stacks(seconds)
+    except RuntimeError as error:
+        raise HTTPException(status_code=409, detail=str(error)) from error
+    return PlainTextResponse(stacks, headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'})
+
+
+@router.get("/static/{name:path}", response_model=None)
+async def static_file(name: str, request: Request) -> Response:
+    """Serve static files from memory."""
+    asset, hashed = static_assets.lookup(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # Hashed names change with the file, so they can be cached forever
+    return asset.response(request, immutable=hashed)
+
+
+@router.get("/sw.js", response_model=None)
+async def service_worker(request: Request) -> Response:
+    """Serve service worker from root for PWA requirements."""
+    if service_worker_asset is None:
         return HTMLResponse(content="// Service worker not found", status_code=404)
+    return service_worker_asset.response(request)
 
 
 @router.get("/favicon.ico", response_model=None)
-async def favicon() -> FileResponse | HTMLResponse:
+async def favicon(request: Request) -> Response:
     """Serve favicon from root."""
-    from pathlib import Path
-
-    # Try to serve SVG as favicon, fallback to PNG
-    svg_path = Path(__file__).parent / "static" / "icons" / "math_training_icon.svg"
-    if svg_path.exists():
-        return FileResponse(str(svg_path), media_type="image/svg+xml")
-
-    return HTMLResponse(content="", status_code=404)
+    if favicon_asset is None:
+        return HTMLResponse(content="", status_code=404)
+    return favicon_asset.response(request)
 
 
 @router.get("/apple-touch-icon.png", response_model=None)
@@ -140,26 +767,15 @@ async def favicon() -> FileResponse | HTMLResponse:
 @router.get("/apple-touch-icon-120x120-precomposed.png", response_model=None)
 @router.get("/apple-touch-icon-152x152.png", response_model=None)
 @router.get("/apple-touch-icon-180x180.png", response_model=None)
-async def apple_touch_icon() -> FileResponse | HTMLResponse:
+async def apple_touch_icon(request: Request) -> Response:
     """Serve Apple touch icons."""
-    from pathlib import Path
-
-    # Try to serve the appropriate Apple touch icon
-    icons_dir = Path(__file__).parent / "static" / "icons"
+    if apple_touch_icon_asset is None:
+        return HTMLResponse(content="", status_code=404)
+    return apple_touch_icon_asset.response(request)
 
-    # Look for the best matching icon sizes for Apple devices
-    for icon_name in ["icon-152.png", "icon-144.png", "icon-192.png", "math_training_icon.svg"]:
-        icon_path = icons_dir / icon_name
-        if icon_path.exists():
-            media_type = "image/svg+xml" if icon_name.endswith(".svg") else "image/png"
-            return FileResponse(str(icon_path), media_type=media_type)
 
-    return HTMLResponse(content="", status_code=404)
-
-
-@router.get("/", response_class=HTMLResponse)
-async def read_root() -> str:
-    """Serve the main HTML page."""
+def render_index_page() -> str:
+    """Render the main HTML page."""
     return """
     <!DOCTYPE html>
     <html lang="ru">
@@ -280,3 +896,14 @@ async def read_root() -> str:
     </body>
     </html>
     """
+
+
+# The page does not change while the server runs, so it is compressed only once.
+# Links point at hashed static files, which browsers keep until the next release.
+index_page = EncodedAsset(static_assets.rewrite(render_index_page().encode()), "text/html; charset=utf-8")
+
+
+@router.get("/", response_class=HTMLResponse)
+async def read_root(request: Request) -> Response:
+    """Serve the main HTML page."""
+    return index_page.response(request)
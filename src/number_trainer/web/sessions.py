@@ -0,0 +1,218 @@
+"""Per-user session state for the web interface."""
+
+import asyncio
+import os
+import re
+import secrets
+import time
+from collections import OrderedDict
+
+# Accepted format of session ids sent by clients
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+
+class SessionStats:
+    """Compact statistics of one session."""
+
+    __slots__ = ("session_id", "total_exercises", "correct_answers", "timed_answers", "total_time", "last_seen")
+
+    def __init__(self, session_id: str, now: float) -> None:
+        self.session_id = session_id
+        self.total_exercises = 0
+        self.correct_answers = 0
+        self.timed_answers = 0
+        self.total_time = 0.0
+        self.last_seen = now
+
+    def record(self, is_correct: bool, time_taken: float = 0.0) -> None:
+        """Count one checked answer, unknown time is passed as 0.0."""
+        self.total_exercises += 1
+        if is_correct:
+            self.correct_answers += 1
+        if time_taken > 0:
+            self.timed_answers += 1
+            self.total_time += time_taken
+
+    @property
+    def average_time(self) -> float | None:
+        """Mean answer time, None when no time was reported."""
+        if self.timed_answers == 0:
+            return None
+        return self.total_time / self.timed_answers
+
+
+class SessionRegistry:
+    """
+    Sessions by id with a size cap and idle timeout.
+
+    Sessions are kept in order of last use, so lookup, LRU eviction
+    and removal of idle sessions are O(1) per session.
+
+    The registry also tracks prefetched exercises that a session has not answered yet,
+    so one client cannot pile up unlimited exercises in the store.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 100_000,
+        idle_timeout: float = 3600.0,
+        sweep_interval: float = 60.0,
+        max_outstanding: int = 20,
+        outstanding_ttl: float = 1800.0,
+    ) -> None:
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be positive")
+        if idle_timeout <= 0:
+            raise ValueError("idle_timeout must be positive")
+        if sweep_interval <= 0:
+            raise ValueError("sweep_interval must be positive")
+        if max_outstanding < 1:
+            raise ValueError("max_outstanding must be positive")
+        if outstanding_ttl <= 0:
+            raise ValueError("outstanding_ttl must be positive")
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self.max_outstanding = max_outstanding
+        self.outstanding_ttl = outstanding_ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._sessions: OrderedDict[str, SessionStats] = OrderedDict()
+        # Only sessions that prefetch have an entry: exercise id -> time it was handed out
+        self._outstanding: dict[str, dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str | None) -> tuple[str, SessionStats]:
+        """
+        Return session with given id, creating it if needed
+
+        Args:
+            session_id: Id sent by the client, None or malformed ids get a new id
+
+        Returns:
+            Session id and its statistics
+        """
+        now = time.monotonic()
+        if session_id is None or not SESSION_ID_PATTERN.fullmatch(session_id):
+            session_id = secrets.token_urlsafe(16)
+
+        session = self._sessions.get(session_id)
+        if session is not None and now - session.last_seen < self.idle_timeout:
+            session.last_seen = now
+            self._sessions.move_to_end(session_id)
+            return session_id, session
+
+        if session is not None:
+            del self._sessions[session_id]
+            self._outstanding.pop(session_id, None)
+            self.expirations += 1
+
+        session = SessionStats(session_id, now)
+        self._sessions[session_id] = session
+        if len(self._sessions) > self.max_sessions:
+            evicted_id, _ = self._sessions.popitem(last=False)
+            self._outstanding.pop(evicted_id, None)
+            self.evictions += 1
+
+        return session_id, session
+
+    def sweep(self) -> int:
+        """Remove idle sessions and return how many were removed."""
+        deadline = time.monotonic() - self.idle_timeout
+        removed = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_seen > deadline:
+                break
+            removed_id, _ = self._sessions.popitem(last=False)
+            self._outstanding.pop(removed_id, None)
+            removed += 1
+
+        self.expirations += removed
+        return removed
+
+    def prefetch_room(self, session_id: str) -> int:
+        """
+        Return how many more exercises the session may prefetch
+
+        Exercises handed out longer ago than outstanding_ttl have expired in the store
+        and no longer count.
+
+        Args:
+            session_id: Id of a session returned by get()
+
+        Returns:
+            Number of exercises that can be handed out now
+        """
+        outstanding = self._outstanding.get(session_id)
+        if not outstanding:
+            return self.max_outstanding
+
+        deadline = time.monotonic() - self.outstanding_ttl
+        # Ids are kept in the order they were handed out, so expired ones come first
+        while outstanding:
+            exercise_id, issued = next(iter(outstanding.items()))
+            if issued > deadline:
+                break
+            del outstanding[exercise_id]
+        return max(0, self.max_outstanding - len(outstanding))
+
+    def add_outstanding(self, session_id: str, exercise_ids: list[str]) -> None:
+        """
+        Remember prefetched exercises of the session
+
+        Args:
+            session_id: Id of a session returned by get()
+            exercise_ids: Ids of the handed out exercises
+        """
+        now = time.monotonic()
+        outstanding = self._outstanding.setdefault(session_id, {})
+        for exercise_id in exercise_ids:
+            outstanding[exercise_id] = now
+
+    def settle(self, session_id: str, exercise_id: str) -> bool:
+        """
+        Forget an exercise that was answered or discarded
+
+        Args:
+            session_id: Id of a session returned by get()
+            exercise_id: Id of the exercise
+
+        Returns:
+            Whether the exercise was prefetched by this session
+        """
+        outstanding = self._outstanding.get(session_id)
+        if outstanding is None or outstanding.pop(exercise_id, None) is None:
+            return False
+        if not outstanding:
+            del self._outstanding[session_id]
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """Registry counters."""
+        return {
+            "size": len(self),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "outstanding": sum(map(len, self._outstanding.values())),
+        }
+
+    async def run_sweeper(self) -> None:
+        """Periodically remove idle sessions. Runs until cancelled."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+
+def create_session_registry() -> SessionRegistry:
+    """Create session registry configured from environment variables."""
+    return SessionRegistry(
+        max_sessions=int(os.getenv("SESSION_MAX_COUNT", "100000")),
+        idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "3600")),
+        sweep_interval=float(os.getenv("SESSION_SWEEP_INTERVAL", "60")),
+        max_outstanding=int(os.getenv("SESSION_MAX_OUTSTANDING", "20")),
+        # Prefetched exercises stop counting once the store has dropped them
+        outstanding_ttl=float(os.getenv("EXERCISE_TTL", "1800")),
+    )
@@ -1,10 +1,19 @@
 // Number Trainer Web Application JavaScript
 // Handles UI interactions and API communication
 
+// Upcoming exercises are prefetched, so the next question is shown without a round trip
+const PREFETCH_WINDOW = 5;
+const PREFETCH_REFILL_AT = 2;
+// Prefetched exercises expire on the server after 30 minutes, older ones are dropped locally
+const PREFETCH_MAX_AGE_MS = 20 * 60 * 1000;
+
 class NumberTrainerApp {
     constructor() {
         this.currentExercise = null;
         this.currentDifficulty = 1;
+        this.prefetched = [];
+        this.discarded = [];
+        this.refill = null;
         this.startTime = null;
         this.isMobile = this.detectMobile();
         this.userTriggeredAction = false;
@@ -14,7 +23,7 @@ class NumberTrainerApp {
     init() {
         this.setupEventListeners();
         this.setupMobileEnhancements();
-        this.updateStats();
+        this.subscribeStats();
         this.showWelcome();
     }
 
@@ -220,28 +229,97 @@ class NumberTrainerApp {
     }
 
     async startTraining(difficulty) {
+        if (difficulty !== this.currentDifficulty) {
+            // Prefetched exercises of the old difficulty are given back with the next request
+            this.discarded.push(...this.prefetched.map(entry => entry.exercise.exercise_id));
+            this.prefetched = [];
+        }
         this.currentDifficulty = difficulty;
         this.userTriggeredAction = true; // Mark as user-triggered action
         await this.generateNewExercise();
     }
 
-    async generateNewExercise() {
-        try {
-            const response = await fetch('/api/exercise/new', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    difficulty: this.currentDifficulty
-                })
+    async prefetchExercises() {
+        const difficulty = this.currentDifficulty;
+        const discard = this.discarded;
+        this.discarded = [];
+
+        const response = await fetch('/api/exercise/prefetch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                difficulty: difficulty,
+                count: PREFETCH_WINDOW - this.prefetched.length,
+                discard: discard
+            })
+        });
+
+        if (!response.ok) {
+            // 429: too many unanswered exercises, the buffer is used up first
+            return;
+        }
+
+        const data = await response.json();
+        if (difficulty !== this.currentDifficulty) {
+            this.discarded.push(...data.exercises.map(exercise => exercise.exercise_id));
+            return;
+        }
+        const fetchedAt = Date.now();
+        this.prefetched.push(...data.exercises.map(exercise => ({ exercise, fetchedAt })));
+    }
+
+    refillInBackground() {
+        if (this.refill || this.prefetched.length > PREFETCH_REFILL_AT) return;
+
+        this.refill = this.prefetchExercises()
+            .catch(error => console.error('Error prefetching exercises:', error))
+            .finally(() => {
+                this.refill = null;
             });
+    }
 
-            if (!response.ok) {
-                throw new Error('Failed to generate exercise');
+    takePrefetched() {
+        const oldest = Date.now() - PREFETCH_MAX_AGE_MS;
+        while (this.prefetched.length > 0) {
+            const entry = this.prefetched.shift();
+            if (entry.fetchedAt > oldest) {
+                return entry.exercise;
             }
+        }
+        return null;
+    }
 
-            this.currentExercise = await response.json();
+    async fetchSingleExercise() {
+        const response = await fetch('/api/exercise/new', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                difficulty: this.currentDifficulty
+            })
+        });
+
+        if (!response.ok) {
+            throw new Error('Failed to generate exercise');
+        }
+
+        return response.json();
+    }
+
+    async generateNewExercise() {
+        try {
+            let exercise = this.takePrefetched();
+            if (!exercise) {
+                // Empty buffer: wait for a running refill or request a new window
+                await (this.refill || this.prefetchExercises().catch(() => null));
+                exercise = this.takePrefetched() || await this.fetchSingleExercise();
+            }
+            this.refillInBackground();
+
+            this.currentExercise = exercise;
             this.startTime = Date.now();
 
             // Display the exercise
@@ -270,7 +348,8 @@ class NumberTrainerApp {
         const timeTaken = this.startTime ? (Date.now() - this.startTime) / 1000 : null;
 
         try {
-            const response = await fetch('/api/exercise/check', {
+            // One request checks the answer, tops up the prefetch buffer and returns statistics
+            const response = await fetch('/api/exercise/answer', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -278,7 +357,9 @@ class NumberTrainerApp {
                 body: JSON.stringify({
                     exercise_id: this.currentExercise.exercise_id,
                     answer: answer,
-                    time_taken: timeTaken
+                    time_taken: timeTaken,
+                    difficulty: this.currentDifficulty,
+                    next_count: this.refill ? 0 : Math.max(0, PREFETCH_WINDOW - this.prefetched.length)
                 })
             });
 
@@ -286,9 +367,11 @@ class NumberTrainerApp {
                 throw new Error('Failed to check answer');
             }
 
-            const result = await response.json();
-            this.showResult(result);
-            await this.updateStats();
+            const data = await response.json();
+            const fetchedAt = Date.now();
+            this.prefetched.push(...data.exercises.map(exercise => ({ exercise, fetchedAt })));
+            this.showResult(data.result);
+            this.renderStats(data.stats);
         } catch (error) {
             console.error('Error checking answer:', error);
             alert('Error checking answer. Please try again.');
@@ -316,21 +399,35 @@ class NumberTrainerApp {
         await this.generateNewExercise();
     }
 
+    subscribeStats() {
+        if (!window.EventSource) {
+            this.updateStats();
+            return;
+        }
+        // The server pushes statistics whenever they change, e.g. after answers in another tab
+        this.statsStream = new EventSource('/api/stats/stream');
+        this.statsStream.addEventListener('session', event => {
+            this.renderStats(JSON.parse(event.data));
+        });
+    }
+
     async updateStats() {
         try {
             const response = await fetch('/api/stats');
             if (!response.ok) return;
 
-            const stats = await response.json();
-
-            document.getElementById('stats-total').textContent = stats.total_exercises;
-            document.getElementById('stats-correct').textContent = stats.correct_answers;
-            document.getElementById('stats-incorrect').textContent = stats.incorrect_answers;
-            document.getElementById('stats-accuracy').textContent = `${stats.accuracy.toFixed(1)}%`;
+            this.renderStats(await response.json());
         } catch (error) {
             console.error('Error updating stats:', error);
         }
     }
+
+    renderStats(stats) {
+        document.getElementById('stats-total').textContent = stats.total_exercises;
+        document.getElementById('stats-correct').textContent = stats.correct_answers;
+        document.getElementById('stats-incorrect').textContent = stats.incorrect_answers;
+        document.getElementById('stats-accuracy').textContent = `${stats.accuracy.toFixed(1)}%`;
+    }
 }
 
 // Global functions for HTML onclick handlers
@@ -1,8 +1,11 @@
 // Service Worker for Number Trainer PWA
 // Provides caching strategies for offline functionality
 
+// Replaced by the server with a hash of all asset names, so every release gets a fresh cache
+const ASSET_VERSION = 'development';
+
 const CACHE_NAME = 'number-trainer-v1.0.0';
-const STATIC_CACHE_NAME = 'number-trainer-static-v1.0.0';
+const STATIC_CACHE_NAME = `number-trainer-static-${ASSET_VERSION}`;
 const API_CACHE_NAME = 'number-trainer-api-v1.0.0';
 
 // Files to cache immediately when SW installs
@@ -96,6 +99,11 @@ self.addEventListener('fetch', event => {
     return;
   }
 
+  // Event streams never end, so they must not be cached
+  if (request.headers.get('Accept') === 'text/event-stream') {
+    return;
+  }
+
   // Choose caching strategy based on request type
   if (url.pathname.startsWith('/api/')) {
     // API requests: Network First with cache fallback
@@ -0,0 +1,162 @@
+"""Statistics backends shared by the web routes."""
+
+import fcntl
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import NamedTuple, cast
+
+# Slot layout in the shared block (all int64):
+# owner pid, total exercises, correct answers, answers with time, sum of times in microseconds
+SLOT_FIELDS = 5
+MAX_SLOTS = 256
+SHARED_BLOCK_SIZE = MAX_SLOTS * SLOT_FIELDS * 8
+
+_PID, _TOTAL, _CORRECT, _TIMED, _TIME_US = range(SLOT_FIELDS)
+
+
+class StatsTotals(NamedTuple):
+    """Global answer counters."""
+
+    total_exercises: int
+    correct_answers: int
+    timed_answers: int
+    total_time: float
+
+    @property
+    def average_time(self) -> float | None:
+        """Mean answer time, None when no time was reported."""
+        if self.timed_answers == 0:
+            return None
+        return self.total_time / self.timed_answers
+
+
+class StatsBackend(ABC):
+    """Base class for global answer counters."""
+
+    @abstractmethod
+    def record(self, is_correct: bool, time_taken: float = 0.0) -> None:
+        """Count one checked answer, unknown time is passed as 0.0."""
+
+    @abstractmethod
+    def totals(self) -> StatsTotals:
+        """Return counters of all answers."""
+
+    def close(self) -> None:
+        """Release resources held by the backend."""
+        return None
+
+
+class LocalStatsBackend(StatsBackend):
+    """Counters of the current process only."""
+
+    def __init__(self) -> None:
+        self.total_exercises = 0
+        self.correct_answers = 0
+        self.timed_answers = 0
+        self.total_time = 0.0
+
+    def record(self, is_correct: bool, time_taken: float = 0.0) -> None:
+        self.total_exercises += 1
+        if is_correct:
+            self.correct_answers += 1
+        if time_taken > 0:
+            self.timed_answers += 1
+            self.total_time += time_taken
+
+    def totals(self) -> StatsTotals:
+        return StatsTotals(self.total_exercises, self.correct_answers, self.timed_answers, self.total_time)
+
+
+class SharedMemoryStatsBackend(StatsBackend):
+    """
+    Counters in a shared memory block that all workers attach to.
+
+    Every worker claims its own slot and is the only writer of it, so recording needs no locks.
+    Reading sums all slots, which costs the same no matter how many answers were recorded.
+    Counters of a finished worker stay in its slot and are taken over by the next worker that claims it.
+    """
+
+    def __init__(self, name: str | None = None) -> None:
+        if name is None:
+            self._shm = SharedMemory(create=True, size=SHARED_BLOCK_SIZE)
+            self._owner = True
+        else:
+            # The block belongs to the process that created it, so it must not be unlinked when this worker exits
+            self._shm = SharedMemory(name=name, track=False)
+            self._owner = False
+
+        self._counters = cast(memoryview, self._shm.buf).cast("q")
+        try:
+            self._slot = self._claim_slot() * SLOT_FIELDS
+        except RuntimeError:
+            self.close()
+            raise
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _claim_slot(self) -> int:
+        """Take a free slot or a slot of a dead worker."""
+        lock_path = Path(tempfile.gettempdir()) / f"number-trainer-{self._shm.name.lstrip('/')}.lock"
+        with open(lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            for slot in range(MAX_SLOTS):
+                pid = self._counters[slot * SLOT_FIELDS + _PID]
+                if pid == 0 or not _process_alive(pid):
+                    self._counters[slot * SLOT_FIELDS + _PID] = os.getpid()
+                    return slot
+
+        raise RuntimeError(f"All {MAX_SLOTS} statistics slots are in use")
+
+    def record(self, is_correct: bool, time_taken: float = 0.0) -> None:
+        counters, slot = self._counters, self._slot
+        counters[slot + _TOTAL] += 1
+        if is_correct:
+            counters[slot + _CORRECT] += 1
+        if time_taken > 0:
+            counters[slot + _TIMED] += 1
+            counters[slot + _TIME_US] += round(time_taken * 1_000_000)
+
+    def totals(self) -> StatsTotals:
+        counters = self._counters
+        return StatsTotals(
+            sum(counters[_TOTAL::SLOT_FIELDS]),
+            sum(counters[_CORRECT::SLOT_FIELDS]),
+            sum(counters[_TIMED::SLOT_FIELDS]),
+            sum(counters[_TIME_US::SLOT_FIELDS]) / 1_000_000,
+        )
+
+    def close(self) -> None:
+        self._counters.release()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _process_alive(pid: int) -> bool:
+    """Check whether process with given pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def create_shared_stats_block() -> SharedMemory:
+    """Create zeroed shared memory block for SharedMemoryStatsBackend. The caller must unlink it."""
+    shm = SharedMemory(create=True, size=SHARED_BLOCK_SIZE)
+    cast(memoryview, shm.buf)[:SHARED_BLOCK_SIZE] = bytes(SHARED_BLOCK_SIZE)
+    return shm
+
+
+def create_stats_backend() -> StatsBackend:
+    """Create statistics backend configured from environment variables."""
+    if os.getenv("STATS_BACKEND", "local") == "shared":
+        return SharedMemoryStatsBackend(os.getenv("STATS_SHM_NAME"))
+    return LocalStatsBackend()
@@ -0,0 +1,205 @@
+"""Storage for exercises waiting for an answer."""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import secrets
+import struct
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from ..core.models import BATCH_OPERATIONS, Exercise, Operation
+
+
+class ExerciseStore(ABC):
+    """Base class for exercise stores used by the web routes."""
+
+    # Seconds between background sweeps, None for stores that never need sweeping
+    sweep_interval: float | None = None
+
+    def __init__(self) -> None:
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    def add(self, exercise: Exercise, difficulty: int) -> str:
+        """Store exercise and return its id."""
+
+    @abstractmethod
+    def pop(self, exercise_id: str) -> tuple[Exercise, int] | None:
+        """Remove exercise and return it with its difficulty, or None if it is unknown or expired."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored exercises."""
+
+    def sweep(self) -> int:
+        """Remove expired exercises and return how many were removed."""
+        return 0
+
+    def fill_ratio(self) -> float:
+        """Share of the capacity in use, 0.0 for stores without a cap."""
+        return 0.0
+
+    def stats(self) -> dict[str, int]:
+        """Store counters."""
+        return {
+            "size": len(self),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    async def run_sweeper(self) -> None:
+        """Periodically remove expired exercises. Runs until cancelled."""
+        if self.sweep_interval is None:
+            return
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+
+class TTLExerciseStore(ExerciseStore):
+    """
+    In-memory store with a size cap and per-entry time to live.
+
+    Entries are kept in insertion order, which is also expiry order,
+    so both LRU eviction and sweeping remove entries from the front in O(1) each.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 1800.0, sweep_interval: float = 60.0) -> None:
+        super().__init__()
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if sweep_interval <= 0:
+            raise ValueError("sweep_interval must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._entries: OrderedDict[str, tuple[float, Exercise, int]] = OrderedDict()
+
+    def add(self, exercise: Exercise, difficulty: int) -> str:
+        exercise_id = str(uuid.uuid4())
+        self._entries[exercise_id] = (time.monotonic() + self.ttl, exercise, difficulty)
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return exercise_id
+
+    def pop(self, exercise_id: str) -> tuple[Exercise, int] | None:
+        entry = self._entries.pop(exercise_id, None)
+        if entry is None:
+            return None
+
+        expires_at, exercise, difficulty = entry
+        if expires_at <= time.monotonic():
+            self.expirations += 1
+            return None
+
+        return exercise, difficulty
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fill_ratio(self) -> float:
+        # Once full, every new exercise evicts an unanswered one
+        return len(self._entries) / self.max_size
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        removed = 0
+        while self._entries:
+            expires_at, _, _ = next(iter(self._entries.values()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+            removed += 1
+
+        self.expirations += removed
+        return removed
+
+
+class SignedTokenStore(ExerciseStore):
+    """
+    Stateless store that keeps nothing on the server.
+
+    The exercise id is a token with the operands, operation, difficulty and expiry,
+    signed with HMAC-SHA256. Any worker that shares the secret can check the answer.
+    Unlike TTLExerciseStore, a token stays valid until it expires and can be checked more than once.
+    """
+
+    # first number, second number, operation index, difficulty, expiry (unix seconds)
+    _PAYLOAD = struct.Struct(">HHBBI")
+    _SIGNATURE_SIZE = 16
+
+    def __init__(self, secret: bytes, ttl: float = 1800.0) -> None:
+        super().__init__()
+        if not secret:
+            raise ValueError("secret must not be empty")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.ttl = ttl
+        self._secret = secret
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()[: self._SIGNATURE_SIZE]
+
+    def add(self, exercise: Exercise, difficulty: int) -> str:
+        payload = self._PAYLOAD.pack(
+            exercise.first_number,
+            exercise.second_number,
+            BATCH_OPERATIONS.index(exercise.operation),
+            difficulty,
+            int(time.time() + self.ttl),
+        )
+        return base64.urlsafe_b64encode(payload + self._sign(payload)).decode("ascii").rstrip("=")
+
+    def pop(self, exercise_id: str) -> tuple[Exercise, int] | None:
+        try:
+            token = base64.urlsafe_b64decode(exercise_id + "=" * (-len(exercise_id) % 4))
+        except (binascii.Error, ValueError):
+            return None
+        if len(token) != self._PAYLOAD.size + self._SIGNATURE_SIZE:
+            return None
+
+        payload, signature = token[: self._PAYLOAD.size], token[self._PAYLOAD.size :]
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+
+        first_number, second_number, operation_index, difficulty, expires_at = self._PAYLOAD.unpack(payload)
+        if expires_at <= time.time():
+            self.expirations += 1
+            return None
+
+        operation = BATCH_OPERATIONS[operation_index]
+        if operation == Operation.ADDITION:
+            correct_answer = first_number + second_number
+        else:  # SUBTRACTION
+            correct_answer = first_number - second_number
+
+        exercise = Exercise(first_number, second_number, operation, correct_answer)
+        return exercise, difficulty
+
+    def __len__(self) -> int:
+        return 0
+
+
+def create_exercise_store() -> ExerciseStore:
+    """Create exercise store configured from environment variables."""
+    if os.getenv("EXERCISE_STORE", "memory") == "signed":
+        secret = os.getenv("EXERCISE_SECRET") or secrets.token_hex(32)
+        return SignedTokenStore(secret=secret.encode(), ttl=float(os.getenv("EXERCISE_TTL", "1800")))
+
+    return TTLExerciseStore(
+        max_size=int(os.getenv("EXERCISE_STORE_MAX_SIZE", "10000")),
+        ttl=float(os.getenv("EXERCISE_TTL", "1800")),
+        sweep_interval=float(os.getenv("EXERCISE_SWEEP_INTERVAL", "60")),
+    )
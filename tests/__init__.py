@@ -5,4 +5,5 @@ Structure:
 - test_core: tests for business logic
 - test_gui: tests for GUI components
 - test_web: tests for web interface
+- test_storage: tests for answer history storage
 """
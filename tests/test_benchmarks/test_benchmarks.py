@@ -0,0 +1,93 @@
+"""Tests for the benchmark drivers and reports."""
+
+import asyncio
+import json
+import os
+
+from benchmarks import inprocess, loadgen, startup
+from benchmarks.report import build_report, percentile, pss_bytes, rss_bytes, write_report
+from benchmarks.scenario import Recorder, solve
+
+
+def test_percentile():
+    """Test percentiles of latencies."""
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.5
+    assert 99.0 <= percentile(values, 99) <= 100.0
+    assert percentile([], 50) == 0.0
+    assert percentile([3.0], 99) == 3.0
+
+
+def test_build_report(tmp_path):
+    """Test throughput, latency and memory numbers of a report."""
+    recorder = Recorder()
+    recorder.latencies["stats"].extend([0.001, 0.003])
+    recorder.errors["stats"] = 1
+    other = Recorder()
+    other.latencies["stats"].append(0.002)
+    other.exercises = 4
+    recorder.merge(other)
+
+    report = build_report("inprocess", {"sessions": 1}, recorder, 2.0, 100, 150)
+    assert report["exercises_per_second"] == 2.0
+    assert report["requests_per_second"] == 1.5
+    assert report["rss_growth_bytes"] == 50
+    assert report["endpoints"]["stats"] == {"requests": 3, "errors": 1, "p50_ms": 2.0, "p99_ms": 2.98}
+
+    path = tmp_path / "report.json"
+    write_report(report, path)
+    assert json.loads(path.read_text()) == report
+
+
+def test_solve():
+    """Test answers of the replayed sessions."""
+    assert solve("12 + 5") == 17
+    assert solve("12 - 5") == 7
+
+
+def test_rss():
+    """Test memory measurement of the current process."""
+    assert rss_bytes() > 0
+    assert loadgen.server_rss(None) == 0
+    assert loadgen.server_rss(os.getpid()) >= rss_bytes()
+
+
+def test_pss():
+    """Test proportional memory measurement, which shares pages with other processes."""
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        assert pss_bytes(os.getpid()) == 0
+        return
+    assert 0 < pss_bytes(os.getpid()) <= rss_bytes()
+    assert loadgen.server_pss(os.getpid()) >= pss_bytes(os.getpid())
+
+
+def test_inprocess_driver():
+    """Test that the in-process driver replays sessions without errors."""
+    report = asyncio.run(inprocess.run(sessions=2, exercises=3))
+
+    assert report["exercises"] == 6
+    assert set(report["endpoints"]) == {"exercise/new", "exercise/check", "stats"}
+    assert all(summary["errors"] == 0 for summary in report["endpoints"].values())
+    assert all(summary["requests"] == 6 for summary in report["endpoints"].values())
+
+
+def test_parse_importtime():
+    """Test reading cumulative time and modules from -X importtime output."""
+    output = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   json.decoder",
+            "import time:       300 |        420 | json",
+            "import time:        50 |       2500 | entry",
+        ]
+    )
+    assert startup.parse_importtime(output, "entry") == (2.5, ["json.decoder", "json", "entry"])
+    assert startup.parse_importtime(output, "json.decoder")[0] == 0.0
+
+
+def test_startup_entry_points_do_not_import_unrelated_modules():
+    """Test the import checks of the console and GUI entry points."""
+    for name in ("main", "cli.console"):
+        result = startup.measure(startup.ENTRY_POINTS[name], repeats=1)
+        assert result["median_ms"] > 0
+        assert result["forbidden_imported"] == []
@@ -0,0 +1,131 @@
+"""
+Tests for adaptive choice of exercises.
+"""
+
+import random
+from array import array
+from collections import Counter
+from itertools import accumulate
+
+from src.number_trainer.core.adaptive import MAX_BOOST, MIN_BOOST, AdaptiveSampler, FenwickTree
+from src.number_trainer.core.models import Exercise, Operation
+from src.number_trainer.core.operand_index import OperandIndex
+from src.number_trainer.core.trainer import MathTrainer
+
+
+class TestFenwickTree:
+    """Tests for FenwickTree class"""
+
+    def test_find_matches_linear_search(self):
+        """Test search against running sums"""
+        weights = array("d", [random.choice([0.0, 0.5, 1.0, 3.0]) for _ in range(100)])
+        weights[0] = 1.0
+        tree = FenwickTree(weights)
+
+        assert tree.total() == sum(weights)
+        for value in (0.0, 0.3, 10.0, 42.5, sum(weights) - 0.01):
+            expected = next(position for position, running in enumerate(accumulate(weights)) if running > value)
+            assert tree.find(value) == expected
+
+    def test_add_changes_weight(self):
+        """Test that updated weights are used for search"""
+        tree = FenwickTree(array("d", [1.0, 1.0, 1.0, 1.0]))
+        tree.add(2, 5.0)
+
+        assert tree.total() == 9.0
+        assert tree.find(1.5) == 1
+        assert tree.find(2.0) == 2
+        assert tree.find(7.5) == 2
+        assert tree.find(8.5) == 3
+
+
+class TestAdaptiveSampler:
+    """Tests for AdaptiveSampler class"""
+
+    def test_initial_operations_are_balanced(self):
+        """Test that both operations are drawn equally often at the start"""
+        sampler = AdaptiveSampler(1, 1)
+        counts = Counter(sampler.sample()[0] for _ in range(4000))
+
+        assert 1700 < counts[Operation.ADDITION] < 2300
+
+    def test_mistakes_raise_weight(self):
+        """Test that a pair answered wrong comes back more often"""
+        sampler = AdaptiveSampler(1, 1)
+        hard = Exercise(7, 8, Operation.ADDITION, 15)
+        for _ in range(5):
+            sampler.update(hard, is_correct=False)
+
+        assert sampler.boost(hard) == MAX_BOOST
+        draws = Counter(sampler.sample() for _ in range(2000))
+        # 64 times the weight of one of 81 addition pairs is about 44% of additions
+        assert draws[(Operation.ADDITION, 7, 8)] > 300
+
+    def test_correct_answers_lower_weight(self):
+        """Test that weight goes down after correct answers but stays above the minimum"""
+        sampler = AdaptiveSampler(1, 1)
+        easy = Exercise(5, 2, Operation.SUBTRACTION, 3)
+        for _ in range(10):
+            sampler.update(easy, is_correct=True)
+
+        assert sampler.boost(easy) == MIN_BOOST
+
+    def test_slow_answers_raise_weight(self):
+        """Test that slow correct answers lower the weight less"""
+        sampler = AdaptiveSampler(1, 1)
+        for _ in range(30):
+            sampler.update(Exercise(1, 1, Operation.ADDITION, 2), is_correct=True, time_taken=1.0)
+
+        slow = Exercise(9, 9, Operation.ADDITION, 18)
+        sampler.update(slow, is_correct=True, time_taken=20.0)
+        assert sampler.boost(slow) == 0.75
+
+    def test_exercise_from_other_difficulty_is_ignored(self):
+        """Test that pairs outside the operand space do not change weights"""
+        sampler = AdaptiveSampler(1, 1)
+        sampler.update(Exercise(50, 8, Operation.SUBTRACTION, 42), is_correct=False)
+
+        assert sampler.boost(Exercise(50, 8, Operation.SUBTRACTION, 42)) == 1.0
+
+
+class TestAdaptiveTrainer:
+    """Tests for adaptive mode of MathTrainer"""
+
+    def test_adaptive_trainer_uses_sampler(self):
+        """Test that answers of an adaptive trainer change its weights"""
+        trainer = MathTrainer(min_digits=1, max_digits=1, adaptive=True)
+        exercise = trainer.generate_exercise()
+        trainer.check_answer(exercise, exercise.correct_answer + 1)
+
+        assert trainer.sampler is not None
+        assert trainer.sampler.boost(exercise) > 1.0
+
+    def test_constraints_bypass_sampler(self):
+        """Test that constrained exercises still match the constraints"""
+        trainer = MathTrainer(min_digits=2, max_digits=2, adaptive=True)
+        for _ in range(20):
+            assert trainer.generate_exercise(result_below=30).correct_answer < 30
+
+    def test_set_adaptive(self):
+        """Test turning adaptive mode on and off"""
+        trainer = MathTrainer(min_digits=1, max_digits=1)
+        assert trainer.sampler is None
+
+        trainer.set_adaptive(True)
+        assert isinstance(trainer.sampler, AdaptiveSampler)
+
+        trainer.set_difficulty(2, 2)
+        assert len(trainer.sampler.indexes[0]) == 8100
+
+        trainer.set_adaptive(False)
+        assert trainer.sampler is None
+
+
+def test_position_of_pairs():
+    """Test that every pair is found at its position"""
+    for operation in Operation:
+        index = OperandIndex.build(1, 2, operation)
+        for position in range(0, len(index), 37):
+            assert index.position(index.firsts[position], index.seconds[position]) == position
+
+        assert index.position(3, 5 if operation == Operation.SUBTRACTION else 500) is None
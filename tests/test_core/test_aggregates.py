@@ -0,0 +1,80 @@
+"""
+Tests for streaming aggregates.
+"""
+
+import random
+import statistics
+import sys
+
+import pytest
+
+from src.number_trainer.core.aggregates import TimeAggregate
+
+
+class TestTimeAggregate:
+    """Tests for TimeAggregate class"""
+
+    def test_empty(self):
+        """Test aggregate without values"""
+        times = TimeAggregate()
+        assert times.count == 0
+        assert times.mean == 0.0
+        assert times.variance == 0.0
+        assert times.quantile(0.5) == 0.0
+
+    def test_mean_and_variance(self):
+        """Test Welford mean and variance against statistics module"""
+        values = [random.uniform(0.5, 30.0) for _ in range(1000)]
+        times = TimeAggregate()
+        for value in values:
+            times.add(value)
+
+        assert times.count == 1000
+        assert times.total == pytest.approx(sum(values))
+        assert times.mean == pytest.approx(statistics.mean(values))
+        assert times.variance == pytest.approx(statistics.variance(values))
+
+    def test_quantiles_within_bucket_error(self):
+        """Test that quantiles are accurate to the bucket width"""
+        values = sorted(random.uniform(0.5, 30.0) for _ in range(2000))
+        times = TimeAggregate()
+        for value in values:
+            times.add(value)
+
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * len(values)) - 1]
+            assert exact * 0.9 <= times.quantile(q) <= exact * 1.11
+
+    def test_values_outside_range(self):
+        """Test very small and very large values"""
+        times = TimeAggregate()
+        times.add(0.001)
+        times.add(100_000.0)
+
+        assert times.quantile(0.0) == pytest.approx(0.1)
+        assert times.quantile(1.0) >= 600
+
+    def test_invalid_quantile(self):
+        """Test quantile outside of 0..1"""
+        with pytest.raises(ValueError):
+            TimeAggregate().quantile(1.5)
+
+    def test_constant_memory(self):
+        """Test that memory does not grow with number of values"""
+        times = TimeAggregate()
+        times.add(1.0)
+        size = sys.getsizeof(times._buckets)
+        for _ in range(10_000):
+            times.add(random.uniform(0.1, 100.0))
+
+        assert sys.getsizeof(times._buckets) == size
+
+    def test_summary(self):
+        """Test summary keys"""
+        times = TimeAggregate()
+        times.add(2.0)
+        summary = times.summary()
+
+        assert set(summary) == {"count", "mean", "variance", "p50", "p90", "p99"}
+        assert summary["count"] == 1
+        assert summary["mean"] == 2.0
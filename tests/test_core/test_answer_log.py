@@ -0,0 +1,102 @@
+"""
+Tests for append-only answer log.
+"""
+
+import pytest
+
+from src.number_trainer.core.answer_log import RECORD, AnswerLog, read_answer_log
+from src.number_trainer.core.models import Exercise, Operation, Result
+from src.number_trainer.core.trainer import MathTrainer
+
+
+def make_result(exercise: Exercise, user_answer: int, time_taken: float = 1.5) -> Result:
+    """Create result for exercise"""
+    is_correct = user_answer == exercise.correct_answer
+    return Result(is_correct, user_answer, exercise.correct_answer, "", time_taken)
+
+
+class TestAnswerLog:
+    """Tests for AnswerLog class"""
+
+    def test_write_and_read(self, tmp_path):
+        """Test that appended answers are read back after close"""
+        log = AnswerLog(tmp_path)
+        addition = Exercise(7, 5, Operation.ADDITION, 12)
+        subtraction = Exercise(50, 8, Operation.SUBTRACTION, 42)
+        log.append(addition, make_result(addition, 12, 2.5))
+        log.append(subtraction, make_result(subtraction, 40, 4.0))
+        log.close()
+
+        assert list(read_answer_log(tmp_path)) == [(addition, True, 2.5), (subtraction, False, 4.0)]
+
+    def test_rotation_by_size(self, tmp_path):
+        """Test that files are rotated without splitting records"""
+        log = AnswerLog(tmp_path, max_file_size=RECORD.size * 3, fsync=False)
+        exercise = Exercise(1, 2, Operation.ADDITION, 3)
+        for _ in range(10):
+            log.append(exercise, make_result(exercise, 3))
+        log.close()
+
+        files = list(tmp_path.glob("answers-*.log"))
+        assert len(files) == 4
+        assert all(path.stat().st_size % RECORD.size == 0 for path in files)
+        assert len(list(read_answer_log(tmp_path))) == 10
+
+    def test_incomplete_record_is_skipped(self, tmp_path):
+        """Test reading a log with a torn last record"""
+        log = AnswerLog(tmp_path)
+        exercise = Exercise(1, 2, Operation.ADDITION, 3)
+        log.append(exercise, make_result(exercise, 3))
+        log.close()
+
+        path = next(tmp_path.glob("answers-*.log"))
+        with open(path, "ab") as log_file:
+            log_file.write(b"\x00" * (RECORD.size // 2))
+
+        assert len(list(read_answer_log(tmp_path))) == 1
+
+    def test_huge_answer_is_clamped(self, tmp_path):
+        """Test that answer outside of record range does not break logging"""
+        log = AnswerLog(tmp_path)
+        exercise = Exercise(1, 2, Operation.ADDITION, 3)
+        log.append(exercise, make_result(exercise, 10**20))
+        log.close()
+
+        assert list(read_answer_log(tmp_path))[0][1] is False
+
+    def test_close_is_idempotent(self, tmp_path):
+        """Test closing twice"""
+        log = AnswerLog(tmp_path)
+        log.close()
+        log.close()
+
+    def test_invalid_file_size(self, tmp_path):
+        """Test that file must hold at least one record"""
+        with pytest.raises(ValueError):
+            AnswerLog(tmp_path, max_file_size=RECORD.size - 1)
+
+    def test_empty_directory(self, tmp_path):
+        """Test reading directory without logs"""
+        assert list(read_answer_log(tmp_path)) == []
+
+
+class TestTrainerWithAnswerLog:
+    """Tests for MathTrainer writing and restoring the log"""
+
+    def test_stats_restored_after_restart(self, tmp_path):
+        """Test that statistics are rebuilt from the log"""
+        log = AnswerLog(tmp_path)
+        trainer = MathTrainer(min_digits=2, max_digits=2, answer_log=log)
+        for _ in range(5):
+            exercise = trainer.generate_exercise()
+            trainer.check_answer(exercise, exercise.correct_answer, 3.0)
+        exercise = trainer.generate_exercise()
+        trainer.check_answer(exercise, exercise.correct_answer + 1, 5.0)
+        log.close()
+
+        restored = MathTrainer(min_digits=2, max_digits=2)
+        for exercise, is_correct, time_taken in read_answer_log(tmp_path):
+            restored.record_answer(exercise, is_correct, time_taken)
+
+        assert restored.get_stats() == trainer.get_stats()
+        assert restored.get_time_stats() == trainer.get_time_stats()
@@ -0,0 +1,66 @@
+"""Tests for lazy exports of the packages."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import src.number_trainer as package
+from src.number_trainer import core
+from src.number_trainer.core.models import ExerciseBatch
+from src.number_trainer.core.trainer import MathTrainer
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def imported_modules(statement: str) -> set[str]:
+    """Modules loaded by a statement in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{statement}\nprint('\\n'.join(sys.modules))"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_exports_resolve_to_classes():
+    """Test that lazy names are the classes of their modules."""
+    assert package.MathTrainer is MathTrainer
+    assert package.ExerciseBatch is ExerciseBatch
+    assert core.ExerciseBatch is ExerciseBatch
+    assert core.MathTrainer is MathTrainer
+    assert "MathTrainer" in vars(package)
+
+
+def test_unknown_attribute():
+    """Test that unknown names still raise AttributeError."""
+    with pytest.raises(AttributeError, match="no attribute 'missing'"):
+        _ = package.missing
+
+
+def test_dir_lists_exports():
+    """Test that dir() shows names that were not imported yet."""
+    assert set(package.__all__) <= set(dir(package))
+    assert set(core.__all__) <= set(dir(core))
+
+
+def test_package_import_is_lazy():
+    """Test that importing packages does not import their submodules."""
+    modules = imported_modules("import src.number_trainer, src.number_trainer.core, src.number_trainer.gui")
+    assert "src.number_trainer.core.trainer" not in modules
+    assert "src.number_trainer.core.models" not in modules
+    assert "tkinter" not in modules
+
+    modules = imported_modules("from src.number_trainer import ExerciseBatch")
+    assert "src.number_trainer.core.models" in modules
+    assert "src.number_trainer.core.trainer" not in modules
+
+
+def test_console_does_not_load_gui_or_web():
+    """Test that the console trainer only loads what it needs."""
+    modules = imported_modules("from src.number_trainer.cli import run_console_trainer")
+    assert "src.number_trainer.core.trainer" in modules
+    assert modules.isdisjoint({"tkinter", "fastapi", "sqlite3", "src.number_trainer.core.answer_log"})
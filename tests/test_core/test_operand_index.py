@@ -0,0 +1,149 @@
+"""
+Tests for precomputed operand index.
+"""
+
+from collections import Counter
+
+import pytest
+
+from src.number_trainer.core import operand_index as index_module
+from src.number_trainer.core.models import Operation
+from src.number_trainer.core.operand_index import OperandIndex, operand_index, operand_range
+from src.number_trainer.core.trainer import MathTrainer
+
+
+def has_carry(first: int, second: int, operation: Operation) -> bool:
+    """Check digit by digit whether the exercise needs carrying or borrowing"""
+    while first or second:
+        first_digit, second_digit = first % 10, second % 10
+        if operation == Operation.ADDITION and first_digit + second_digit > 9:
+            return True
+        if operation == Operation.SUBTRACTION and first_digit < second_digit:
+            return True
+        first, second = first // 10, second // 10
+    return False
+
+
+class TestOperandIndex:
+    """Tests for OperandIndex class"""
+
+    @pytest.mark.parametrize("operation", list(Operation))
+    def test_build_contains_all_pairs(self, operation):
+        """Test that every valid pair is present once and ordered by result"""
+        index = OperandIndex.build(1, 2, operation)
+        numbers = operand_range(1, 2)
+        expected = {
+            (first, second)
+            for first in numbers
+            for second in numbers
+            if operation == Operation.ADDITION or first >= second
+        }
+
+        pairs = list(zip(index.firsts, index.seconds, strict=True))
+        assert len(pairs) == len(expected)
+        assert set(pairs) == expected
+        assert list(index.results) == sorted(index.results)
+
+    @pytest.mark.parametrize("operation", list(Operation))
+    def test_no_carry_bitset(self, operation):
+        """Test that no-carry members are exactly the pairs without carrying"""
+        index = OperandIndex.build(2, 2, operation)
+        members = {(index.firsts[position], index.seconds[position]) for position in index.members(no_carry=True)}
+        expected = {pair for pair in zip(index.firsts, index.seconds, strict=True) if not has_carry(*pair, operation)}
+
+        assert members == expected
+        assert (55, 44) in members
+        assert (55, 46) not in members
+
+    def test_count_with_result_below(self):
+        """Test counting of pairs with small results"""
+        index = OperandIndex.build(1, 1, Operation.ADDITION)
+
+        assert index.count() == 81
+        assert index.count(result_below=4) == 3  # 1+1, 1+2, 2+1
+        assert index.count(result_below=2) == 0
+        assert index.count(no_carry=True) == index.count(result_below=10)
+
+    def test_sample_respects_constraints(self):
+        """Test that samples match all constraints"""
+        index = OperandIndex.build(2, 2, Operation.ADDITION)
+        for _ in range(200):
+            first, second = index.sample(no_carry=True, result_below=50)
+            assert first + second < 50
+            assert not has_carry(first, second, Operation.ADDITION)
+
+    def test_sample_is_uniform(self):
+        """Test that every matching pair is picked about equally often"""
+        index = OperandIndex.build(1, 1, Operation.SUBTRACTION)
+        counts = Counter(index.sample() for _ in range(9000))
+
+        assert len(counts) == 45
+        assert min(counts.values()) > 100
+        assert max(counts.values()) < 300
+
+    def test_sample_excludes_pairs(self):
+        """Test that excluded pairs are never picked"""
+        index = OperandIndex.build(1, 1, Operation.ADDITION)
+
+        assert index.sample(result_below=4, exclude={(1, 1), (1, 2)}) == (2, 1)
+        with pytest.raises(ValueError):
+            index.sample(result_below=4, exclude={(1, 1), (1, 2), (2, 1)})
+        with pytest.raises(ValueError):
+            index.sample(result_below=2)
+
+    def test_save_and_load(self, tmp_path):
+        """Test that saved index is loaded unchanged"""
+        path = tmp_path / "index.idx"
+        index = OperandIndex.build(1, 2, Operation.SUBTRACTION)
+        index.save(path, 1, 2)
+
+        loaded = OperandIndex.load(path, 1, 2, Operation.SUBTRACTION)
+        assert loaded is not None
+        assert loaded.firsts == index.firsts
+        assert loaded.seconds == index.seconds
+        assert loaded.results == index.results
+        assert loaded.no_carry == index.no_carry
+
+        assert OperandIndex.load(path, 2, 2, Operation.SUBTRACTION) is None
+        assert OperandIndex.load(path, 1, 2, Operation.ADDITION) is None
+        path.write_bytes(path.read_bytes()[:-1])
+        assert OperandIndex.load(path, 1, 2, Operation.SUBTRACTION) is None
+
+    def test_operand_index_uses_disk_cache(self, tmp_path, monkeypatch):
+        """Test that index is built once and then read from the cache directory"""
+        monkeypatch.setenv("OPERAND_INDEX_CACHE", str(tmp_path))
+        operand_index.cache_clear()
+        built = operand_index(1, 1, Operation.ADDITION)
+        assert len(list(tmp_path.iterdir())) == 1
+
+        operand_index.cache_clear()
+        monkeypatch.setattr(index_module.OperandIndex, "build", None)
+        loaded = operand_index(1, 1, Operation.ADDITION)
+        assert loaded.firsts == built.firsts
+        operand_index.cache_clear()
+
+
+class TestConstrainedExercises:
+    """Tests for constrained exercise generation"""
+
+    def test_generate_exercise_with_constraints(self):
+        """Test that trainer passes constraints to the index"""
+        trainer = MathTrainer(min_digits=2, max_digits=2)
+        for _ in range(100):
+            exercise = trainer.generate_exercise(no_carry=True, result_below=60)
+            assert exercise.correct_answer < 60
+            assert not has_carry(exercise.first_number, exercise.second_number, exercise.operation)
+
+    def test_generate_exercise_skips_operation_without_matches(self):
+        """Test that only subtraction is used when addition cannot match"""
+        trainer = MathTrainer(min_digits=1, max_digits=1)
+        for _ in range(20):
+            exercise = trainer.generate_exercise(result_below=1)
+            assert exercise.operation == Operation.SUBTRACTION
+            assert exercise.correct_answer == 0
+
+    def test_generate_exercise_without_matches(self):
+        """Test error when no exercise matches"""
+        trainer = MathTrainer(min_digits=3, max_digits=3)
+        with pytest.raises(ValueError):
+            trainer.generate_exercise(result_below=0)
@@ -4,9 +4,11 @@ Tests for core module of mathematical trainer.
 Contains tests for MathTrainer, Exercise, Result, and Operation classes.
 """
 
+from array import array
+
 import pytest
 
-from src.number_trainer.core.models import Exercise, Operation, Result
+from src.number_trainer.core.models import Exercise, ExerciseBatch, Operation, Result
 from src.number_trainer.core.trainer import MathTrainer
 
 
@@ -105,6 +107,41 @@ class TestMathTrainer:
                 assert exercise.correct_answer >= 0
                 assert exercise.first_number >= exercise.second_number
 
+    def test_generate_batch(self):
+        """Test batch generation"""
+        trainer = MathTrainer(min_digits=1, max_digits=3)
+        batch = trainer.generate_batch(500)
+
+        assert isinstance(batch, ExerciseBatch)
+        assert len(batch) == 500
+        assert trainer.current_exercise is None
+
+        for exercise in batch:
+            assert isinstance(exercise, Exercise)
+            assert 1 <= exercise.first_number <= 999
+            assert 1 <= exercise.second_number <= 999
+            if exercise.operation == Operation.ADDITION:
+                assert exercise.correct_answer == exercise.first_number + exercise.second_number
+            else:
+                assert exercise.first_number >= exercise.second_number
+                assert exercise.correct_answer == exercise.first_number - exercise.second_number
+
+    def test_generate_batch_respects_difficulty(self):
+        """Test that batch generation uses trainer difficulty"""
+        trainer = MathTrainer(min_digits=2, max_digits=2)
+        batch = trainer.generate_batch(200)
+
+        assert all(10 <= number <= 99 for number in batch.first_numbers)
+        assert all(10 <= number <= 99 for number in batch.second_numbers)
+        assert set(batch.operations) == {0, 1}
+
+    def test_generate_batch_empty_and_invalid(self):
+        """Test batch generation with zero and negative count"""
+        trainer = MathTrainer()
+        assert len(trainer.generate_batch(0)) == 0
+        with pytest.raises(ValueError):
+            trainer.generate_batch(-1)
+
     def test_check_answer_correct(self):
         """Test checking correct answer"""
         trainer = MathTrainer()
@@ -195,6 +232,29 @@ class TestMathTrainer:
         assert stats["incorrect_answers"] == 1
         assert stats["accuracy"] == 80.0
 
+    def test_time_aggregates(self):
+        """Test that answer times are aggregated per kind of exercise"""
+        trainer = MathTrainer(min_digits=2, max_digits=2)
+        exercise = Exercise(40, 12, Operation.SUBTRACTION, 28)
+
+        trainer.check_answer(exercise, 28, 2.0)
+        trainer.check_answer(exercise, 27, 4.0)
+        trainer.check_answer(exercise, 28)  # unknown time is not counted
+
+        stats = trainer.get_stats()
+        assert stats["average_time"] == 3.0
+        assert stats["p50_time"] == pytest.approx(2.0, rel=0.1)
+        assert stats["p99_time"] == pytest.approx(4.0, rel=0.1)
+
+        time_stats = trainer.get_time_stats()
+        assert list(time_stats) == [(2, Operation.SUBTRACTION)]
+        assert time_stats[(2, Operation.SUBTRACTION)]["count"] == 2
+        assert time_stats[(2, Operation.SUBTRACTION)]["variance"] == 2.0
+
+        trainer.reset_stats()
+        assert trainer.get_stats()["average_time"] == 0.0
+        assert trainer.get_time_stats() == {}
+
     def test_reset_stats(self):
         """Test resetting statistics"""
         trainer = MathTrainer()
@@ -245,6 +305,45 @@ class TestExercise:
         assert str(exercise) == "10 - 4 = ?"
 
 
+class TestExerciseBatch:
+    """Tests for ExerciseBatch class"""
+
+    def test_batch_rows_are_lazy_exercises(self):
+        """Test that batch rows are converted to exercises on access"""
+        batch = ExerciseBatch(
+            first_numbers=array("H", [5, 10]),
+            second_numbers=array("H", [3, 4]),
+            operations=bytes([0, 1]),
+            correct_answers=array("H", [8, 6]),
+        )
+
+        assert len(batch) == 2
+        assert batch[0] == Exercise(5, 3, Operation.ADDITION, 8)
+        assert str(batch[1]) == "10 - 4 = ?"
+        assert list(batch) == [batch[0], batch[1]]
+
+    def test_batch_slicing(self):
+        """Test that slicing returns a smaller batch"""
+        batch = ExerciseBatch(
+            first_numbers=array("H", [5, 10, 7]),
+            second_numbers=array("H", [3, 4, 2]),
+            operations=bytes([0, 1, 1]),
+            correct_answers=array("H", [8, 6, 5]),
+        )
+
+        tail = batch[1:]
+        assert isinstance(tail, ExerciseBatch)
+        assert len(tail) == 2
+        assert tail[0] == Exercise(10, 4, Operation.SUBTRACTION, 6)
+        assert list(batch[::2]) == [batch[0], batch[2]]
+
+    def test_batch_invalid_index(self):
+        """Test that non-integer index gives a clear error"""
+        batch = ExerciseBatch(array("H", [5]), array("H", [3]), bytes([0]), array("H", [8]))
+        with pytest.raises(TypeError, match="integers or slices"):
+            batch["0"]  # type: ignore[call-overload]
+
+
 class TestResult:
     """Tests for Result class"""
 
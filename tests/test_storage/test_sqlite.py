@@ -0,0 +1,108 @@
+"""
+Tests for SQLite answer history.
+"""
+
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from src.number_trainer.core.models import Exercise, Operation, Result
+from src.number_trainer.storage import HistoryStore
+from src.number_trainer.storage import sqlite as sqlite_module
+
+ADDITION = Exercise(7, 5, Operation.ADDITION, 12)
+SUBTRACTION = Exercise(50, 8, Operation.SUBTRACTION, 42)
+
+
+def make_result(exercise: Exercise, user_answer: int, time_taken: float = 1.5) -> Result:
+    """Create result for exercise"""
+    is_correct = user_answer == exercise.correct_answer
+    return Result(is_correct, user_answer, exercise.correct_answer, "", time_taken)
+
+
+class TestHistoryStore:
+    """Tests for HistoryStore class"""
+
+    def test_uses_wal(self, tmp_path):
+        """Test that file databases are opened in WAL mode"""
+        history = HistoryStore(tmp_path / "history.db")
+        mode = history._connection.execute("PRAGMA journal_mode").fetchone()[0]
+        history.close()
+
+        assert mode == "wal"
+
+    def test_record_buffers_until_batch_is_full(self, tmp_path):
+        """Test that answers are written in batches"""
+        path = tmp_path / "history.db"
+        history = HistoryStore(path, batch_size=3)
+
+        assert history.record("alice", 1, ADDITION, make_result(ADDITION, 12)) is False
+        assert history.record("alice", 1, ADDITION, make_result(ADDITION, 12)) is False
+        with sqlite3.connect(path) as reader:
+            assert reader.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 0
+
+        assert history.record("alice", 1, ADDITION, make_result(ADDITION, 12)) is True
+        assert history.flush() == 3
+        assert history.flush() == 0
+        with sqlite3.connect(path) as reader:
+            assert reader.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 3
+        history.close()
+
+    def test_close_writes_buffer(self, tmp_path):
+        """Test that buffered answers are not lost on close"""
+        path = tmp_path / "history.db"
+        history = HistoryStore(path)
+        history.record("alice", 2, SUBTRACTION, make_result(SUBTRACTION, 40))
+        history.close()
+
+        with sqlite3.connect(path) as reader:
+            assert reader.execute("SELECT session, user_answer, is_correct FROM answers").fetchall() == [
+                ("alice", 40, 0)
+            ]
+
+    def test_worst_pairs(self):
+        """Test that pairs are ordered by error rate and kept per session"""
+        history = HistoryStore(":memory:")
+        history.record("alice", 1, ADDITION, make_result(ADDITION, 12, 1.0))
+        history.record("alice", 2, SUBTRACTION, make_result(SUBTRACTION, 40, 3.0))
+        history.record("alice", 2, SUBTRACTION, make_result(SUBTRACTION, 42, 5.0))
+        history.record("bob", 1, ADDITION, make_result(ADDITION, 11))
+
+        assert history.worst_pairs("alice") == [
+            {"question": "50 - 8", "attempts": 2, "errors": 1, "mean_time": 4.0},
+            {"question": "7 + 5", "attempts": 1, "errors": 0, "mean_time": 1.0},
+        ]
+        assert history.worst_pairs("alice", limit=1)[0]["question"] == "50 - 8"
+        assert history.worst_pairs("carol") == []
+        history.close()
+
+    def test_progress(self, monkeypatch):
+        """Test that answers are grouped into time buckets"""
+        history = HistoryStore(":memory:")
+        for now, answer in ((100.0, 12), (150.0, 11), (3700.0, 12)):
+            monkeypatch.setattr(sqlite_module, "time", SimpleNamespace(time=lambda now=now: now))
+            history.record("alice", 1, ADDITION, make_result(ADDITION, answer, 2.0))
+
+        assert history.progress("alice", bucket_seconds=3600) == [
+            {"start": 0, "total_exercises": 2, "accuracy": 50.0, "mean_time": 2.0},
+            {"start": 3600, "total_exercises": 1, "accuracy": 100.0, "mean_time": 2.0},
+        ]
+        history.close()
+
+    def test_queries_use_indexes(self):
+        """Test that per-session queries do not scan the whole table"""
+        history = HistoryStore(":memory:")
+        plan = history._connection.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*), AVG(time_taken) FROM answers WHERE session = ?", ("alice",)
+        ).fetchall()
+        history.close()
+
+        assert "answers_by_session" in " ".join(row[-1] for row in plan)
+
+    def test_invalid_arguments(self):
+        """Test validation of constructor arguments"""
+        with pytest.raises(ValueError):
+            HistoryStore(":memory:", batch_size=0)
+        with pytest.raises(ValueError):
+            HistoryStore(":memory:", flush_interval=0)
@@ -1,8 +1,23 @@
 """Tests for web API endpoints."""
 
+import asyncio
+import marshal
+from types import SimpleNamespace
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
 
+from src.number_trainer.core.answer_log import AnswerLog
+from src.number_trainer.core.trainer import MathTrainer
+from src.number_trainer.storage import HistoryStore
+from src.number_trainer.web import app as app_module
+from src.number_trainer.web import routes
 from src.number_trainer.web.app import app
+from src.number_trainer.web.profiling import Profiler
+from src.number_trainer.web.sessions import SessionStats
+from src.number_trainer.web.stats import LocalStatsBackend
+from src.number_trainer.web.store import SignedTokenStore, TTLExerciseStore
 
 client = TestClient(app)
 
@@ -14,6 +29,26 @@ def test_health_check():
     data = response.json()
     assert data["status"] == "healthy"
     assert data["service"] == "number-trainer-web"
+    assert set(data["exercise_store"]) == {"size", "evictions", "expirations"}
+    assert set(data["sessions"]) == {"size", "evictions", "expirations", "outstanding"}
+
+
+def test_lifespan_runs_sweeper(monkeypatch):
+    """Test that application lifespan starts and stops the store sweeper."""
+    events = []
+
+    async def fake_sweeper() -> None:
+        events.append("started")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            events.append("stopped")
+
+    monkeypatch.setattr(app_module.exercise_store, "run_sweeper", fake_sweeper)
+    with TestClient(app) as lifespan_client:
+        assert lifespan_client.get("/api/health").status_code == 200
+        assert events == ["started"]
+    assert events == ["started", "stopped"]
 
 
 def test_root_endpoint():
@@ -42,6 +77,30 @@ def test_create_exercise_invalid_difficulty():
     assert response.status_code == 400
 
 
+def test_create_batch():
+    """Test creating a batch of exercises."""
+    response = client.post("/api/exercise/batch", json={"difficulty": 2, "count": 50})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert len(data["first_numbers"]) == 50
+    assert len(data["second_numbers"]) == 50
+    assert len(data["correct_answers"]) == 50
+    assert set(data["operations"]) <= {"+", "-"}
+    for first, second, operation, answer in zip(
+        data["first_numbers"], data["second_numbers"], data["operations"], data["correct_answers"], strict=True
+    ):
+        assert 10 <= first <= 99
+        assert 10 <= second <= 99
+        assert answer == (first + second if operation == "+" else first - second)
+
+
+def test_create_batch_invalid():
+    """Test creating batch with invalid parameters."""
+    assert client.post("/api/exercise/batch", json={"difficulty": 4, "count": 10}).status_code == 400
+    assert client.post("/api/exercise/batch", json={"difficulty": 1, "count": 0}).status_code == 400
+
+
 def test_check_answer_not_found():
     """Test checking answer for non-existent exercise."""
     response = client.post("/api/exercise/check", json={"exercise_id": "non-existent", "answer": 42})
@@ -87,3 +146,483 @@ def test_get_stats():
     assert isinstance(data["correct_answers"], int)
     assert isinstance(data["incorrect_answers"], int)
     assert isinstance(data["accuracy"], float)
+
+
+def test_exercise_workflow_with_signed_tokens(monkeypatch):
+    """Test that signed exercise ids are checked without server-side state."""
+    monkeypatch.setattr(routes, "exercise_store", SignedTokenStore(secret=b"test-secret"))
+
+    exercise = client.post("/api/exercise/new", json={"difficulty": 2}).json()
+    answer = solve(exercise["question"])
+
+    # A fresh store with the same secret stands in for another worker
+    monkeypatch.setattr(routes, "exercise_store", SignedTokenStore(secret=b"test-secret"))
+    check_response = client.post("/api/exercise/check", json={"exercise_id": exercise["exercise_id"], "answer": answer})
+    assert check_response.status_code == 200
+    assert check_response.json()["correct"] is True
+
+
+def solve(question: str) -> int:
+    """Calculate answer for question like '12 + 5'."""
+    first, operation, second = question.split()
+    return int(first) + int(second) if operation == "+" else int(first) - int(second)
+
+
+def test_stats_are_per_session():
+    """Test that each session sees only its own statistics."""
+    alice = TestClient(app)
+    bob = TestClient(app)
+
+    exercise = alice.post("/api/exercise/new", json={"difficulty": 1}).json()
+    alice.post(
+        "/api/exercise/check", json={"exercise_id": exercise["exercise_id"], "answer": solve(exercise["question"])}
+    )
+
+    alice_stats = alice.get("/api/stats").json()
+    assert alice_stats["total_exercises"] == 1
+    assert alice_stats["correct_answers"] == 1
+    assert alice_stats["accuracy"] == 100.0
+    assert bob.get("/api/stats").json()["total_exercises"] == 0
+
+    assert client.get("/api/stats/global").json()["total_exercises"] >= 1
+
+
+def test_session_header():
+    """Test that session can be selected with a header instead of a cookie."""
+    headers = {"X-Session-ID": "header-session-0001"}
+    exercise = client.post("/api/exercise/new", json={"difficulty": 1}).json()
+    response = client.post(
+        "/api/exercise/check", json={"exercise_id": exercise["exercise_id"], "answer": -1}, headers=headers
+    )
+    assert "x-session-id" not in response.headers
+
+    stats = TestClient(app).get("/api/stats", headers=headers).json()
+    assert stats["total_exercises"] == 1
+    assert stats["incorrect_answers"] == 1
+
+
+def test_new_session_id_is_returned():
+    """Test that a new session id is sent in header and cookie."""
+    response = TestClient(app).get("/api/stats")
+    session_id = response.headers["x-session-id"]
+    assert response.cookies["nt_session"] == session_id
+
+
+def test_average_time_and_timing():
+    """Test that answer times are reported in statistics."""
+    session_client = TestClient(app)
+    for time_taken in (2.0, 4.0):
+        exercise = session_client.post("/api/exercise/new", json={"difficulty": 3}).json()
+        session_client.post(
+            "/api/exercise/check",
+            json={"exercise_id": exercise["exercise_id"], "answer": 0, "time_taken": time_taken},
+        )
+
+    assert session_client.get("/api/stats").json()["average_time"] == 3.0
+    assert client.get("/api/stats/global").json()["average_time"] is not None
+
+    timing = client.get("/api/stats/timing").json()
+    assert {entry["difficulty"] for entry in timing} >= {3}
+    for entry in timing:
+        assert entry["operation"] in {"+", "-"}
+        assert entry["count"] > 0
+        assert entry["p50"] <= entry["p90"] <= entry["p99"]
+
+
+def test_restore_history(monkeypatch, tmp_path):
+    """Test that web statistics are rebuilt from the answer log."""
+    log = AnswerLog(tmp_path)
+    log_trainer = MathTrainer(min_digits=3, max_digits=3, answer_log=log)
+    exercise = log_trainer.generate_exercise()
+    log_trainer.check_answer(exercise, exercise.correct_answer, 2.0)
+    log.close()
+
+    monkeypatch.setattr(routes, "trainers", {digits: MathTrainer(digits, digits) for digits in (1, 2, 3)})
+    monkeypatch.setattr(routes, "stats_backend", LocalStatsBackend())
+    routes.restore_history(str(tmp_path))
+
+    assert routes.trainers[3].get_stats()["total_exercises"] == 1
+    assert routes.trainers[1].get_stats()["total_exercises"] == 0
+    assert client.get("/api/stats/global").json()["total_exercises"] == 1
+
+
+def test_history_disabled():
+    """Test that history endpoints fail when no database is configured."""
+    response = client.get("/api/history/worst-pairs")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "History is not enabled"
+
+
+def test_history_endpoints(monkeypatch):
+    """Test that checked answers end up in the history of the session."""
+    monkeypatch.setattr(routes, "history", HistoryStore(":memory:", batch_size=1))
+    user = TestClient(app)
+
+    exercise = user.post("/api/exercise/new", json={"difficulty": 1}).json()
+    user.post("/api/exercise/check", json={"exercise_id": exercise["exercise_id"], "answer": -1, "time_taken": 2.0})
+
+    pairs = user.get("/api/history/worst-pairs").json()
+    assert pairs == [{"question": exercise["question"], "attempts": 1, "errors": 1, "mean_time": 2.0}]
+
+    progress = user.get("/api/history/progress").json()
+    assert len(progress) == 1
+    assert progress[0]["total_exercises"] == 1
+    assert progress[0]["accuracy"] == 0.0
+
+    assert TestClient(app).get("/api/history/worst-pairs").json() == []
+    routes.history.close()
+
+
+def test_create_exercise_with_constraints():
+    """Test exercise constraints in the API."""
+    for _ in range(20):
+        data = client.post("/api/exercise/new", json={"difficulty": 2, "no_carry": True, "result_below": 50}).json()
+        assert 0 <= solve(data["question"]) < 50
+
+    response = client.post("/api/exercise/new", json={"difficulty": 3, "result_below": 0})
+    assert response.status_code == 400
+
+
+def test_prefetch_window():
+    """Test that prefetched exercises can be answered one by one."""
+    user = TestClient(app)
+    exercises = user.post("/api/exercise/prefetch", json={"difficulty": 2, "count": 3}).json()["exercises"]
+
+    assert len(exercises) == 3
+    assert len({exercise["exercise_id"] for exercise in exercises}) == 3
+    for exercise in exercises:
+        response = user.post(
+            "/api/exercise/check", json={"exercise_id": exercise["exercise_id"], "answer": solve(exercise["question"])}
+        )
+        assert response.json()["correct"] is True
+    assert user.get("/api/stats").json()["total_exercises"] == 3
+
+
+def test_prefetch_is_capped_per_session(monkeypatch):
+    """Test server-side cap of unanswered prefetched exercises."""
+    monkeypatch.setattr(routes.session_registry, "max_outstanding", 4)
+    user = TestClient(app)
+
+    first = user.post("/api/exercise/prefetch", json={"difficulty": 1, "count": 3}).json()["exercises"]
+    assert len(user.post("/api/exercise/prefetch", json={"difficulty": 1, "count": 3}).json()["exercises"]) == 1
+    assert user.post("/api/exercise/prefetch", json={"difficulty": 1}).status_code == 429
+
+    # Other sessions are not affected
+    assert TestClient(app).post("/api/exercise/prefetch", json={"difficulty": 1}).status_code == 200
+
+    # Answering or discarding frees places
+    user.post("/api/exercise/check", json={"exercise_id": first[0]["exercise_id"], "answer": 0})
+    discarded = [first[1]["exercise_id"]]
+    response = user.post("/api/exercise/prefetch", json={"difficulty": 3, "count": 5, "discard": discarded})
+    assert len(response.json()["exercises"]) == 2
+    assert user.post("/api/exercise/check", json={"exercise_id": discarded[0], "answer": 0}).status_code == 404
+
+
+def test_prefetch_invalid():
+    """Test prefetch validation."""
+    assert client.post("/api/exercise/prefetch", json={"difficulty": 4}).status_code == 400
+    assert client.post("/api/exercise/prefetch", json={"difficulty": 1, "count": 0}).status_code == 400
+    assert client.post("/api/exercise/prefetch", json={"difficulty": 1, "count": 11}).status_code == 400
+
+
+def test_answer_step():
+    """Test that one request checks the answer, hands out the next exercise and returns statistics."""
+    user = TestClient(app)
+    exercise = user.post("/api/exercise/new", json={"difficulty": 1}).json()
+
+    data = user.post(
+        "/api/exercise/answer",
+        json={"exercise_id": exercise["exercise_id"], "answer": solve(exercise["question"]), "difficulty": 2},
+    ).json()
+    assert data["result"]["correct"] is True
+    assert data["stats"]["total_exercises"] == 1
+    assert data["stats"]["correct_answers"] == 1
+    assert len(data["exercises"]) == 1
+
+    following = data["exercises"][0]
+    assert all(len(number) == 2 for number in following["question"].split()[::2])
+    data = user.post(
+        "/api/exercise/answer",
+        json={"exercise_id": following["exercise_id"], "answer": -1, "difficulty": 2, "next_count": 3},
+    ).json()
+    assert data["result"]["correct"] is False
+    assert data["stats"]["incorrect_answers"] == 1
+    assert len(data["exercises"]) == 3
+
+
+def test_answer_step_respects_prefetch_cap(monkeypatch):
+    """Test that fewer next exercises are returned when the cap is reached."""
+    monkeypatch.setattr(routes.session_registry, "max_outstanding", 2)
+    user = TestClient(app)
+    window = user.post("/api/exercise/prefetch", json={"difficulty": 1, "count": 2}).json()["exercises"]
+
+    data = user.post(
+        "/api/exercise/answer",
+        json={"exercise_id": window[0]["exercise_id"], "answer": 0, "difficulty": 1, "next_count": 5},
+    ).json()
+    assert len(data["exercises"]) == 1
+
+
+def test_answer_step_invalid():
+    """Test validation of the combined endpoint."""
+    exercise = client.post("/api/exercise/new", json={"difficulty": 1}).json()
+    request = {"exercise_id": exercise["exercise_id"], "answer": 0, "difficulty": 1}
+
+    assert client.post("/api/exercise/answer", json={**request, "next_count": 11}).status_code == 400
+    assert client.post("/api/exercise/answer", json={**request, "difficulty": 5}).status_code == 400
+    assert client.post("/api/exercise/answer", json={**request, "exercise_id": "missing"}).status_code == 404
+
+
+def test_train_socket(monkeypatch):
+    """Test training over the WebSocket with answer time measured on the server."""
+    now = [100.0]
+    monkeypatch.setattr(routes, "time", SimpleNamespace(monotonic=lambda: now[0]))
+
+    with TestClient(app).websocket_connect("/ws/train") as websocket:
+        kind, session_id = websocket.receive_text().split()
+        assert kind == "i"
+
+        websocket.send_text("n 2")
+        question = websocket.receive_text().removeprefix("e ")
+        assert all(len(number) == 2 for number in question.split()[::2])
+        now[0] += 2.5
+        websocket.send_text(f"a {solve(question)}")
+        assert websocket.receive_text() == f"r 1 {solve(question)} 2.500"
+
+        websocket.send_text("n 1")
+        question = websocket.receive_text().removeprefix("e ")
+        websocket.send_text(f"a {solve(question) + 1}")
+        assert websocket.receive_text().startswith("r 0 ")
+
+        websocket.send_text("s")
+        assert websocket.receive_text() == "s 2 1 50.0 2.500"
+
+    # The socket and HTTP share the session
+    stats = client.get("/api/stats", headers={"X-Session-ID": session_id}).json()
+    assert stats["total_exercises"] == 2
+
+
+def test_train_socket_invalid_messages():
+    """Test that invalid messages are answered with errors and keep the socket open."""
+    with client.websocket_connect("/ws/train", headers={"X-Session-ID": "w" * 16}) as websocket:
+        websocket.send_text("a 5")
+        assert websocket.receive_text() == "x no exercise"
+        websocket.send_text("n 4")
+        assert websocket.receive_text().startswith("x ")
+        websocket.send_text("n 1")
+        assert websocket.receive_text().startswith("e ")
+        websocket.send_text("a five")
+        assert websocket.receive_text() == "x answer must be a number"
+        websocket.send_text("hello")
+        assert websocket.receive_text() == "x unknown command"
+        websocket.send_text("s")
+        assert websocket.receive_text() == "s 0 0 0.0 -"
+
+
+class FakeStreamRequest:
+    """Request that disconnects after the given number of checks."""
+
+    def __init__(self, checks: int) -> None:
+        self.checks = checks
+
+    async def is_disconnected(self) -> bool:
+        self.checks -= 1
+        return self.checks < 0
+
+
+def test_stats_events(monkeypatch):
+    """Test that the stats stream sends session and global statistics only when they change."""
+    monkeypatch.setattr(routes, "stats_broadcaster", routes.StatsBroadcaster())
+    session = SessionStats("s" * 16, 0.0)
+
+    async def run() -> list[str]:
+        events = routes.stats_events(FakeStreamRequest(3), session, 0)
+        received = [await anext(events)]
+
+        waiting = asyncio.ensure_future(anext(events))
+        # Same global payload and no new answers: nothing is sent
+        routes.stats_broadcaster.publish(routes.stats_broadcaster.latest or "")
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+
+        session.record(True, 2.0)
+        routes.stats_broadcaster.publish('{"total_exercises": 1}')
+        received.append(await waiting)
+        received.extend([event async for event in events])
+        return received
+
+    routes.stats_broadcaster.latest = routes.global_stats_payload()
+    first, second = asyncio.run(run())
+
+    assert first.startswith("event: session\ndata: ")
+    assert "event: global\n" in first
+    assert first.endswith("\n\n")
+    assert '"total_exercises":1' in second
+    assert second.endswith('event: global\ndata: {"total_exercises": 1}\n\n')
+    assert len(routes.stats_broadcaster) == 0
+
+
+def test_stream_stats_response():
+    """Test that the stream endpoint answers with an event stream that keeps the session cookie."""
+    response = Response()
+    response.set_cookie("nt_session", "s" * 16)
+
+    async def run() -> StreamingResponse:
+        return await routes.stream_stats(FakeStreamRequest(0), response, SessionStats("s" * 16, 0.0), 5.0)
+
+    stream = asyncio.run(run())
+    assert stream.media_type == "text/event-stream"
+    assert stream.headers["cache-control"] == "no-cache"
+    assert "nt_session" in stream.headers["set-cookie"]
+    assert "content-length" not in stream.headers
+
+
+def test_stream_stats_interval_is_limited():
+    """Test that clients cannot ask for updates more often than once a second."""
+    assert client.get("/api/stats/stream", params={"interval": 0.1}).status_code == 422
+
+
+def test_class_dashboard(monkeypatch):
+    """Test that answers of class members show up in the class endpoints."""
+    monkeypatch.setattr(routes, "class_rollups", routes.ClassRollups())
+    anna, boris = TestClient(app), TestClient(app)
+    assert anna.post("/api/class/7a/join", json={"name": " Anna "}).json()["name"] == "Anna"
+    assert boris.post("/api/class/7a/join", json={"name": "Boris"}).json()["total_exercises"] == 0
+
+    for user, correct in ((anna, True), (anna, True), (boris, False)):
+        exercise = user.post("/api/exercise/new", json={"difficulty": 1}).json()
+        answer = solve(exercise["question"]) + (0 if correct else 1)
+        user.post("/api/exercise/check", json={"exercise_id": exercise["exercise_id"], "answer": answer})
+
+    summary = client.get("/api/class/7a/summary").json()
+    assert summary["members"] == 2
+    assert summary["total"]["total_exercises"] == 3
+    assert summary["last_5_minutes"]["correct_answers"] == 2
+    assert summary["last_hour"]["total_exercises"] == 3
+
+    leaders = client.get("/api/class/7a/leaderboard", params={"limit": 1}).json()
+    assert [(leader["name"], leader["correct_answers"]) for leader in leaders] == [("Anna", 2)]
+
+    operations = client.get("/api/class/7a/operations").json()
+    assert {entry["difficulty"] for entry in operations} == {1}
+    assert sum(entry["total_exercises"] for entry in operations) == 3
+
+
+def test_class_errors(monkeypatch):
+    """Test unknown classes and invalid joins."""
+    monkeypatch.setattr(routes, "class_rollups", routes.ClassRollups())
+    assert client.get("/api/class/missing/summary").status_code == 404
+    assert client.get("/api/class/missing/leaderboard").status_code == 404
+    assert client.post("/api/class/7a/join", json={"name": "  "}).status_code == 400
+    assert client.post("/api/class/7a/join", json={"name": "x" * 41}).status_code == 400
+    assert client.post("/api/class/bad.id/join", json={"name": "Anna"}).status_code == 400
+
+
+def test_metrics_endpoint():
+    """Test that /metrics exposes request, store, session and answer metrics."""
+    exercise = client.post("/api/exercise/new", json={"difficulty": 1}).json()
+    client.post("/api/exercise/check", json={"exercise_id": exercise["exercise_id"], "answer": 0})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'number_trainer_http_requests_total{method="POST",route="/api/exercise/new",status="200"}' in text
+    assert (
+        'number_trainer_http_request_duration_seconds_bucket{method="POST",route="/api/exercise/check",le="+Inf"}'
+        in text
+    )
+    assert "number_trainer_exercise_store_size " in text
+    assert "number_trainer_sessions " in text
+    assert 'number_trainer_answers_total{difficulty="1",result="correct"}' in text
+    assert "number_trainer_event_loop_lag_seconds_count " in text
+
+
+def test_liveness():
+    """Test liveness probe."""
+    response = client.get("/api/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readiness():
+    """Test that a responsive worker with room in the store is ready."""
+    response = client.get("/api/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["storage"] == {
+        "history": routes.history is not None,
+        "answer_log": routes.answer_log is not None,
+        "stats_backend": type(routes.stats_backend).__name__,
+    }
+
+
+def test_readiness_reports_saturation(monkeypatch):
+    """Test that event loop lag and a full exercise store make the worker unready."""
+    store = TTLExerciseStore(max_size=10)
+    monkeypatch.setattr(routes, "exercise_store", store)
+    for _ in range(10):
+        client.post("/api/exercise/new", json={"difficulty": 1})
+
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["exercise store full"]
+    assert response.json()["exercise_store_fill"] == 1.0
+
+    monkeypatch.setattr(routes.loop_monitor, "lag", 0.5)
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["event loop lag", "exercise store full"]
+    assert response.json()["event_loop_lag"] == 0.5
+
+
+def test_profiling_endpoints_disabled():
+    """Test that profiling endpoints are not available without PROFILING."""
+    assert routes.profiler is None
+    assert client.get("/api/admin/profile/stages").status_code == 404
+    assert client.get("/api/admin/profile", params={"seconds": 0.01}).status_code == 404
+
+
+def test_profiling_endpoints(monkeypatch):
+    """Test stage timings and profile dumps of an enabled profiler."""
+    profiler = Profiler()
+    monkeypatch.setattr(routes, "profiler", profiler)
+    profiler.timings.record("trainer.generate_exercise", 0.002)
+
+    stages = client.get("/api/admin/profile/stages").json()
+    assert stages["trainer.generate_exercise"]["count"] == 1
+    assert stages["trainer.generate_exercise"]["max"] == 0.002
+
+    response = client.get("/api/admin/profile", params={"seconds": 0.05})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="profile.collapsed"'
+    assert response.text.endswith("\n")
+
+    response = client.get("/api/admin/profile", params={"seconds": 0.05, "format": "pstats"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert isinstance(marshal.loads(response.content), dict)
+
+    assert client.get("/api/admin/profile", params={"format": "svg"}).status_code == 422
+    assert client.get("/api/admin/profile", params={"seconds": 61}).status_code == 422
+
+
+def test_profiling_endpoints_busy(monkeypatch):
+    """Test that a profile is refused while another one runs."""
+    profiler = Profiler()
+    profiler.busy = True
+    monkeypatch.setattr(routes, "profiler", profiler)
+
+    response = client.get("/api/admin/profile", params={"seconds": 0.01})
+    assert response.status_code == 409
+
+
+def test_profiling_token(monkeypatch):
+    """Test that PROFILING_TOKEN protects the profiling endpoints."""
+    monkeypatch.setattr(routes, "profiler", Profiler())
+    monkeypatch.setattr(routes, "PROFILING_TOKEN", "secret")
+
+    assert client.get("/api/admin/profile/stages").status_code == 403
+    assert client.get("/api/admin/profile/stages", headers={"X-Profiling-Token": "wrong"}).status_code == 403
+    assert client.get("/api/admin/profile/stages", headers={"X-Profiling-Token": "secret"}).status_code == 200
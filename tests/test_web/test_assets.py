@@ -0,0 +1,150 @@
+"""Tests for pre-encoded responses."""
+
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.number_trainer.web import assets, routes
+from src.number_trainer.web.app import app
+from src.number_trainer.web.assets import EncodedAsset, choose_encoding
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("", "identity"),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", "identity"),
+        ("*", "br"),
+        ("deflate", "identity"),
+    ],
+)
+def test_choose_encoding(header, expected):
+    """Test encoding negotiation."""
+    assert choose_encoding(header, ("br", "gzip", "identity")) == expected
+
+
+def test_incompressible_content_is_served_plain():
+    """Test that variants which are not smaller are dropped."""
+    asset = EncodedAsset(b"x", "text/plain")
+    assert asset.encodings == ("identity",)
+
+
+def test_root_is_gzipped():
+    """Test that the page is sent compressed to clients accepting gzip."""
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert "Number Trainer" in response.text
+
+
+def test_root_plain():
+    """Test that clients without compression get the plain page."""
+    response = client.get("/", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) > len(gzip.compress(response.content))
+
+
+def test_root_not_modified():
+    """Test conditional requests with the ETag."""
+    etag = client.get("/", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.skipif(assets.brotli is None, reason="brotli is not installed")
+def test_root_brotli():
+    """Test that brotli is preferred when available."""
+    response = client.get("/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+
+
+def test_static_files_are_served_from_memory(monkeypatch):
+    """Test that static files need no disk access after startup."""
+
+    def fail(*args, **kwargs):
+        raise AssertionError("static file read from disk")
+
+    monkeypatch.setattr("pathlib.Path.read_bytes", fail)
+    monkeypatch.setattr("pathlib.Path.exists", fail)
+
+    for path in ("/static/css/style.css", "/sw.js", "/favicon.ico", "/apple-touch-icon.png"):
+        assert client.get(path).status_code == 200
+
+
+def test_static_file_headers():
+    """Test content type, compression and revalidation of static files."""
+    response = client.get("/static/js/app.js", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-type"] == "text/javascript; charset=utf-8"
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "no-cache"
+
+    revalidated = client.get(
+        "/static/js/app.js", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_hashed_static_file_is_immutable():
+    """Test that hashed names can be cached forever."""
+    hashed = routes.static_assets.manifest["css/style.css"]
+    response = client.get(f"/static/{hashed}")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == assets.IMMUTABLE
+    assert response.content == client.get("/static/css/style.css").content
+
+
+def test_page_links_hashed_files():
+    """Test that the page and the service worker point at hashed files."""
+    page = client.get("/").text
+    service_worker = client.get("/sw.js").text
+
+    for name in ("css/style.css", "js/app.js", "manifest.json"):
+        hashed = routes.static_assets.manifest[name]
+        assert f'"/static/{hashed}"' in page
+        assert f"/static/{name}" not in page
+    for name in ("js/app.js", "icons/icon-512.png"):
+        assert f"'/static/{routes.static_assets.manifest[name]}'" in service_worker
+    assert "ASSET_VERSION = 'development'" not in service_worker
+
+    manifest = client.get(f"/static/{routes.static_assets.manifest['manifest.json']}").json()
+    assert manifest["icons"][0]["src"] == f"/static/{routes.static_assets.manifest['icons/math_training_icon.svg']}"
+
+
+def test_png_is_not_compressed():
+    """Test that already compressed images are sent as they are."""
+    response = client.get("/apple-touch-icon.png", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-type"] == "image/png"
+    assert "content-encoding" not in response.headers
+    assert response.content == (routes.STATIC_DIR / "icons" / "icon-152.png").read_bytes()
+
+
+def test_service_worker():
+    """Test service worker from root."""
+    response = client.get("/sw.js")
+
+    assert response.status_code == 200
+    assert "javascript" in response.headers["content-type"]
+
+
+def test_static_file_not_found():
+    """Test missing static file."""
+    assert client.get("/static/missing.js").status_code == 404
@@ -0,0 +1,63 @@
+"""Tests for the statistics broadcast."""
+
+import asyncio
+
+import pytest
+
+from src.number_trainer.web.broadcast import StatsBroadcaster
+
+
+def test_invalid_interval():
+    """Test that the tick interval must be positive."""
+    with pytest.raises(ValueError):
+        StatsBroadcaster(interval=0)
+
+
+def test_publish_keeps_newest_payload():
+    """Test that a subscriber that does not read gets only the newest payload."""
+
+    async def run() -> None:
+        broadcaster = StatsBroadcaster()
+        queue = broadcaster.subscribe()
+        broadcaster.publish("first")
+        broadcaster.publish("second")
+        assert queue.qsize() == 1
+        assert await queue.get() == "second"
+
+        # New subscribers start with the last payload
+        late = broadcaster.subscribe()
+        assert late.get_nowait() == "second"
+        assert len(broadcaster) == 2
+
+        broadcaster.unsubscribe(queue)
+        broadcaster.publish("third")
+        assert queue.empty()
+        assert len(broadcaster) == 1
+
+    asyncio.run(run())
+
+
+def test_run_computes_once_per_tick():
+    """Test that the payload is computed once per tick for all subscribers and not without them."""
+    calls = []
+
+    def compute() -> str:
+        calls.append(None)
+        return str(len(calls))
+
+    async def run() -> None:
+        broadcaster = StatsBroadcaster(interval=0.01)
+        task = asyncio.create_task(broadcaster.run(compute))
+        await asyncio.sleep(0.05)
+        assert calls == []
+
+        queues = [broadcaster.subscribe() for _ in range(3)]
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert 1 <= len(calls) <= 6
+        assert {queue.get_nowait() for queue in queues} == {str(len(calls))}
+
+    asyncio.run(run())
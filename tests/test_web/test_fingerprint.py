@@ -0,0 +1,64 @@
+"""Tests for content-hashed static file names."""
+
+import hashlib
+import json
+
+from src.number_trainer.web import fingerprint as fingerprint_module
+from src.number_trainer.web.fingerprint import build_manifest, fingerprint, hashed_name, rewrite_urls
+
+
+def test_hashed_name():
+    """Test that hash goes before the suffix."""
+    digest = hashlib.sha256(b"body {}").hexdigest()[:12]
+    assert hashed_name("css/style.css", b"body {}") == f"css/style.{digest}.css"
+
+
+def test_rewrite_urls():
+    """Test that only known files are rewritten."""
+    content = b'<link href="/static/a.css"><script src="/static/missing.js"></script>'
+    rewritten = rewrite_urls(content, {"a.css": "a.123.css"})
+
+    assert rewritten == b'<link href="/static/a.123.css"><script src="/static/missing.js"></script>'
+
+
+def test_fingerprint_rewrites_links_before_hashing():
+    """Test that a text file gets a new hash when a file it links to changes."""
+    files = {
+        "icon.png": b"\x89PNG one",
+        "manifest.json": b'{"src": "/static/icon.png"}',
+        "sw.js": b"const ASSET_VERSION = 'development';\nconst A = ['/static/manifest.json'];",
+    }
+    contents, manifest = fingerprint(files)
+    changed_contents, changed_manifest = fingerprint({**files, "icon.png": b"\x89PNG two"})
+
+    assert contents["manifest.json"] == f'{{"src": "/static/{manifest["icon.png"]}"}}'.encode()
+    assert changed_manifest["manifest.json"] != manifest["manifest.json"]
+    assert "sw.js" not in manifest
+    assert f"'/static/{manifest['manifest.json']}'".encode() in contents["sw.js"]
+    assert b"development" not in contents["sw.js"]
+    assert changed_contents["sw.js"] != contents["sw.js"]
+
+
+def test_manifest_covers_static_directory():
+    """Test manifest of the real static directory."""
+    manifest = build_manifest()
+
+    assert "css/style.css" in manifest
+    assert "icons/icon-192.png" in manifest
+    assert "sw.js" not in manifest
+
+
+def test_main_writes_and_checks_manifest(monkeypatch, tmp_path):
+    """Test the build step."""
+    path = tmp_path / "asset-manifest.json"
+    monkeypatch.setattr(fingerprint_module, "MANIFEST_PATH", path)
+
+    monkeypatch.setattr("sys.argv", ["fingerprint", "--check"])
+    assert fingerprint_module.main() == 1
+
+    monkeypatch.setattr("sys.argv", ["fingerprint"])
+    assert fingerprint_module.main() == 0
+    assert json.loads(path.read_text()) == build_manifest()
+
+    monkeypatch.setattr("sys.argv", ["fingerprint", "--check"])
+    assert fingerprint_module.main() == 0
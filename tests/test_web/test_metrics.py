@@ -0,0 +1,134 @@
+"""Tests for Prometheus metrics."""
+
+import asyncio
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.number_trainer.web.metrics import (
+    EventLoopMonitor,
+    Histogram,
+    MetricsMiddleware,
+    RequestMetrics,
+    access_log_interval,
+    format_labels,
+    render_metric,
+)
+
+
+def test_format_labels():
+    """Test label formatting and escaping."""
+    assert format_labels({}) == ""
+    assert format_labels({"route": "/a", "status": "200"}) == '{route="/a",status="200"}'
+    assert format_labels({"name": 'say "hi"\\\n'}) == '{name="say \\"hi\\"\\\\\\n"}'
+
+
+def test_render_metric():
+    """Test exposition of a gauge."""
+    text = render_metric("size", "gauge", "Number of things.", [({}, 3), ({"kind": "a"}, 1.5)])
+    assert text == '# HELP size Number of things.\n# TYPE size gauge\nsize 3\nsize{kind="a"} 1.5\n'
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test that bucket lines count values up to and including their bound."""
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.samples("latency", {"route": "/"}) == [
+        'latency_bucket{route="/",le="0.1"} 2',
+        'latency_bucket{route="/",le="1.0"} 3',
+        'latency_bucket{route="/",le="+Inf"} 4',
+        'latency_sum{route="/"} 3.65',
+        'latency_count{route="/"} 4',
+    ]
+
+
+def build_app(metrics: RequestMetrics, access_log_every: int = 0) -> FastAPI:
+    """Small app with the middleware."""
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int) -> dict[str, int]:
+        return {"item_id": item_id}
+
+    app.add_middleware(MetricsMiddleware, metrics=metrics, access_log_every=access_log_every)
+    return app
+
+
+def test_middleware_counts_requests_by_route_template():
+    """Test that requests are grouped by route template and status."""
+    metrics = RequestMetrics()
+    client = TestClient(build_app(metrics))
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/x")
+    client.get("/missing")
+
+    histogram, statuses = metrics.routes["GET", "/items/{item_id}"]
+    assert histogram.count == 3
+    assert statuses == {200: 2, 422: 1}
+    assert metrics.routes["GET", "unmatched"][1] == {404: 1}
+
+    text = metrics.render()
+    assert 'number_trainer_http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in text
+    assert 'number_trainer_http_request_duration_seconds_count{method="GET",route="unmatched"} 1' in text
+
+
+def test_middleware_samples_access_log(caplog):
+    """Test that only every Nth request is logged."""
+    client = TestClient(build_app(RequestMetrics(), access_log_every=3))
+    with caplog.at_level(logging.INFO, logger="number_trainer.access"):
+        for item_id in range(7):
+            client.get(f"/items/{item_id}")
+
+    messages = [record.getMessage() for record in caplog.records if record.name == "number_trainer.access"]
+    assert len(messages) == 2
+    assert '"GET /items/2" 200' in messages[0]
+    assert '"GET /items/5" 200' in messages[1]
+
+
+@pytest.mark.parametrize(
+    ("setting", "expected"), [(None, None), ("", None), ("0", 0), ("1", 1), ("0.01", 100), ("0.3", 3)]
+)
+def test_access_log_interval(setting, expected):
+    """Test conversion of the sample rate setting."""
+    assert access_log_interval(setting) == expected
+
+
+def test_access_log_interval_invalid():
+    """Test that rates outside 0..1 are rejected."""
+    with pytest.raises(ValueError):
+        access_log_interval("2")
+
+
+def test_event_loop_monitor_measures_blocking():
+    """Test that a blocked loop shows up as lag."""
+    monitor = EventLoopMonitor(interval=0.01)
+
+    async def run() -> None:
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0)
+        # Block the loop longer than the interval
+        time_to_block = 0.05
+        end = asyncio.get_running_loop().time() + time_to_block
+        while asyncio.get_running_loop().time() < end:
+            pass
+        await asyncio.sleep(0.03)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert monitor.histogram.count >= 1
+    assert monitor.histogram.total >= 0.03
+    assert "number_trainer_event_loop_last_lag_seconds" in monitor.render()
+
+
+def test_event_loop_monitor_invalid_interval():
+    """Test that the interval must be positive."""
+    with pytest.raises(ValueError):
+        EventLoopMonitor(interval=0)
@@ -0,0 +1,189 @@
+"""Tests for the production launchers."""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from src.number_trainer.core.trainer import MathTrainer
+from src.number_trainer.web import routes
+from src.number_trainer.web.prefork import reuseport_socket
+from src.number_trainer.web.production import server_options, worker_count
+from src.number_trainer.web.stats import LocalStatsBackend, SharedMemoryStatsBackend, create_shared_stats_block
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork needs fork")
+
+
+def test_worker_count(monkeypatch):
+    """Test parsing of the WORKERS setting."""
+    assert worker_count(None) == 1
+    assert worker_count("") == 1
+    assert worker_count("3") == 3
+    monkeypatch.setattr(os, "process_cpu_count", lambda: 6)
+    assert worker_count("auto") == 6
+    with pytest.raises(ValueError):
+        worker_count("0")
+
+
+def test_server_options_sampled_access_log(monkeypatch):
+    """Test that a sampled access log replaces the uvicorn one."""
+    monkeypatch.delenv("ACCESS_LOG_SAMPLE_RATE", raising=False)
+    assert server_options()["access_log"] is True
+
+    monkeypatch.setenv("ACCESS_LOG_SAMPLE_RATE", "0.1")
+    options = server_options()
+    assert options["access_log"] is False
+    assert "number_trainer.access" in options["log_config"]["loggers"]
+
+
+def test_reuseport_sockets_share_port():
+    """Test that several workers can bind the same address."""
+    first = reuseport_socket("127.0.0.1", 0)
+    port = first.getsockname()[1]
+    second = reuseport_socket("127.0.0.1", port)
+    try:
+        first.listen()
+        second.listen()
+        assert second.getsockname()[1] == port
+    finally:
+        first.close()
+        second.close()
+
+
+def test_open_worker_storage(monkeypatch, tmp_path):
+    """Test that a forked worker gets its own answer log, history and stats slot."""
+    block = create_shared_stats_block()
+    inherited = SharedMemoryStatsBackend(block.name)
+    monkeypatch.setenv("STATS_BACKEND", "shared")
+    monkeypatch.setenv("STATS_SHM_NAME", block.name)
+    monkeypatch.setattr(routes, "ANSWER_LOG_DIR", str(tmp_path / "log"))
+    monkeypatch.setattr(routes, "HISTORY_DB", str(tmp_path / "history.db"))
+    monkeypatch.setattr(routes, "trainers", {1: MathTrainer(1, 1)})
+    monkeypatch.setattr(routes, "answer_log", None)
+    monkeypatch.setattr(routes, "history", None)
+    monkeypatch.setattr(routes, "stats_backend", inherited)
+    try:
+        routes.open_worker_storage()
+
+        assert routes.answer_log is not None
+        assert routes.trainers[1].answer_log is routes.answer_log
+        assert routes.history is not None
+        assert isinstance(routes.stats_backend, SharedMemoryStatsBackend)
+        assert routes.stats_backend is not inherited
+    finally:
+        if routes.answer_log is not None:
+            routes.answer_log.close()
+        if routes.history is not None:
+            routes.history.close()
+        routes.stats_backend.close()
+        block.close()
+        block.unlink()
+
+
+def test_open_worker_storage_keeps_local_stats(monkeypatch):
+    """Test that local counters with restored history stay in the worker."""
+    backend = LocalStatsBackend()
+    backend.record(True, 1.0)
+    monkeypatch.setattr(routes, "ANSWER_LOG_DIR", None)
+    monkeypatch.setattr(routes, "HISTORY_DB", None)
+    monkeypatch.setattr(routes, "stats_backend", backend)
+    monkeypatch.setattr(routes, "answer_log", None)
+    monkeypatch.setattr(routes, "history", None)
+
+    routes.open_worker_storage()
+    assert routes.stats_backend is backend
+    assert routes.answer_log is None
+    assert routes.history is None
+
+
+def free_port() -> int:
+    """Port that is free on the loopback interface."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port: int = probe.getsockname()[1]
+        return port
+
+
+def worker_pids(pid: int) -> set[int]:
+    """Children of a process, read from /proc."""
+    return {
+        int(child)
+        for children in Path(f"/proc/{pid}/task").glob("*/children")
+        for child in children.read_text().split()
+    }
+
+
+def wait_for(condition, timeout: float = 20.0) -> None:
+    """Poll until condition() is true."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.1)
+
+
+def start_prefork(port: int) -> subprocess.Popen[bytes]:
+    """Start the production server with the prefork launcher and two workers."""
+    env = {
+        **os.environ,
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "WORKERS": "2",
+        "LAUNCHER": "prefork",
+        "LOG_LEVEL": "warning",
+    }
+    return subprocess.Popen([sys.executable, "-m", "src.number_trainer.web.production"], env=env)
+
+
+def answers(url: str) -> bool:
+    """Whether the server answers the liveness probe."""
+    try:
+        return httpx.get(f"{url}/api/live").status_code == 200
+    except httpx.TransportError:
+        return False
+
+
+@pytest.mark.skipif(not Path("/proc/self/task").exists(), reason="needs /proc")
+def test_prefork_server_restarts_and_stops():
+    """Test serving, rolling restart on SIGHUP and graceful stop on SIGTERM."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = start_prefork(port)
+    try:
+        wait_for(lambda: answers(url) and len(worker_pids(server.pid)) == 2)
+        old_workers = worker_pids(server.pid)
+
+        server.send_signal(signal.SIGHUP)
+        wait_for(lambda: len(worker_pids(server.pid)) == 2 and not worker_pids(server.pid) & old_workers)
+        assert answers(url)
+
+        # A worker that dies is replaced
+        os.kill(next(iter(worker_pids(server.pid))), signal.SIGKILL)
+        wait_for(lambda: len(worker_pids(server.pid)) == 2)
+        assert answers(url)
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
+
+
+def test_prefork_fails_when_port_is_taken():
+    """Test that the master exits instead of forking workers that cannot bind."""
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        server = start_prefork(taken.getsockname()[1])
+        try:
+            assert server.wait(timeout=20) != 0
+        finally:
+            if server.poll() is None:
+                server.kill()
+                server.wait()
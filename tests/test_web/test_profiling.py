@@ -0,0 +1,182 @@
+"""Tests for opt-in profiling."""
+
+import asyncio
+import marshal
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.number_trainer.core.trainer import MathTrainer
+from src.number_trainer.web.profiling import (
+    TRAINER_STAGES,
+    Profiler,
+    ProfilingMiddleware,
+    StageTimings,
+    create_profiler,
+    sample_thread,
+)
+
+
+def test_stage_timings_summary():
+    """Test count, mean, percentiles and max per stage."""
+    timings = StageTimings(size=100)
+    for duration in (0.1, 0.2, 0.3, 0.4):
+        timings.record("generate", duration)
+    timings.record("render", 0.5)
+
+    summary = timings.summary()
+    assert list(summary) == ["generate", "render"]
+    assert summary["generate"]["count"] == 4
+    assert summary["generate"]["mean"] == pytest.approx(0.25)
+    assert summary["generate"]["p50"] == 0.2
+    assert summary["generate"]["max"] == 0.4
+    assert summary["render"]["p99"] == 0.5
+
+
+def test_stage_timings_overwrite_oldest():
+    """Test that a full ring keeps only the newest durations."""
+    timings = StageTimings(size=3)
+    for duration in (1.0, 2.0, 3.0, 4.0, 5.0):
+        timings.record("stage", duration)
+
+    assert len(timings) == 3
+    assert timings.summary()["stage"]["total"] == 12.0
+
+
+def test_stage_timings_invalid_size():
+    """Test that the buffer size must be positive."""
+    with pytest.raises(ValueError):
+        StageTimings(size=0)
+
+
+def test_stage_context_manager():
+    """Test timing of a with block, also when it raises."""
+    profiler = Profiler()
+    with profiler.stage("block"):
+        time.sleep(0.01)
+    with pytest.raises(KeyError), profiler.stage("block"):
+        raise KeyError
+
+    summary = profiler.timings.summary()["block"]
+    assert summary["count"] == 2
+    assert summary["max"] >= 0.01
+
+
+def test_instrument_trainer():
+    """Test that instrumented trainer methods are timed and still work."""
+    profiler = Profiler()
+    trainer = MathTrainer(1, 1)
+    profiler.instrument(trainer, TRAINER_STAGES, "trainer")
+
+    exercise = trainer.generate_exercise()
+    assert trainer.check_answer(exercise, exercise.correct_answer).is_correct
+    assert len(trainer.generate_batch(5)) == 5
+
+    summary = profiler.timings.summary()
+    assert set(summary) == {"trainer.generate_exercise", "trainer.check_answer", "trainer.generate_batch"}
+    # Other trainers are not affected
+    assert MathTrainer.generate_exercise.__name__ == "generate_exercise"
+    assert "generate_exercise" not in vars(MathTrainer(1, 1))
+
+
+def test_middleware_times_requests_by_route():
+    """Test that requests are recorded as stages named by route template."""
+    profiler = Profiler()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int) -> dict[str, int]:
+        return {"item_id": item_id}
+
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    summary = profiler.timings.summary()
+    assert summary["request GET /items/{item_id}"]["count"] == 2
+    assert summary["request GET unmatched"]["count"] == 1
+
+
+def busy_wait(stop: threading.Event) -> None:
+    """Spin until stopped, so the sampler finds this function on the stack."""
+    while not stop.is_set():
+        pass
+
+
+def test_sample_thread_collapses_stacks():
+    """Test that samples of another thread are counted per stack, root first."""
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_wait, args=(stop,))
+    thread.start()
+    try:
+        stacks = sample_thread(thread.ident, seconds=0.05, interval=0.001)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert sum(stacks.values()) > 0
+    stack = max(stacks, key=stacks.__getitem__)
+    assert stack.startswith("_bootstrap (threading.py")
+    assert any(frame.startswith("busy_wait (test_profiling.py") for frame in stack.split(";"))
+
+
+def test_sample_stacks_of_event_loop():
+    """Test that sampling returns collapsed stack lines of the loop thread."""
+    profiler = Profiler()
+    text = asyncio.run(profiler.sample_stacks(0.05))
+
+    lines = text.splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert ";" in stack
+    assert not profiler.busy
+
+
+def test_profile_returns_pstats_data():
+    """Test that cProfile data of the loop can be loaded by pstats."""
+    profiler = Profiler()
+
+    async def run() -> bytes:
+        task = asyncio.create_task(profiler.profile(0.05))
+        await asyncio.sleep(0.01)
+        MathTrainer(2, 2).generate_batch(100)
+        return await task
+
+    stats = marshal.loads(asyncio.run(run()))
+    assert any(function == "generate_batch" for _, _, function in stats)
+    assert not profiler.busy
+
+
+def test_only_one_profile_at_a_time():
+    """Test that a second profile is refused while one is running."""
+    profiler = Profiler()
+
+    async def run() -> None:
+        task = asyncio.create_task(profiler.sample_stacks(0.05))
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            await profiler.profile(0.01)
+        await task
+
+    asyncio.run(run())
+    assert not profiler.busy
+
+
+def test_create_profiler(monkeypatch):
+    """Test that profiling is off unless PROFILING is set."""
+    monkeypatch.delenv("PROFILING", raising=False)
+    assert create_profiler() is None
+
+    monkeypatch.setenv("PROFILING", "true")
+    monkeypatch.setenv("PROFILING_BUFFER_SIZE", "50")
+    profiler = create_profiler()
+    assert profiler is not None
+    for _ in range(60):
+        profiler.timings.record("stage", 0.1)
+    assert len(profiler.timings) == 50
@@ -0,0 +1,49 @@
+"""Tests for fast JSON responses."""
+
+import json
+
+from fastapi import Response
+
+from src.number_trainer.web.models import AnswerStepResponse, ExerciseResponse, StatsResponse
+from src.number_trainer.web.responses import ModelResponse, inherit_headers
+
+
+def test_model_response_matches_pydantic_json():
+    """Test that the body is the same JSON FastAPI would produce."""
+    model = AnswerStepResponse.model_validate(
+        {
+            "result": {"correct": True, "correct_answer": 7, "message": "Correct!", "time_taken": None},
+            "exercises": [{"exercise_id": "abc", "question": "3 + 4", "operation": "+"}],
+            "stats": {"total_exercises": 1, "correct_answers": 1, "incorrect_answers": 0, "accuracy": 100.0},
+        }
+    )
+    response = ModelResponse(model, status_code=201)
+
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == model.model_dump(mode="json")
+    assert response.headers["content-length"] == str(len(response.body))
+
+
+def test_parent_headers_are_kept():
+    """Test that cookies and headers set by dependencies survive, but not the parent content length."""
+    parent = Response()
+    parent.set_cookie("first", "1")
+    parent.set_cookie("second", "2")
+    parent.headers["X-Session-ID"] = "s" * 16
+
+    response = ModelResponse(ExerciseResponse(exercise_id="abc", question="3 + 4", operation="+"), parent=parent)
+    cookies = [value for name, value in response.raw_headers if name == b"set-cookie"]
+    assert len(cookies) == 2
+    assert response.headers["x-session-id"] == "s" * 16
+    assert response.headers.getlist("content-length") == [str(len(response.body))]
+
+
+def test_inherit_headers():
+    """Test copying headers onto any response."""
+    parent = Response(headers={"X-Test": "yes"})
+    response = Response(
+        StatsResponse(total_exercises=0, correct_answers=0, incorrect_answers=0, accuracy=0).model_dump_json()
+    )
+    inherit_headers(response, parent)
+    assert response.headers["x-test"] == "yes"
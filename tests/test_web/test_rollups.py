@@ -0,0 +1,113 @@
+"""Tests for class rollups."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.number_trainer.core.models import Operation
+from src.number_trainer.web import rollups as rollups_module
+from src.number_trainer.web.rollups import ClassRollups, WindowTally
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Patch rollup clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(rollups_module, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def test_window_drops_old_buckets():
+    """Test that answers leave the window once their bucket is older than the window."""
+    window = WindowTally(width=10, size=3)
+    window.record(100.0, True, 2.0)
+    window.record(115.0, False)
+    window.record(125.0, True, 4.0)
+
+    totals = window.totals(125.0)
+    assert (totals.total_exercises, totals.correct_answers, totals.average_time) == (3, 2, 3.0)
+
+    # Bucket 10 is out of the window ending in bucket 13
+    assert window.totals(130.0).total_exercises == 2
+    # Reused slot is reset before counting
+    window.record(131.0, False)
+    totals = window.totals(131.0)
+    assert (totals.total_exercises, totals.correct_answers) == (3, 1)
+    assert window.totals(1000.0).total_exercises == 0
+
+
+def test_record_updates_class_aggregates(clock):
+    """Test totals, per-operation and recent counters of a class."""
+    rollups = ClassRollups()
+    rollups.join("class-7a", "anna-session-0001", "Anna")
+    rollups.join("class-7a", "boris-session-001", "Boris")
+
+    rollups.record("anna-session-0001", 1, Operation.ADDITION, True, 2.0)
+    rollups.record("boris-session-001", 2, Operation.SUBTRACTION, False, 4.0)
+    clock.now += 600
+    rollups.record("anna-session-0001", 1, Operation.ADDITION, True, 3.0)
+    # Sessions outside any class are ignored
+    rollups.record("someone-else-0001", 1, Operation.ADDITION, True, 3.0)
+
+    rollup = rollups.get("class-7a")
+    assert rollup is not None
+    assert rollup.total.total_exercises == 3
+    assert rollup.by_kind[1, Operation.ADDITION].correct_answers == 2
+    assert rollup.by_kind[2, Operation.SUBTRACTION].correct_answers == 0
+
+    recent = rollup.recent()
+    assert recent["last_5_minutes"].total_exercises == 1
+    assert recent["last_hour"].total_exercises == 3
+
+    leaders = rollup.leaderboard(10)
+    assert [name for name, _ in leaders] == ["Anna", "Boris"]
+    assert leaders[0][1].total_exercises == 2
+    assert rollup.leaderboard(1) == leaders[:1]
+
+
+def test_join_limits():
+    """Test validation and caps when joining classes."""
+    rollups = ClassRollups(max_classes=1, max_members=1)
+    with pytest.raises(ValueError, match="Malformed"):
+        rollups.join("bad id", "session-000000001", "Anna")
+
+    rollups.join("class-a", "session-000000001", "Anna")
+    with pytest.raises(ValueError, match="full"):
+        rollups.join("class-a", "session-000000002", "Boris")
+    with pytest.raises(ValueError, match="Too many"):
+        rollups.join("class-b", "session-000000002", "Boris")
+
+    # Joining again renames the member
+    rollups.join("class-a", "session-000000001", "Anya")
+    assert rollups.get("class-a").members["session-000000001"][0] == "Anya"
+    assert rollups.stats() == {"classes": 1, "members": 1}
+
+
+def test_switching_class_leaves_previous_leaderboard():
+    """Test that a session counts only in the class it joined last."""
+    rollups = ClassRollups()
+    rollups.join("class-a", "session-000000001", "Anna")
+    rollups.record("session-000000001", 1, Operation.ADDITION, True, 1.0)
+    rollups.join("class-b", "session-000000001", "Anna")
+    rollups.record("session-000000001", 1, Operation.ADDITION, True, 1.0)
+
+    assert rollups.get("class-a").members == {}
+    assert rollups.get("class-a").total.total_exercises == 1
+    assert rollups.get("class-b").total.total_exercises == 1
+
+
+@pytest.mark.parametrize("arguments", [{"max_classes": 0}, {"max_members": 0}])
+def test_invalid_limits(arguments):
+    """Test that caps must be positive."""
+    with pytest.raises(ValueError):
+        ClassRollups(**arguments)
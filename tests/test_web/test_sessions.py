@@ -0,0 +1,168 @@
+"""Tests for session registry."""
+
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from src.number_trainer.web import sessions as sessions_module
+from src.number_trainer.web.sessions import SessionRegistry, SessionStats, create_session_registry
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Patch registry clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(sessions_module, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def test_new_session_gets_generated_id(clock):
+    """Test that missing or malformed id starts a new session."""
+    registry = SessionRegistry()
+
+    first_id, _ = registry.get(None)
+    second_id, _ = registry.get("bad id!")
+    assert first_id != second_id
+    assert len(registry) == 2
+
+
+def test_same_id_returns_same_session(clock):
+    """Test lookup of existing session."""
+    registry = SessionRegistry()
+    session_id, session = registry.get(None)
+    session.record(True)
+
+    assert registry.get(session_id) == (session_id, session)
+    assert session.total_exercises == 1
+    assert session.correct_answers == 1
+
+
+def test_client_id_is_accepted(clock):
+    """Test that well-formed client id is used as is."""
+    registry = SessionRegistry()
+    session_id, _ = registry.get("client-chosen-session-id")
+    assert session_id == "client-chosen-session-id"
+
+
+def test_least_recently_used_session_is_evicted(clock):
+    """Test that cap evicts the session unused for longest."""
+    registry = SessionRegistry(max_sessions=2)
+    first_id, first = registry.get(None)
+    second_id, _ = registry.get(None)
+    registry.get(first_id)  # first becomes most recently used
+    registry.get(None)
+
+    assert len(registry) == 2
+    assert registry.evictions == 1
+    assert registry.get(first_id)[1] is first
+    assert registry.get(second_id)[1].total_exercises == 0
+
+
+def test_idle_session_expires(clock):
+    """Test that idle session is replaced on next use and removed by sweep."""
+    registry = SessionRegistry(idle_timeout=60)
+    session_id, session = registry.get(None)
+    session.record(True)
+    other_id, _ = registry.get(None)
+
+    clock.now += 61
+    _, renewed = registry.get(session_id)
+    assert renewed is not session
+    assert renewed.total_exercises == 0
+
+    # The other session was idle as long and is removed by sweep, the renewed one stays
+    assert registry.sweep() == 1
+    assert registry.get(other_id)[1].total_exercises == 0
+
+    clock.now += 61
+    assert registry.sweep() == 2
+    assert len(registry) == 0
+    assert registry.stats() == {"size": 0, "evictions": 0, "expirations": 4, "outstanding": 0}
+
+
+def test_run_sweeper(clock):
+    """Test that background sweeper removes idle sessions."""
+    registry = SessionRegistry(idle_timeout=60, sweep_interval=0.001)
+    registry.get(None)
+    clock.now += 61
+
+    async def run() -> None:
+        task = asyncio.create_task(registry.run_sweeper())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(registry) == 0
+
+
+def test_session_stats_are_compact():
+    """Test that session objects have no per-instance dict."""
+    session = SessionStats("a" * 22, 0.0)
+    assert not hasattr(session, "__dict__")
+    assert sys.getsizeof(session) <= 80
+
+
+def test_create_session_registry_from_env(monkeypatch):
+    """Test registry configuration from environment."""
+    monkeypatch.setenv("SESSION_MAX_COUNT", "7")
+    monkeypatch.setenv("SESSION_IDLE_TIMEOUT", "30")
+    registry = create_session_registry()
+
+    assert registry.max_sessions == 7
+    assert registry.idle_timeout == 30.0
+
+
+def test_invalid_settings():
+    """Test that registry requires positive settings."""
+    with pytest.raises(ValueError):
+        SessionRegistry(max_sessions=0)
+    with pytest.raises(ValueError):
+        SessionRegistry(idle_timeout=0)
+    with pytest.raises(ValueError):
+        SessionRegistry(sweep_interval=0)
+
+
+def test_prefetched_exercises_are_capped(clock):
+    """Test outstanding exercises per session."""
+    registry = SessionRegistry(max_outstanding=3, outstanding_ttl=60)
+    session_id, _ = registry.get(None)
+    other_id, _ = registry.get(None)
+
+    assert registry.prefetch_room(session_id) == 3
+    registry.add_outstanding(session_id, ["a", "b"])
+    clock.now += 30
+    registry.add_outstanding(session_id, ["c"])
+    assert registry.prefetch_room(session_id) == 0
+    assert registry.prefetch_room(other_id) == 3
+
+    assert registry.settle(session_id, "b") is True
+    assert registry.settle(session_id, "b") is False
+    assert registry.settle(other_id, "a") is False
+    assert registry.prefetch_room(session_id) == 1
+
+    # "a" was handed out more than a minute ago, so it has expired in the store
+    clock.now += 31
+    assert registry.prefetch_room(session_id) == 2
+    assert registry.stats()["outstanding"] == 1
+
+
+def test_outstanding_exercises_are_dropped_with_session(clock):
+    """Test that evicted sessions do not keep their prefetched ids."""
+    registry = SessionRegistry(max_sessions=1)
+    session_id, _ = registry.get(None)
+    registry.add_outstanding(session_id, ["a"])
+    registry.get(None)
+
+    assert registry.stats()["outstanding"] == 0
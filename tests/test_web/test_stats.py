@@ -0,0 +1,100 @@
+"""Tests for statistics backends."""
+
+import pytest
+
+from src.number_trainer.web import stats as stats_module
+from src.number_trainer.web.stats import (
+    MAX_SLOTS,
+    SLOT_FIELDS,
+    LocalStatsBackend,
+    SharedMemoryStatsBackend,
+    StatsTotals,
+    create_shared_stats_block,
+    create_stats_backend,
+)
+
+
+@pytest.fixture
+def shared_block():
+    """Create shared block the way production.py does."""
+    shm = create_shared_stats_block()
+    yield shm
+    shm.close()
+    shm.unlink()
+
+
+def test_local_backend():
+    """Test local counters."""
+    backend = LocalStatsBackend()
+    backend.record(True, 2.0)
+    backend.record(False)
+    backend.record(True, 4.0)
+
+    assert backend.totals() == StatsTotals(3, 2, 2, 6.0)
+    assert backend.totals().average_time == 3.0
+
+
+def test_shared_backend_sums_all_workers(shared_block):
+    """Test that every attached worker sees the global totals."""
+    first_worker = SharedMemoryStatsBackend(shared_block.name)
+    second_worker = SharedMemoryStatsBackend(shared_block.name)
+
+    first_worker.record(True, 1.5)
+    first_worker.record(False)
+    second_worker.record(True, 2.5)
+
+    assert first_worker.totals() == StatsTotals(3, 2, 2, 4.0)
+    assert second_worker.totals() == first_worker.totals()
+
+    first_worker.close()
+    second_worker.close()
+
+
+def test_shared_backend_reuses_slot_of_dead_worker(shared_block, monkeypatch):
+    """Test that slot of a finished worker is reused and its counts are kept."""
+    counters = shared_block.buf.cast("q")
+    counters[0] = 999_999_999  # pid of a worker that no longer runs
+    counters[1] = 10
+    counters[2] = 7
+    counters.release()
+
+    monkeypatch.setattr(stats_module, "_process_alive", lambda pid: False)
+    backend = SharedMemoryStatsBackend(shared_block.name)
+    backend.record(True)
+
+    assert backend.totals()[:2] == (11, 8)
+    backend.close()
+
+
+def test_shared_backend_runs_out_of_slots(shared_block):
+    """Test error when all slots are taken by live workers."""
+    counters = shared_block.buf.cast("q")
+    for slot in range(MAX_SLOTS):
+        counters[slot * SLOT_FIELDS] = 1  # pid 1 always exists
+    counters.release()
+
+    with pytest.raises(RuntimeError):
+        SharedMemoryStatsBackend(shared_block.name)
+
+
+def test_shared_backend_without_block():
+    """Test that backend creates its own block when none is given."""
+    backend = SharedMemoryStatsBackend()
+    backend.record(False)
+
+    assert backend.totals() == StatsTotals(1, 0, 0, 0.0)
+    assert backend.totals().average_time is None
+    backend.close()
+
+
+def test_create_stats_backend(monkeypatch, shared_block):
+    """Test backend selection from environment."""
+    monkeypatch.delenv("STATS_BACKEND", raising=False)
+    assert isinstance(create_stats_backend(), LocalStatsBackend)
+
+    monkeypatch.setenv("STATS_BACKEND", "shared")
+    monkeypatch.setenv("STATS_SHM_NAME", shared_block.name)
+    backend = create_stats_backend()
+    assert isinstance(backend, SharedMemoryStatsBackend)
+    assert backend.name == shared_block.name
+    backend.close()
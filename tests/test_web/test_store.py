@@ -0,0 +1,202 @@
+"""Tests for exercise store."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.number_trainer.core.models import Exercise, Operation
+from src.number_trainer.web import store as store_module
+from src.number_trainer.web.store import SignedTokenStore, TTLExerciseStore, create_exercise_store
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Patch store clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(store_module, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def make_exercise() -> Exercise:
+    """Create simple exercise."""
+    return Exercise(2, 3, Operation.ADDITION, 5)
+
+
+def test_add_and_pop(clock):
+    """Test that stored exercise can be taken out once."""
+    store = TTLExerciseStore(max_size=10, ttl=60)
+    exercise = make_exercise()
+
+    exercise_id = store.add(exercise, 1)
+    assert len(store) == 1
+    assert store.pop(exercise_id) == (exercise, 1)
+    assert store.pop(exercise_id) is None
+    assert len(store) == 0
+
+
+def test_pop_unknown(clock):
+    """Test popping unknown id."""
+    store = TTLExerciseStore()
+    assert store.pop("non-existent") is None
+
+
+def test_eviction_removes_oldest(clock):
+    """Test that exceeding the cap evicts the oldest entry."""
+    store = TTLExerciseStore(max_size=2, ttl=60)
+    first_id = store.add(make_exercise(), 1)
+    second_id = store.add(make_exercise(), 2)
+    third_id = store.add(make_exercise(), 3)
+
+    assert len(store) == 2
+    assert store.evictions == 1
+    assert store.pop(first_id) is None
+    assert store.pop(second_id) is not None
+    assert store.pop(third_id) is not None
+
+
+def test_fill_ratio(clock):
+    """Test share of the cap in use."""
+    store = TTLExerciseStore(max_size=4, ttl=60)
+    assert store.fill_ratio() == 0.0
+    for _ in range(3):
+        store.add(make_exercise(), 1)
+    assert store.fill_ratio() == 0.75
+
+    # Stateless store has no cap
+    assert SignedTokenStore(secret=b"secret").fill_ratio() == 0.0
+
+
+def test_expired_entry_is_not_returned(clock):
+    """Test that expired exercise is reported as missing."""
+    store = TTLExerciseStore(max_size=10, ttl=60)
+    exercise_id = store.add(make_exercise(), 1)
+
+    clock.now += 61
+    assert store.pop(exercise_id) is None
+    assert store.expirations == 1
+
+
+def test_sweep_removes_only_expired(clock):
+    """Test sweeping expired entries."""
+    store = TTLExerciseStore(max_size=10, ttl=60)
+    store.add(make_exercise(), 1)
+    store.add(make_exercise(), 1)
+    clock.now += 30
+    fresh_id = store.add(make_exercise(), 1)
+
+    clock.now += 31
+    assert store.sweep() == 2
+    assert len(store) == 1
+    assert store.pop(fresh_id) is not None
+    assert store.stats() == {"size": 0, "evictions": 0, "expirations": 2}
+
+
+def test_run_sweeper(clock):
+    """Test that background sweeper removes expired entries."""
+    store = TTLExerciseStore(max_size=10, ttl=60, sweep_interval=0.001)
+    store.add(make_exercise(), 1)
+    clock.now += 61
+
+    async def run() -> None:
+        task = asyncio.create_task(store.run_sweeper())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(store) == 0
+
+
+def test_create_exercise_store_from_env(monkeypatch):
+    """Test store configuration from environment."""
+    monkeypatch.setenv("EXERCISE_STORE_MAX_SIZE", "5")
+    monkeypatch.setenv("EXERCISE_TTL", "10")
+    monkeypatch.setenv("EXERCISE_SWEEP_INTERVAL", "2")
+    store = create_exercise_store()
+
+    assert isinstance(store, TTLExerciseStore)
+    assert store.max_size == 5
+    assert store.ttl == 10.0
+    assert store.sweep_interval == 2.0
+
+
+def test_invalid_settings():
+    """Test that store requires positive cap, ttl and sweep interval."""
+    with pytest.raises(ValueError):
+        TTLExerciseStore(max_size=0)
+    with pytest.raises(ValueError):
+        TTLExerciseStore(ttl=0)
+    with pytest.raises(ValueError):
+        TTLExerciseStore(ttl=-5)
+    with pytest.raises(ValueError):
+        TTLExerciseStore(sweep_interval=0)
+
+
+def test_signed_token_roundtrip():
+    """Test that signed token restores the exercise."""
+    store = SignedTokenStore(secret=b"secret", ttl=60)
+    exercise = Exercise(15, 7, Operation.SUBTRACTION, 8)
+
+    token = store.add(exercise, 2)
+    assert len(store) == 0
+    assert store.pop(token) == (exercise, 2)
+
+
+def test_signed_token_shared_between_workers():
+    """Test that a token created by one store is accepted by another with the same secret."""
+    token = SignedTokenStore(secret=b"shared").add(make_exercise(), 1)
+
+    assert SignedTokenStore(secret=b"shared").pop(token) == (make_exercise(), 1)
+    assert SignedTokenStore(secret=b"other").pop(token) is None
+
+
+def test_signed_token_rejects_tampering():
+    """Test that modified or malformed tokens are rejected."""
+    store = SignedTokenStore(secret=b"secret")
+    token = store.add(make_exercise(), 1)
+    tampered = ("A" if token[0] != "A" else "B") + token[1:]
+
+    assert store.pop(tampered) is None
+    assert store.pop("non-existent") is None
+    assert store.pop("!!!") is None
+    assert store.pop("") is None
+
+
+def test_signed_token_expiry(monkeypatch):
+    """Test that expired token is rejected."""
+    store = SignedTokenStore(secret=b"secret", ttl=60)
+    token = store.add(make_exercise(), 1)
+
+    now = store_module.time.time()
+    monkeypatch.setattr(store_module, "time", SimpleNamespace(time=lambda: now + 61))
+    assert store.pop(token) is None
+    assert store.expirations == 1
+
+
+def test_create_signed_store_from_env(monkeypatch):
+    """Test selecting signed store from environment."""
+    monkeypatch.setenv("EXERCISE_STORE", "signed")
+    monkeypatch.setenv("EXERCISE_SECRET", "from-env")
+    store = create_exercise_store()
+
+    assert isinstance(store, SignedTokenStore)
+    token = store.add(make_exercise(), 3)
+    assert SignedTokenStore(secret=b"from-env").pop(token) == (make_exercise(), 3)
+
+
+def test_invalid_signed_settings():
+    """Test that signed store requires secret and positive ttl."""
+    with pytest.raises(ValueError):
+        SignedTokenStore(secret=b"")
+    with pytest.raises(ValueError):
+        SignedTokenStore(secret=b"secret", ttl=0)